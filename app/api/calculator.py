@@ -1,396 +1,871 @@
-from fastapi import APIRouter, HTTPException
-from app.models.request import EquationRequest
+from collections import deque
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from app.models.request import EquationRequest, EvaluateRequest, GraphRequest, SweepRequest, SystemRequest
+from app.models.response import BatchResponse, SolveResponse
 from app.core.validator import validate_equation
-from app.core.parser import parse_equation
-from app.core.solver import solve_equation
-from app.core.steps import generate_steps
-import sympy
-import math
+from app.core.parser import parse_equation, expression_cache
+from app.core.steps import DETAILS, numeric_steps, page, summary_steps
+from app.core.cache import LRUCache
+from app.core.arithmetic import evaluate_arithmetic, compiled_cache
+from app.core.linalg import reduce_vectors, is_vector, norm
+from app.core.executor import run_task, solve_many, pool_stats, timeout_error, too_expensive_error, SystemTask, VectorTask
+from app.core.limits import admission_stats
+from app.core.lazy import startup_report
+from app.core.metrics import stage, label_request, timed, slow_profiles, detach_timer
+from app.core.numeric import build_input, evaluate_function, to_json_values, compiled_functions
+from app.core.graph import render_plot, plot_cache
+from app.core.solver import solve_numeric
+from app.core.formatter import FORMATS, format_numeric_roots, format_numeric_system, truncate
+from app.core.encoding import dumps
+from app.core.calculus import OPERATIONS
+from app.core.sweep import sweep_roots
+from app.core.systems import parse_linear, solve_linear_matrix, solve_linear_numeric, zero_form
+from app.utils.exceptions import SolveTimeout, ExpressionTooExpensive
+from app.config import (
+    CACHE_MAX_ENTRIES,
+    CACHE_MAX_BYTES,
+    CACHE_TTL_SECONDS,
+    BATCH_MAX_ITEMS,
+    SOLVE_TIMEOUT_SECONDS,
+    SOLVE_TIMEOUT_MAX_SECONDS,
+    AUTO_SYMBOLIC_SECONDS,
+    SWEEP_MAX_ROWS,
+    SYSTEM_MAX_UNKNOWNS,
+    SYSTEM_EXACT_MAX_UNKNOWNS,
+    STREAM_CONCURRENCY,
+    STREAM_WINDOW,
+    STREAM_MAX_LINE_BYTES,
+    STEPS_CACHE_MAX_ENTRIES,
+    NUMERIC_SCAN_POINTS,
+    OUTPUT_MAX_CHARS,
+)
+import asyncio
+import anyio
+import json
 import re
 
 router = APIRouter(tags=["Calculator"])
 
+# (canonical SymPy expression, variable, type[, mode, interval, tolerance])
+# -> (JSON-ready result, strategy).
+# SymPy expressions hash structurally, so "x^2-4", "x**2 - 4" and "-4+x²"
+# all parse to the same key.
+result_cache = LRUCache(
+    max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=CACHE_MAX_BYTES,
+    ttl=CACHE_TTL_SECONDS,
+)
 
-def _npr(n: int, r: int) -> int:
-    """Permutations: nPr = n! / (n-r)!"""
-    if r < 0 or r > n:
-        raise ValueError("nPr requires 0 <= r <= n")
-    return math.factorial(n) // math.factorial(n - r)
+# Same key -> (full derivation lines, complete). Kept apart from the results
+# so that responses without detailed steps never carry them around.
+steps_cache = LRUCache(max_entries=STEPS_CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
 
 
-def _ncr(n: int, r: int) -> int:
-    """Combinations: nCr = n! / (r! * (n-r)!)"""
-    if r < 0 or r > n:
-        raise ValueError("nCr requires 0 <= r <= n")
-    return math.factorial(n) // (math.factorial(r) * math.factorial(n - r))
+# Request types used as metric labels; anything else (before it is rejected)
+# shares one label so clients cannot create unbounded metric series
+_METRIC_TYPES = frozenset({"arithmetic", "algebra", "trig", "calculus"})
+
+_SUPERSCRIPT_MAP = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹⁻", "0123456789-")
+_SUPERSCRIPT_RUN = re.compile(r"[⁰¹²³⁴⁵⁶⁷⁸⁹⁻]+")
+
+
+def _superscript_power(match: re.Match) -> str:
+    exponent = match.group(0).translate(_SUPERSCRIPT_MAP)
+    return f"**({exponent})" if "-" in exponent else f"**{exponent}"
 
 
 def normalize_superscripts(text):
-    # Map for digits AND the superscript minus sign
-    super_map = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹⁻", "0123456789-")
+    if text.isascii():
+        return text  # no superscripts to rewrite (a constant-time check)
 
     # 1. Handle the trig functions specifically first
     text = text.replace("sin⁻¹", "asin").replace("cos⁻¹", "acos").replace("tan⁻¹", "atan")
 
-    # 2. Use the map to convert any remaining individual superscript characters
-    return text.translate(super_map)
+    # 2. Turn any remaining run of superscripts into a power: x² -> x**2, x⁻¹ -> x**(-1)
+    return _SUPERSCRIPT_RUN.sub(_superscript_power, text)
+
+
+@router.get("/cache/stats")
+def cache_stats():
+    return {
+        "results": result_cache.stats(),
+        "steps": steps_cache.stats(),
+        "expressions": expression_cache.stats(),
+        "arithmetic": compiled_cache.stats(),
+        "functions": compiled_functions.stats(),
+        "plots": plot_cache.stats(),
+    }
+
+
+@router.get("/workers/stats")
+def worker_stats():
+    return pool_stats()
+
+
+@router.get("/limits/stats")
+def limits_stats():
+    return admission_stats()
+
+
+@router.get("/startup")
+def startup_stats(request: Request):
+    return startup_report(getattr(request.app.state, "import_times", {}))
+
+
+@router.get("/profiles/slow")
+def slow_request_profiles():
+    return slow_profiles()
+
+
+def _request_timeout(req: EquationRequest) -> float:
+    return min(req.timeout or SOLVE_TIMEOUT_SECONDS, SOLVE_TIMEOUT_MAX_SECONDS)
+
 
+_SOLVE_MODES = ("symbolic", "numeric", "auto")
 
-def parse_vector(vec_str: str) -> list:
-    """Parse a vector string like '[3,4]', '{3,4}', or '3,4' into a list of components."""
-    vec_str = vec_str.strip().strip('[]{}')
-    parts = re.split(r"\s*,\s*", vec_str)
-    return [p.strip() for p in parts if p.strip()]
 
+def _check_mode(req: EquationRequest):
+    if req.mode not in _SOLVE_MODES:
+        raise ValueError(f"mode must be one of: {', '.join(_SOLVE_MODES)}")
+    if req.mode != "symbolic":
+        if req.type not in ("algebra", "trig"):
+            raise ValueError(f"{req.mode} mode supports algebra and trig equations")
+        if not req.xmin < req.xmax:
+            raise ValueError("xmin must be less than xmax")
 
-def normalize_vector_brackets(text: str) -> str:
-    """Convert curly braces {a,b} to square brackets [a,b] for consistent processing."""
-    # Convert {a,b} to [a,b]
-    text = re.sub(r'\{([^\}]+)\}', r'[\1]', text)
-    return text
 
+def _check_output(req: EquationRequest):
+    if req.step_detail not in DETAILS:
+        raise ValueError(f"step_detail must be one of: {', '.join(DETAILS)}")
+    if req.format not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
 
-def evaluate_vector_expression(text: str) -> str:
+
+def _full_steps(req: EquationRequest) -> bool:
+    return req.include_steps and req.step_detail == "full"
+
+
+def _operations(req: EquationRequest):
+    """Requested calculus operations as plain dicts (they are sent to worker processes)."""
+    if req.operations is None:
+        return None
+    if req.type != "calculus":
+        raise ValueError("operations apply to calculus equations only")
+    if not req.operations:
+        raise ValueError("operations must list at least one operation")
+    operations = []
+    for item in req.operations:
+        operation = {"op": item} if isinstance(item, str) else item.model_dump(exclude_none=True)
+        if operation["op"] not in OPERATIONS:
+            raise ValueError(f"Unknown calculus operation '{operation['op']}' (expected one of: {', '.join(OPERATIONS)})")
+        operations.append(operation)
+    return operations
+
+
+def _cache_key(expr, req: EquationRequest, operations) -> tuple:
+    key = (expr, req.variable, req.type)
+    if req.mode != "symbolic":
+        key += (req.mode, req.xmin, req.xmax, req.tolerance)
+    if operations is not None:
+        key += (json.dumps(operations, sort_keys=True),)
+    if req.format != "plain":
+        key += (req.format,)
+    return key
+
+
+def _has_solutions(result) -> bool:
+    if isinstance(result, dict):  # trig
+        return bool(result.get("exact"))
+    return bool(result)
+
+
+def _numeric_result(expr, req: EquationRequest):
+    stage("numeric")
+    roots = solve_numeric(expr, req.variable, req.xmin, req.xmax, req.tolerance)
+    return format_numeric_roots(roots, req.type)
+
+
+def _solve_uncached(eq_text: str, expr, req: EquationRequest, operations=None, steps=False) -> tuple:
     """
-    Handle vector addition/subtraction: [a,b]+[c,d] -> [a+c, b+d]
-    Also handles: [a,b]-[c,d] -> [a-c, b-d]
-    Also handles: {a,b}+{c,d} -> [a+c, b+d] (converts to brackets)
+    Solve according to req.mode; returns ((JSON-ready result, strategy), derivation).
+    The derivation (lines, complete) comes from the same worker task when
+    `steps` asks for it, and is None otherwise or for numeric results.
     """
-    # First normalize curly braces to square brackets
-    text = normalize_vector_brackets(text)
-    
-    def eval_vector_op(match: re.Match) -> str:
-        vec1_str = match.group(1)
-        operator = match.group(2)
-        vec2_str = match.group(3)
-        
+    if req.mode == "numeric":
+        return (_numeric_result(expr, req), "numeric"), None
+
+    task = (eq_text, req.variable, req.type, operations, steps, req.format)
+    if req.mode == "auto":
+        # Give the symbolic solver a short deadline; the numeric scan takes milliseconds
         try:
-            vec1 = parse_vector(vec1_str)
-            vec2 = parse_vector(vec2_str)
-            
-            if len(vec1) != len(vec2):
-                raise ValueError(f"Vectors must have same dimension: {len(vec1)} vs {len(vec2)}")
-            
-            if operator == '+':
-                result = [f"({v1})+({v2})" for v1, v2 in zip(vec1, vec2)]
-            elif operator == '-':
-                result = [f"({v1})-({v2})" for v1, v2 in zip(vec1, vec2)]
-            else:
-                return match.group(0)  # Return as-is if unknown operator
-            
-            return "[" + ",".join(result) + "]"
-        except Exception:
-            return match.group(0)  # Return original if parsing fails
-    
-    # Match patterns like [a,b]+[c,d] or [a,b]-[c,d] (after normalization)
-    text = re.sub(r'\[([^\]]+)\]\s*([+\-])\s*\[([^\]]+)\]', eval_vector_op, text)
-    return text
-
-
-def expand_vector_norms(text: str) -> str:
+            outcome = run_task(task, min(_request_timeout(req), AUTO_SYMBOLIC_SECONDS))
+        except SolveTimeout:
+            outcome = None
+        if outcome is not None:
+            if outcome["ok"] and _has_solutions(outcome["result"]):
+                return (outcome["result"], outcome["strategy"]), outcome.get("steps")
+            if not outcome["ok"] and outcome["status_code"] == 422:
+                raise HTTPException(status_code=422, detail=outcome["detail"])
+        return (_numeric_result(expr, req), "numeric"), None
+
+    # Symbolic work runs in a killable worker process under a deadline
+    outcome = run_task(task, _request_timeout(req))
+    if not outcome["ok"]:
+        raise HTTPException(status_code=outcome["status_code"], detail=outcome["detail"])
+    return (outcome["result"], outcome["strategy"]), outcome.get("steps")
+
+
+def _expand_vectors(eq_text: str, req: EquationRequest) -> str:
     """
-    Support vector norm syntax like ||4,5|| or ||x, y, z|| or ||[a,b]+[c,d]|| or ||{a,b}||.
-    We convert:
-        ||a,b||  -> sqrt((a)**2 + (b)**2)
-        ||x,y,z|| -> sqrt((x)**2 + (y)**2 + (z)**2)
-        ||[a,b]+[c,d]|| -> sqrt(((a)+(c))**2 + ((b)+(d))**2)
-        ||{a,b}|| -> sqrt((a)**2 + (b)**2)
-        [a,b] or {a,b} (standalone) -> sqrt((a)**2 + (b)**2)
-    This works for both pure numbers and symbolic variables.
+    Vector syntax as a plain SymPy expression. Numeric parts are reduced
+    with NumPy here; whatever still needs SymPy (symbolic vectors) runs in
+    a worker under the request deadline.
     """
-    # First normalize curly braces to square brackets
-    text = normalize_vector_brackets(text)
-    
-    def _replace_norm(match: re.Match) -> str:
-        inner = match.group(1).strip()
-        if not inner:
-            return "0"
-        
-        # Normalize curly braces in inner expression
-        inner = normalize_vector_brackets(inner)
-        
-        # Check if inner contains vector operations like [a,b]+[c,d]
-        if '[' in inner and ']' in inner and ('+' in inner or '-' in inner):
-            # First evaluate vector operations inside
-            inner_evaluated = evaluate_vector_expression(inner)
-            
-            # Now extract the vector components from the result
-            # inner_evaluated should be like [(a)+(c),(b)+(d)] or [a,b]
-            vec_match = re.match(r'^\s*\[([^\]]+)\]\s*$', inner_evaluated.strip())
-            if vec_match:
-                vec_str = vec_match.group(1)
-                parts = re.split(r"\s*,\s*", vec_str)
-                parts = [p.strip() for p in parts if p.strip()]
-                if parts:
-                    squared_sum = " + ".join(f"(({p})**2)" for p in parts)
-                    return f"sqrt({squared_sum})"
-        
-        # Check if inner is a vector [a,b] or {a,b}
-        vec_match = re.match(r'^\s*\[([^\]]+)\]\s*$', inner.strip())
-        if vec_match:
-            vec_str = vec_match.group(1)
-            parts = re.split(r"\s*,\s*", vec_str)
-            parts = [p.strip() for p in parts if p.strip()]
-            if parts:
-                squared_sum = " + ".join(f"(({p})**2)" for p in parts)
-                return f"sqrt({squared_sum})"
-        
-        # Regular norm: split on comma or whitespace
-        parts = re.split(r"\s*,\s*|\s+", inner)
-        parts = [p for p in parts if p]
-        if not parts:
-            return "0"
-        
-        # Single value ||x|| -> sqrt((x)**2) ~= |x|
-        if len(parts) == 1:
-            term = parts[0]
-            return f"sqrt(({term})**2)"
-        
-        # Multi-dimensional Euclidean norm
-        squared_sum = " + ".join(f"(({p})**2)" for p in parts)
-        return f"sqrt({squared_sum})"
-    
-    # Replace every occurrence of || ... ||
-    text = re.sub(r"\|\|([^|]+)\|\|", _replace_norm, text)
-    
-    # Also handle standalone [a,b] or {a,b} vectors (convert to norm)
-    # But only if it's not part of a larger expression (to avoid breaking things)
-    text_normalized = normalize_vector_brackets(text)
-    if re.match(r'^\s*\[[^\]]+\]\s*$', text_normalized.strip()):
-        vec_str = text_normalized.strip().strip('[]')
-        parts = re.split(r"\s*,\s*", vec_str)
-        parts = [p.strip() for p in parts if p.strip()]
-        if parts:
-            squared_sum = " + ".join(f"(({p})**2)" for p in parts)
-            return f"sqrt({squared_sum})"
-    
-    return text
-
-
-@router.post("/solve")
+    source, matrices = reduce_vectors(eq_text)
+    if matrices is None:
+        return source
+    outcome = run_task(VectorTask(source, matrices), _request_timeout(req))
+    if not outcome["ok"]:
+        raise HTTPException(status_code=outcome["status_code"], detail=outcome["detail"])
+    return outcome["text"]
+
+
+def _is_norm_only(equation: str) -> bool:
+    return re.match(r"^\s*\|\|[^\|]+\|\|\s*$", equation) is not None
+
+
+def _steps_fields(req: EquationRequest, steps, complete=True) -> dict:
+    """The steps part of a response: a page of them at full detail."""
+    if req.step_detail != "full":
+        return {"steps": steps}
+    shown, next_offset = page(steps, req.steps_offset, req.steps_limit)
+    fields = {"steps": shown, "steps_total": len(steps), "steps_complete": complete}
+    if next_offset is not None:
+        fields["steps_next"] = next_offset
+    return fields
+
+
+def _build_response(eq_text: str, req: EquationRequest, result, strategy=None, derivation=None) -> dict:
+    # Closed forms can run to many kilobytes (a quartic's roots, an expanded
+    # integral): cut them down unless the client asked for everything
+    limit = OUTPUT_MAX_CHARS if req.max_length is None else req.max_length
+    result, cut = truncate(result, limit)
+    response = {
+        "success": True,
+        "equation": eq_text,
+        "variable": req.variable,
+        "type": req.type,
+        "result": result,
+    }
+    if req.format != "plain" and strategy != "numeric":
+        response["format"] = req.format
+    if req.include_steps:
+        stage("steps")
+        if derivation is not None:
+            fields = _steps_fields(req, *derivation)
+        elif strategy == "numeric":
+            fields = _steps_fields(req, numeric_steps(eq_text, req.xmin, req.xmax, NUMERIC_SCAN_POINTS, result))
+        else:
+            fields = _steps_fields(req, summary_steps(eq_text, result, strategy))
+        fields["steps"], cut_steps = truncate(fields["steps"], limit)
+        cut = cut or cut_steps
+        response.update(fields)
+    if cut:
+        response["truncated"] = True
+    if strategy is not None:
+        # Which solver handled it: linear, quadratic, cubic, quartic,
+        # polynomial, companion_matrix, numeric or general
+        response["strategy"] = strategy
+    return response
+
+
+def _components(value) -> list:
+    """Array entries as strings, rounded like scalar results (NaN/inf keep their names)."""
+    if value.ndim > 1:
+        return [_components(row) for row in value]
+    return [str(round(v, 10)) for v in value.tolist()]
+
+
+def _arithmetic_response(value, equation: str, include_steps: bool = True) -> dict:
+    if isinstance(value, str):
+        # Too large to compute exactly: admission control returned an approximation
+        response = {
+            "success": True,
+            "result": value,
+            "approximate": True,
+        }
+        if include_steps:
+            response["steps"] = [
+                f"Input received: {equation}",
+                "Exact result is too large to compute; approximating in floating point",
+                f"Approximate result: {value}"
+            ]
+        return response
+    if is_vector(value):
+        # Vectors and matrices come back as (nested) lists, plus their norm
+        magnitude = str(round(norm(value), 10))
+        response = {
+            "success": True,
+            "result": _components(value),
+            "shape": list(value.shape),
+            "norm": magnitude,
+        }
+        if include_steps:
+            kind = "vector" if value.ndim == 1 else "matrix"
+            shape = "×".join(str(n) for n in value.shape)
+            response["steps"] = [
+                f"Input received: {equation}",
+                f"Evaluated {kind} ({shape})",
+                f"Norm: {magnitude}",
+            ]
+        return response
+    result = str(round(value, 10))
+    response = {
+        "success": True,
+        "result": result,  # React expects a string or list based on your render logic
+    }
+    if include_steps:
+        response["steps"] = [
+            f"Input received: {equation}",
+            f"Performing arithmetic operations...",
+            f"Calculation result: {result}"
+        ]
+    return response
+
+
+@router.post("/solve", response_model=SolveResponse, response_model_exclude_unset=True)
+@timed()
 def solve_eq(req: EquationRequest):
+    label_request(req.type if req.type in _METRIC_TYPES else "other")
     try:
-        # Normalize superscripts and then expand any vector norms before further processing
-        eq_text = normalize_superscripts(req.equation.strip())
-        eq_text = expand_vector_norms(eq_text)
-
-        safe_dict = {
-            "math": math,
-            "sqrt": math.sqrt,
-            "log": math.log10,  # Map 'log' to Base 10 (what most users expect)
-            "ln": math.log,
-            "sin": lambda x: math.sin(math.radians(x)),
-            "cos": lambda x: math.cos(math.radians(x)),
-            "tan": lambda x: math.tan(math.radians(x)),
-            "asin": lambda x: math.degrees(math.asin(x)),
-            "acos": lambda x: math.degrees(math.acos(x)),
-            "atan": lambda x: math.degrees(math.atan(x)),
-            "pi": math.pi,
-            "e": math.e,
-            "E": math.e,
-            "factorial": math.factorial,
-            "nPr": lambda n, r: _npr(int(n), int(r)),
-            "nCr": lambda n, r: _ncr(int(n), int(r)),
-        }
+        _check_output(req)
+        equation = req.equation.strip()
 
         # ✅ Norm-only shortcut: if input is just ||a,b|| (or similar), return numeric norm in any mode
-        if "||" in req.equation.strip():
-            norm_only = re.match(r"^\s*\|\|[^\|]+\|\|\s*$", req.equation.strip())
-            if norm_only:
-                try:
-                    clean_norm = eq_text.replace("^", "**").replace("×", "*")
-                    clean_norm = re.sub(r"(\d+)!", r"factorial(\1)", clean_norm)
-                    # No variable in norm expression – safe to eval
-                    val = eval(clean_norm, {"__builtins__": None}, safe_dict)
-                    result = str(round(float(val), 10))
-                    steps = [
-                        f"Input: {req.equation.strip()}",
-                        f"Norm: {eq_text}",
+        if _is_norm_only(equation):
+            stage("norm")
+            try:
+                value = evaluate_arithmetic(equation, x_is_times=req.type == "arithmetic")
+                result = str(round(float(value), 10))
+                response = {
+                    "success": True,
+                    "result": result,
+                }
+                if req.include_steps:
+                    response["steps"] = [
+                        f"Input: {equation}",
+                        "Norm: sqrt of the sum of squared components",
                         f"Result: {result}",
                     ]
-                    return {
-                        "success": True,
-                        "result": result,
-                        "steps": steps,
-                    }
-                except Exception:
-                    pass  # Fall through to symbolic path if eval fails
-
-        # ✅ Arithmetic shortcut (2+3, 5*5 etc.)
+                return response
+            except ExpressionTooExpensive:
+                raise
+            except ValueError:
+                pass  # e.g. symbolic components: fall through to the symbolic path
+
+        # ✅ Arithmetic shortcut (2+3, 5*5 etc.): tokenized, compiled once and cached
         if req.type == "arithmetic":
+            stage("arithmetic")
             try:
-                # Replace common math symbols if necessary
-                normalized = normalize_superscripts(req.equation.strip())
-                
-                # Check if input has ||...|| norm syntax - expand it first
-                if '||' in normalized:
-                    normalized = expand_vector_norms(normalized)
-                
-                # Normalize curly braces to square brackets for consistent processing
-                normalized = normalize_vector_brackets(normalized)
-                
-                # Handle vector operations first (e.g., [3,4]+[1,2] or {3,4}+{1,2})
-                # Check if input contains vector notation BEFORE processing
-                original_eq = normalized
-                has_vectors = ('[' in normalized and ']' in normalized) or ('{' in req.equation and '}' in req.equation)
-                
-                if has_vectors:
-                    # Process vector addition/subtraction
-                    normalized = evaluate_vector_expression(normalized)
-                    
-                    # Now we need to evaluate the vector components properly
-                    # normalized might be like [(3)+(1),(4)+(2)] or [4,6]
-                    # We need to extract and evaluate each component
-                    
-                    def extract_and_eval_vector(vec_expr: str) -> list:
-                        """Extract vector components and evaluate them."""
-                        # Remove outer brackets
-                        vec_expr = vec_expr.strip().strip('[]')
-                        
-                        # Split by comma, but be careful with nested parentheses
-                        parts = []
-                        current_part = ""
-                        paren_depth = 0
-                        
-                        for char in vec_expr:
-                            if char == '(':
-                                paren_depth += 1
-                                current_part += char
-                            elif char == ')':
-                                paren_depth -= 1
-                                current_part += char
-                            elif char == ',' and paren_depth == 0:
-                                if current_part.strip():
-                                    parts.append(current_part.strip())
-                                current_part = ""
-                            else:
-                                current_part += char
-                        
-                        if current_part.strip():
-                            parts.append(current_part.strip())
-                        
-                        # Evaluate each component
-                        evaluated = []
-                        for part in parts:
-                            clean_part = part.replace('x', '*').replace('^', '**').replace('×', '*')
-                            clean_part = re.sub(r'(\d+)!', r'factorial(\1)', clean_part)
-                            try:
-                                val = eval(clean_part, {"__builtins__": None}, safe_dict)
-                                evaluated.append(float(val))
-                            except Exception as e:
-                                raise ValueError(f"Could not evaluate vector component '{part}': {str(e)}")
-                        
-                        return evaluated
-                    
-                    # Check if the entire expression is a vector (or vector operation result)
-                    vec_match = re.match(r'^\s*\[([^\]]+)\]\s*$', normalized.strip())
-                    if vec_match:
-                        try:
-                            vec_components = extract_and_eval_vector(normalized)
-                            norm_value = math.sqrt(sum(p**2 for p in vec_components))
-                            result = str(round(norm_value, 10))
-                            steps = [
-                                f"Input received: {req.equation}",
-                                f"Vector expression: {normalized}",
-                                f"Evaluated vector: {vec_components}",
-                                f"Computing norm: sqrt({'+'.join([f'{p:.1f}²' for p in vec_components])})",
-                                f"Norm result: {result}"
-                            ]
-                            return {
-                                "success": True,
-                                "result": result,
-                                "steps": steps,
-                            }
-                        except Exception as e:
-                            raise HTTPException(status_code=400, detail=f"Vector evaluation error: {str(e)}")
-                
-                # Expand vector norms (for ||...|| syntax)
-                normalized = expand_vector_norms(normalized)
-                normalized = normalized.replace("sin⁻¹", "asin").replace("cos⁻¹", "acos").replace("tan⁻¹", "atan")
-
-                # USE 'normalized' here, NOT 'eq_text'
-                clean_eq = normalized.replace('x', '*').replace('^', '**').replace('×', '*')
-                clean_eq = re.sub(r'(\d+)!', r'factorial(\1)', clean_eq)
-                clean_eq = re.sub(r'\(([^()]+)\)!', r'factorial(\1)', clean_eq)
-
-                # Now eval() receives standard Python syntax (e.g., 7**4 instead of 7⁴)
-                result_value = eval(clean_eq, {"__builtins__": None}, safe_dict)
-
-                result = str(round(result_value, 10))
-                steps = [
-                    f"Input received: {req.equation}",
-                    f"Performing arithmetic operations...",
-                    f"Calculation result: {result}"
-                ]
-                return {
-                    "success": True,
-                    "result": result,  # React expects a string or list based on your render logic
-                    "steps": steps,
-                    # ... other fields
-                }
-            except Exception as e:
-                # This helps you see the actual error in the browser console
+                value = evaluate_arithmetic(equation)
+            except ExpressionTooExpensive:
+                raise
+            except ValueError as e:
                 raise HTTPException(status_code=400, detail=f"Math Error: {str(e)}")
+            return _arithmetic_response(value, req.equation, req.include_steps)
+
+        # Normalize superscripts and then expand any vector norms before further processing
+        stage("normalize")
+        eq_text = normalize_superscripts(equation)
+        stage("vectors")
+        eq_text = _expand_vectors(eq_text, req)
 
         #  For algebra, calculus, trig (existing engine)
+        stage("validate")
         validate_equation(eq_text)
+        _check_mode(req)
+        operations = _operations(req)
+        stage("parse")
         expr = parse_equation(eq_text)
-        raw_result = solve_equation(expr, req.variable, req.type)
 
-        # Normalize SymPy objects into JSON‑serializable strings
-        if req.type == "algebra":
-            # SymPy usually returns a list of solutions
-            if isinstance(raw_result, (list, tuple)):
-                result = [str(r) for r in raw_result]
-            else:
-                result = [str(raw_result)]
-        elif req.type == "trig":
-            # Trig: provide exact and numeric approximations (radians & degrees)
-            if isinstance(raw_result, (list, tuple)):
-                sols = list(raw_result)
+        stage("cache")
+        cache_key = _cache_key(expr, req, operations)
+        cached = result_cache.get(cache_key)
+        full = _full_steps(req)
+        derivation = steps_cache.get(cache_key) if full else None
+        # A cached result without its derivation is solved again, deriving
+        # the steps in the same worker task rather than in a second one
+        if cached is None or (full and derivation is None):
+            cached, derivation = _solve_uncached(eq_text, expr, req, operations, full)
+            result_cache.set(cache_key, cached)
+            if derivation is not None:
+                steps_cache.set(cache_key, derivation)
+
+        return _build_response(eq_text, req, *cached, derivation=derivation)
+
+    except HTTPException:
+        raise
+    except SolveTimeout as exc:
+        raise HTTPException(status_code=408, detail=timeout_error(exc))
+    except ExpressionTooExpensive as exc:
+        raise HTTPException(status_code=422, detail=too_expensive_error(exc))
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+
+def _batch_error(status_code: int, detail) -> dict:
+    return {"success": False, "status_code": status_code, "detail": detail}
+
+
+@router.post("/solve/batch", response_model=BatchResponse, response_model_exclude_unset=True)
+@timed("batch")
+def solve_batch(reqs: List[EquationRequest]):
+    """
+    Solve many equations in one round trip. Results come back in request order,
+    with failures reported per item. Symbolic items are deduplicated on their
+    canonical form and spread across the worker process pool.
+    """
+    if len(reqs) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large: {len(reqs)} items (max {BATCH_MAX_ITEMS})")
+
+    results = [None] * len(reqs)
+    pending = {}  # cache_key -> (task, [(index, eq_text)])
+
+    for i, req in enumerate(reqs):
+        # Arithmetic, norm shortcuts, numeric/auto modes and full steps run inline through the normal path
+        if req.type == "arithmetic" or req.mode != "symbolic" or _full_steps(req) or _is_norm_only(req.equation.strip()):
+            try:
+                results[i] = solve_eq(req)
+            except HTTPException as he:
+                results[i] = _batch_error(he.status_code, he.detail)
+            continue
+
+        try:
+            _check_output(req)
+            eq_text = normalize_superscripts(req.equation.strip())
+            eq_text = _expand_vectors(eq_text, req)
+            validate_equation(eq_text)
+            operations = _operations(req)
+            expr = parse_equation(eq_text)
+        except HTTPException as he:
+            results[i] = _batch_error(he.status_code, he.detail)
+            continue
+        except SolveTimeout as exc:
+            results[i] = _batch_error(408, timeout_error(exc))
+            continue
+        except ExpressionTooExpensive as exc:
+            results[i] = _batch_error(422, too_expensive_error(exc))
+            continue
+        except ValueError as ve:
+            results[i] = _batch_error(400, str(ve))
+            continue
+
+        cache_key = _cache_key(expr, req, operations)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            results[i] = _build_response(eq_text, req, *cached)
+            continue
+
+        entry = pending.get(cache_key)
+        if entry is None:
+            entry = pending[cache_key] = ((eq_text, req.variable, req.type, operations, False, req.format), [])
+        entry[1].append((i, eq_text))
+
+    stage("solve_many")
+    tasks = [task for task, _ in pending.values()]
+    timeouts = [_request_timeout(reqs[members[0][0]]) for _, members in pending.values()]
+    outcomes = solve_many(tasks, timeouts)
+    for (cache_key, (_, members)), outcome in zip(pending.items(), outcomes):
+        if outcome["ok"]:
+            result_cache.set(cache_key, (outcome["result"], outcome["strategy"]))
+        for i, eq_text in members:
+            if outcome["ok"]:
+                results[i] = _build_response(eq_text, reqs[i], outcome["result"], outcome["strategy"])
             else:
-                sols = [raw_result]
-
-            exact = [str(s) for s in sols]
-            approx_rad = []
-            approx_deg = []
-            for s in sols:
-                try:
-                    numeric = float(sympy.N(s))
-                    approx_rad.append(numeric)
-                    approx_deg.append(float(sympy.N(numeric * 180 / sympy.pi)))
-                except Exception:
-                    # Fallback if SymPy cannot evaluate numerically
-                    approx_rad.append(None)
-                    approx_deg.append(None)
-
-            result = {
-                "exact": exact,
-                "approx_rad": approx_rad,
-                "approx_deg": approx_deg,
-            }
-        elif req.type == "calculus":
-            # Expect a dict with derivative / integral
-            if isinstance(raw_result, dict):
-                result = {k: str(v) for k, v in raw_result.items()}
+                results[i] = _batch_error(outcome["status_code"], outcome["detail"])
+
+    return {
+        "success": True,
+        "count": len(results),
+        "solved": len(pending),
+        "results": results,
+    }
+
+
+class _DuplexResponse(StreamingResponse):
+    """
+    A StreamingResponse written while the request body is still being read.
+    StreamingResponse normally waits on receive() for a disconnect, which
+    would swallow the body; here a disconnect surfaces from request.stream()
+    as ClientDisconnect instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+# Marks an input line that was too long to buffer
+_OVERSIZED = object()
+
+
+async def _body_lines(chunks, limit: int):
+    """
+    Split a streamed request body into lines as it arrives, holding at most
+    one partial line. A line over `limit` bytes is skipped up to its newline
+    and yields _OVERSIZED instead, so memory stays bounded by the limit.
+    """
+    buffer = b""
+    skipping = False
+    async for chunk in chunks:
+        lines = (buffer + chunk).split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            if skipping:
+                skipping = False  # the rest of an oversized line
             else:
-                result = {"value": str(raw_result)}
-        else:
-            result = str(raw_result)
+                yield _OVERSIZED if len(line) > limit else line
+        if len(buffer) > limit:
+            if not skipping:
+                skipping = True
+                yield _OVERSIZED
+            buffer = b""
+    if buffer and not skipping:
+        yield buffer
+
+
+def _solve_line(line: bytes) -> dict:
+    """Solve one NDJSON line through the /solve pipeline (runs in a worker thread)."""
+    # Lines are solved concurrently: keep their stages off the stream's timer
+    detach_timer()
+    if line is _OVERSIZED:
+        return _batch_error(413, f"Line too large (max {STREAM_MAX_LINE_BYTES} bytes)")
+    try:
+        req = EquationRequest.model_validate_json(line)
+    except ValidationError as exc:
+        return _batch_error(422, jsonable_encoder(exc.errors(include_url=False)))
+    try:
+        return solve_eq(req)
+    except HTTPException as he:
+        return _batch_error(he.status_code, he.detail)
 
-        steps = generate_steps(eq_text, result)
-        steps = [str(step) for step in steps]
 
-        return {
-            "success": True,
-            "equation": eq_text,
-            "variable": req.variable,
-            "type": req.type,
-            "result": result,
-            "steps": steps
-        }
+async def _stream_results(request: Request):
+    """
+    Read lines, solve up to STREAM_CONCURRENCY of them at once in worker
+    threads and write each result as soon as it and every earlier one are
+    done. Once STREAM_WINDOW results are pending, reading waits for the
+    oldest; writing waits for the client, so a slow reader slows down
+    reading too and memory stays flat however long the stream is.
+    """
+    limiter = anyio.CapacityLimiter(STREAM_CONCURRENCY)
+    pending = deque()  # tasks in input order
 
+    def emit(index, result):
+        return dumps({"index": index, **result}) + b"\n"
+
+    try:
+        index = 0
+        async for line in _body_lines(request.stream(), STREAM_MAX_LINE_BYTES):
+            if line is not _OVERSIZED and not line.strip():
+                continue  # blank lines carry no request
+            task = asyncio.ensure_future(anyio.to_thread.run_sync(_solve_line, line, limiter=limiter))
+            pending.append((index, task))
+            index += 1
+            while pending and (len(pending) >= STREAM_WINDOW or pending[0][1].done()):
+                i, task = pending.popleft()
+                yield emit(i, await task)
+        while pending:
+            i, task = pending.popleft()
+            yield emit(i, await task)
+    finally:
+        # Client went away: drop queued lines (threads already solving finish on their own)
+        for _, task in pending:
+            task.cancel()
+
+
+@router.post("/solve/stream")
+async def solve_stream(request: Request):
+    """
+    Bulk solve over NDJSON: one EquationRequest per line in, one result per
+    line out, in input order and tagged with its zero-based line index
+    (blank lines are skipped and not counted). Neither body is buffered.
+    """
+    label_request("stream")
+    return _DuplexResponse(_stream_results(request), media_type="application/x-ndjson")
+
+
+def _system_response(req: SystemRequest, names, solutions, strategy) -> Response:
+    # Exact solutions of larger systems can be enormous fractions: cut them like /solve results
+    limit = OUTPUT_MAX_CHARS if req.max_length is None else req.max_length
+    shown, cut = truncate(solutions, limit)
+    payload = {
+        "success": True,
+        "equations": req.equations,
+        "variables": names,
+        # dense_lu, sparse_lu, linear_exact, linear_symbolic, nonlinear or nsolve
+        "strategy": strategy,
+        "count": len(solutions),
+        "solutions": shown,
+    }
+    if cut:
+        payload["truncated"] = True
+    return Response(content=dumps(payload), media_type="application/json")
+
+
+def _check_unknowns(names):
+    if not names:
+        raise ValueError("No unknowns to solve for")
+    if len(set(names)) != len(names):
+        raise ValueError("variables must not repeat")
+    if len(names) > SYSTEM_MAX_UNKNOWNS:
+        raise HTTPException(status_code=413, detail=f"System too large: {len(names)} unknowns (max {SYSTEM_MAX_UNKNOWNS})")
+
+
+@router.post("/solve/system")
+@timed("system")
+def solve_system_eq(req: SystemRequest):
+    """
+    Solve a system of equations for several unknowns. Numeric linear systems
+    are factorized in-process; exact, symbolic and nonlinear systems run in a
+    worker process under the request deadline.
+    """
+    try:
+        if not req.equations:
+            raise ValueError("At least one equation is required")
+        if len(req.equations) > SYSTEM_MAX_UNKNOWNS:
+            raise HTTPException(status_code=413, detail=f"System too large: {len(req.equations)} equations (max {SYSTEM_MAX_UNKNOWNS})")
+        if req.variables is not None:
+            _check_unknowns(req.variables)
+        stage("normalize")
+        texts = [normalize_superscripts(eq.strip()) for eq in req.equations]
+        for text in texts:
+            validate_equation(text)
+
+        # Plain linear equations are read without SymPy and, unless small
+        # enough to solve exactly, factorized right here
+        stage("classify")
+        linear = parse_linear(texts, req.variables)
+        names = req.variables
+        if linear is not None:
+            names, rows, cols, values, b, exact = linear
+            _check_unknowns(names)
+            if not (exact and len(names) <= SYSTEM_EXACT_MAX_UNKNOWNS):
+                stage("factorize")
+                solved = solve_linear_numeric(len(names), rows, cols, values, b)
+                if solved is not None:
+                    x, strategy = solved
+                    return _system_response(req, names, format_numeric_system(x, names), strategy)
+
+        stage("parse")
+        equations = [zero_form(text) for text in texts]
+        exprs = [parse_equation(text) for text in equations]
+        if names is None:
+            names = sorted({str(s) for expr in exprs for s in expr.free_symbols})
+            _check_unknowns(names)
+
+        # Other numeric linear systems ('x*2 + y = 0') go through their matrix
+        stage("factorize")
+        solved = solve_linear_matrix(exprs, names)
+        if solved is not None:
+            x, strategy = solved
+            return _system_response(req, names, format_numeric_system(x, names), strategy)
+
+        stage("cache")
+        cache_key = ("system", tuple(equations), tuple(names), tuple(req.guess or ()))
+        cached = result_cache.get(cache_key)
+        if cached is None:
+            outcome = run_task(SystemTask(equations, names, req.guess), _request_timeout(req))
+            if not outcome["ok"]:
+                raise HTTPException(status_code=outcome["status_code"], detail=outcome["detail"])
+            cached = (outcome["result"], outcome["strategy"])
+            result_cache.set(cache_key, cached)
+        return _system_response(req, names, *cached)
+
+    except HTTPException:
+        raise
+    except SolveTimeout as exc:
+        raise HTTPException(status_code=408, detail=timeout_error(exc))
+    except ExpressionTooExpensive as exc:
+        raise HTTPException(status_code=422, detail=too_expensive_error(exc))
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+
+def _sweep_columns(req: SweepRequest) -> tuple:
+    names = list(req.parameters)
+    if not names:
+        raise ValueError("At least one parameter is required")
+    if req.variable in req.parameters:
+        raise ValueError(f"'{req.variable}' is the variable being solved for, not a parameter")
+    lengths = {len(values) for values in req.parameters.values()}
+    if len(lengths) != 1:
+        raise ValueError("Parameter columns must all have the same length")
+    rows = lengths.pop()
+    if rows == 0:
+        raise ValueError("Parameter columns must not be empty")
+    if rows > SWEEP_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Sweep too large: {rows} rows (max {SWEEP_MAX_ROWS})")
+    if not req.xmin < req.xmax:
+        raise ValueError("xmin must be less than xmax")
+    return names, list(req.parameters.values())
+
+
+def _symbolic_solutions(eq_text: str, expr, req: SweepRequest) -> tuple:
+    """Solve once in terms of the parameters; returns (solution strings, strategy)."""
+    cache_key = (expr, req.variable, "algebra")
+    cached = result_cache.get(cache_key)
+    if cached is None:
+        try:
+            outcome = run_task((eq_text, req.variable, "algebra", None), _request_timeout(req))
+        except SolveTimeout:
+            return [], "numeric"
+        if not outcome["ok"]:
+            if outcome["status_code"] == 422:
+                raise HTTPException(status_code=422, detail=outcome["detail"])
+            return [], "numeric"
+        cached = (outcome["result"], outcome["strategy"])
+        result_cache.set(cache_key, cached)
+    result, strategy = cached
+    return (result, strategy) if result else ([], "numeric")
+
+
+@router.post("/sweep")
+@timed("sweep")
+def sweep(req: SweepRequest):
+    """
+    Solve one equation family for many parameter rows, e.g. a*x**2 + b*x + c
+    over columns of a, b and c. The equation is solved symbolically once and
+    the solutions are evaluated for all rows with NumPy; rows without a
+    closed-form answer are solved numerically. Roots are reported in [xmin, xmax].
+    """
+    try:
+        names, columns = _sweep_columns(req)
+        stage("parse")
+        eq_text = normalize_superscripts(req.equation.strip())
+        validate_equation(eq_text)
+        expr = parse_equation(eq_text)
+        missing = sorted(str(s) for s in expr.free_symbols if str(s) != req.variable and str(s) not in names)
+        if missing:
+            raise ValueError(f"No values given for parameter(s): {', '.join(missing)}")
+
+        stage("solve")
+        solutions, strategy = _symbolic_solutions(eq_text, expr, req)
+        roots, numeric_rows = sweep_roots(
+            expr, req.variable, names, columns,
+            [parse_equation(s) for s in solutions],
+            req.xmin, req.xmax, req.tolerance, report=stage,
+        )
+    except HTTPException:
+        raise
+    except ExpressionTooExpensive as exc:
+        raise HTTPException(status_code=422, detail=too_expensive_error(exc))
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+    stage("encode")
+    payload = {
+        "success": True,
+        "equation": eq_text,
+        "variable": req.variable,
+        "parameters": names,
+        "count": len(roots),
+        "strategy": strategy,
+        "solutions": solutions,
+        "numeric_rows": numeric_rows,  # rows the closed form did not cover
+        "roots": roots,
+    }
+    return Response(content=dumps(payload), media_type="application/json")
+
+
+@router.post("/evaluate")
+@timed("evaluate")
+def evaluate(req: EvaluateRequest):
+    """
+    Evaluate an expression over many inputs in one vectorized NumPy call.
+    Each variable takes an explicit list or a {start, stop, num|step} range.
+    """
+    try:
+        if req.format not in ("json", "binary"):
+            raise ValueError("format must be 'json' or 'binary'")
+        if not req.variables:
+            raise ValueError("At least one variable is required")
+        stage("parse")
+        eq_text = normalize_superscripts(req.expression.strip())
+        validate_equation(eq_text)
+        expr = parse_equation(eq_text)
+        names = list(req.variables)
+        inputs = [build_input(spec) for spec in req.variables.values()]
+        stage("evaluate")
+        values = evaluate_function(expr, names, inputs, grid=req.grid)
+    except ExpressionTooExpensive as exc:
+        raise HTTPException(status_code=422, detail=too_expensive_error(exc))
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+    stage("encode")
+    shape = ",".join(str(n) for n in values.shape)
+    if req.format == "binary":
+        return Response(
+            content=values.astype("<f8").tobytes(),
+            media_type="application/octet-stream",
+            headers={"X-Shape": shape, "X-Dtype": "float64-le", "X-Variables": ",".join(names)},
+        )
+
+    # Encode directly: FastAPI's generic encoder walks every element of large lists
+    payload = {
+        "success": True,
+        "expression": eq_text,
+        "variables": names,
+        "shape": list(values.shape),
+        "values": to_json_values(values),
+    }
+    return Response(content=dumps(payload), media_type="application/json")
+
+
+_IMAGE_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+def _graph(req: GraphRequest) -> Response:
+    try:
+        if req.format not in _IMAGE_TYPES:
+            raise ValueError("format must be 'png' or 'svg'")
+        if not req.xmin < req.xmax:
+            raise ValueError("xmin must be less than xmax")
+        stage("parse")
+        eq_text = normalize_superscripts(req.equation.strip())
+        validate_equation(eq_text)
+        expr = parse_equation(eq_text)
+        extra = sorted(str(s) for s in expr.free_symbols if str(s) != req.variable)
+        if extra:
+            raise ValueError(f"Cannot plot against '{req.variable}' with free variable(s): {', '.join(extra)}")
+        stage("render")
+        image = render_plot(expr, req.variable, req.xmin, req.xmax, req.width, req.height, req.format)
+    except ExpressionTooExpensive as exc:
+        raise HTTPException(status_code=422, detail=too_expensive_error(exc))
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    return Response(
+        content=image,
+        media_type=_IMAGE_TYPES[req.format],
+        headers={"Cache-Control": "public, max-age=3600"},
+    )
+
+
+@router.get("/graph")
+@timed("graph")
+def graph_get(req: GraphRequest = Depends()):
+    """Render f(variable) over [xmin, xmax] as a PNG or SVG image."""
+    return _graph(req)
+
+
+@router.post("/graph")
+@timed("graph")
+def graph_post(req: GraphRequest):
+    """Render f(variable) over [xmin, xmax] as a PNG or SVG image."""
+    return _graph(req)
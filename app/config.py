@@ -0,0 +1,134 @@
+import os
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_stage_timeouts(name, default):
+    """Parse "stage=seconds,stage=seconds" into a dict."""
+    value = os.environ.get(name, default)
+    limits = {}
+    for item in value.split(","):
+        if item.strip():
+            stage, _, seconds = item.partition("=")
+            limits[stage.strip()] = float(seconds)
+    return limits
+
+
+# Result cache (canonical expression + variable + type -> JSON-ready result)
+CACHE_MAX_ENTRIES = _env_int("CALC_CACHE_MAX_ENTRIES", 4096)
+CACHE_MAX_BYTES = _env_int("CALC_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+CACHE_TTL_SECONDS = _env_float("CALC_CACHE_TTL_SECONDS", 3600.0)
+
+# Parsed expression cache (normalized input text -> SymPy expression)
+EXPR_CACHE_MAX_ENTRIES = _env_int("CALC_EXPR_CACHE_MAX_ENTRIES", 8192)
+
+# Compiled arithmetic expressions (input text -> code object)
+ARITH_CACHE_MAX_ENTRIES = _env_int("CALC_ARITH_CACHE_MAX_ENTRIES", 8192)
+
+# Worker processes for symbolic work (0 solves in-process, without deadlines)
+SOLVE_WORKERS = _env_int("CALC_SOLVE_WORKERS", os.cpu_count() or 1)
+SOLVE_WORKER_START_METHOD = os.environ.get("CALC_SOLVE_WORKER_START_METHOD", "spawn")
+SOLVE_WORKER_MAX_TASKS = _env_int("CALC_SOLVE_WORKER_MAX_TASKS", 500)
+BATCH_MAX_ITEMS = _env_int("CALC_BATCH_MAX_ITEMS", 10000)
+
+# Deadlines for symbolic work (seconds). A request may ask for its own
+# timeout, capped at SOLVE_TIMEOUT_MAX_SECONDS. Stage limits apply on top of
+# the request deadline, e.g. CALC_STAGE_TIMEOUTS="parse=2,integral=5".
+SOLVE_TIMEOUT_SECONDS = _env_float("CALC_SOLVE_TIMEOUT_SECONDS", 10.0)
+SOLVE_TIMEOUT_MAX_SECONDS = _env_float("CALC_SOLVE_TIMEOUT_MAX_SECONDS", 60.0)
+STAGE_TIMEOUTS = _env_stage_timeouts("CALC_STAGE_TIMEOUTS", "parse=2")
+
+# Admission control: cost limits checked on the parsed expression before any
+# evaluation. With the "approximate" policy, an arithmetic result that is too
+# large to compute exactly is returned as a float approximation instead.
+# Results are also kept printable: Python will not turn an int of more than
+# 4300 digits (about 14,280 bits) into a string, so larger caps are lowered.
+MAX_RESULT_BITS = _env_int("CALC_MAX_RESULT_BITS", 14_000)
+MAX_FACTORIAL_ARG = _env_int("CALC_MAX_FACTORIAL_ARG", 20_000)
+MAX_EXPONENT_TOWER = _env_int("CALC_MAX_EXPONENT_TOWER", 5)
+MAX_POLY_DEGREE = _env_int("CALC_MAX_POLY_DEGREE", 1000)
+OVERSIZE_POLICY = os.environ.get("CALC_OVERSIZE_POLICY", "approximate")  # or "reject"
+
+# Vectorized evaluation (/evaluate)
+NUMERIC_CACHE_MAX_ENTRIES = _env_int("CALC_NUMERIC_CACHE_MAX_ENTRIES", 1024)
+MAX_EVAL_POINTS = _env_int("CALC_MAX_EVAL_POINTS", 2_000_000)
+
+# Plot rendering (/graph)
+PLOT_CACHE_MAX_ENTRIES = _env_int("CALC_PLOT_CACHE_MAX_ENTRIES", 256)
+PLOT_CACHE_MAX_BYTES = _env_int("CALC_PLOT_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+PLOT_MAX_POINTS = _env_int("CALC_PLOT_MAX_POINTS", 4000)
+
+# Cold start: heavy modules load on first use. CALC_PREWARM names what to load
+# in the background right after startup ("sympy,numpy,matplotlib,workers" or
+# "all"); it is empty by default so serverless instances start as fast as possible.
+_PREWARM_ALL = ["sympy", "numpy", "matplotlib", "workers"]
+PREWARM = [
+    target.strip()
+    for target in os.environ.get("CALC_PREWARM", "").split(",")
+    if target.strip()
+]
+if "all" in PREWARM:
+    PREWARM = list(_PREWARM_ALL)
+
+# Instrumentation (/metrics, Server-Timing). Requests slower than
+# SLOW_REQUEST_SECONDS are counted as slow; with CALC_PROFILE_SLOW_REQUESTS=1
+# their call stacks are also sampled and logged.
+SLOW_REQUEST_SECONDS = _env_float("CALC_SLOW_REQUEST_SECONDS", 1.0)
+PROFILE_SLOW_REQUESTS = _env_int("CALC_PROFILE_SLOW_REQUESTS", 0) > 0
+PROFILE_INTERVAL_SECONDS = _env_float("CALC_PROFILE_INTERVAL_SECONDS", 0.005)
+
+# Numeric root finding (mode="numeric"/"auto" on /solve): grid points used to
+# bracket roots, refinement iteration cap, and how long "auto" gives the
+# symbolic solver before falling back to the numeric result.
+NUMERIC_SCAN_POINTS = _env_int("CALC_NUMERIC_SCAN_POINTS", 4001)
+NUMERIC_MAX_ITERATIONS = _env_int("CALC_NUMERIC_MAX_ITERATIONS", 100)
+AUTO_SYMBOLIC_SECONDS = _env_float("CALC_AUTO_SYMBOLIC_SECONDS", 2.0)
+
+# Calculus: how long symbolic integration of a definite integral may run in a
+# worker before falling back to adaptive quadrature, and the quadrature budget.
+INTEGRAL_SYMBOLIC_SECONDS = _env_float("CALC_INTEGRAL_SYMBOLIC_SECONDS", 2.0)
+QUADRATURE_MAX_INTERVALS = _env_int("CALC_QUADRATURE_MAX_INTERVALS", 2000)
+
+# Parametric sweeps (/sweep): parameter rows per request, and how many of them
+# may fall back to the per-row numeric root finder when no closed form applies.
+SWEEP_MAX_ROWS = _env_int("CALC_SWEEP_MAX_ROWS", 100_000)
+SWEEP_MAX_NUMERIC_ROWS = _env_int("CALC_SWEEP_MAX_NUMERIC_ROWS", 5_000)
+
+# Systems of equations (/solve/system). Numeric linear systems are solved
+# in-process with LU (sparse LU via SciPy when installed and the matrix is
+# large and sparse); small integer systems are solved exactly, and nonlinear
+# ones get SYSTEM_SYMBOLIC_SECONDS of sympy.solve before nsolve is tried.
+SYSTEM_MAX_UNKNOWNS = _env_int("CALC_SYSTEM_MAX_UNKNOWNS", 2000)
+SYSTEM_EXACT_MAX_UNKNOWNS = _env_int("CALC_SYSTEM_EXACT_MAX_UNKNOWNS", 20)
+SYSTEM_SPARSE_MIN_UNKNOWNS = _env_int("CALC_SYSTEM_SPARSE_MIN_UNKNOWNS", 200)
+SYSTEM_SYMBOLIC_SECONDS = _env_float("CALC_SYSTEM_SYMBOLIC_SECONDS", 5.0)
+
+# Streaming bulk solve (/solve/stream): equations solved at once, and how many
+# results may be pending (solved or in progress, not yet written) before the
+# server stops reading the request body. Lines longer than STREAM_MAX_LINE_BYTES
+# are answered with an error without being buffered.
+STREAM_CONCURRENCY = _env_int("CALC_STREAM_CONCURRENCY", 8)
+STREAM_WINDOW = _env_int("CALC_STREAM_WINDOW", 256)
+STREAM_MAX_LINE_BYTES = _env_int("CALC_STREAM_MAX_LINE_BYTES", 1024 * 1024)
+
+# Step-by-step explanations (step_detail="full"): derivations are cut off
+# after STEPS_MAX lines or STEPS_SECONDS of work in the worker, and cached
+# alongside the result so later pages are free.
+STEPS_MAX = _env_int("CALC_STEPS_MAX", 1000)
+STEPS_SECONDS = _env_float("CALC_STEPS_SECONDS", 1.0)
+STEPS_CACHE_MAX_ENTRIES = _env_int("CALC_STEPS_CACHE_MAX_ENTRIES", 1024)
+
+# Response size: strings in /solve results and steps longer than
+# OUTPUT_MAX_CHARS are cut (a request's max_length overrides it; 0 keeps
+# everything), and responses of at least GZIP_MIN_BYTES are gzip-compressed
+# for clients that accept it (0 disables compression).
+OUTPUT_MAX_CHARS = _env_int("CALC_OUTPUT_MAX_CHARS", 4000)
+GZIP_MIN_BYTES = _env_int("CALC_GZIP_MIN_BYTES", 1024)
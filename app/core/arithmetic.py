@@ -0,0 +1,421 @@
+"""
+Arithmetic engine: a single-pass tokenizer and Pratt parser that turns
+calculator input (superscripts, ×, x-as-times, !, nPr/nCr, degree trig,
+vectors, matrices and ||norms||) into a Python AST, compiled once and cached.
+"""
+import ast
+import math
+import re
+
+from app.config import ARITH_CACHE_MAX_ENTRIES
+from app.core.cache import LRUCache
+from app.core.limits import check_arithmetic, record_check, record_rejection, record_approximation
+from app.core.linalg import (
+    OPERATOR_CALLS, vector, array, norm, dot, cross, det, inv, transpose,
+    times, divide, power, floordiv, mod, is_vector,
+)
+from app.utils.exceptions import ExpressionTooExpensive
+
+_TOKEN = re.compile(
+    r"\s*(?:"
+    r"(?P<num>\d+\.?\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)"
+    r"|(?P<name>[A-Za-z_][A-Za-z0-9_]*)"
+    r"|(?P<sup>[⁰¹²³⁴⁵⁶⁷⁸⁹⁻]+)"
+    r"|(?P<op>\*\*|//|\|\||[-+*/%^×÷·!(),\[\]{}.@])"
+    r")"
+)
+# Characters of a bracketed list of plain numbers, e.g. a 10,000-component
+# vector, which is converted in one step instead of one token per component
+_LITERAL_CHARS = str.maketrans("", "", "0123456789.,eE+- \t\r\n")
+# In symbolic input only lists at least this long are taken as literals (and
+# reduced with NumPy); shorter ones stay exact SymPy matrices
+_SYMBOLIC_LITERAL_MIN = 32
+_SUPERSCRIPT_MAP = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹⁻", "0123456789-")
+_OP_ALIASES = {"^": "**", "×": "*", "÷": "/"}
+_INVERSE_TRIG = {"sin": "asin", "cos": "acos", "tan": "atan"}
+
+
+def _npr(n, r):
+    """Permutations: nPr = n! / (n-r)!"""
+    n, r = _as_int(n), _as_int(r)
+    if r < 0 or r > n:
+        raise ValueError("nPr requires 0 <= r <= n")
+    return math.perm(n, r)
+
+
+def _ncr(n, r):
+    """Combinations: nCr = n! / (r! * (n-r)!)"""
+    n, r = _as_int(n), _as_int(r)
+    if r < 0 or r > n:
+        raise ValueError("nCr requires 0 <= r <= n")
+    return math.comb(n, r)
+
+
+def _as_int(value):
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if not isinstance(value, int):
+        raise ValueError(f"Expected an integer, got {value}")
+    return value
+
+
+def _factorial(n):
+    return math.factorial(_as_int(n))
+
+
+# Names visible to compiled expressions. Trig works in degrees, log is base 10.
+NAMESPACE = {
+    "__builtins__": {},
+    "math": math,
+    "sqrt": math.sqrt,
+    "log": math.log10,
+    "ln": math.log,
+    "exp": math.exp,
+    "abs": abs,
+    "sin": lambda x: math.sin(math.radians(x)),
+    "cos": lambda x: math.cos(math.radians(x)),
+    "tan": lambda x: math.tan(math.radians(x)),
+    "asin": lambda x: math.degrees(math.asin(x)),
+    "acos": lambda x: math.degrees(math.acos(x)),
+    "atan": lambda x: math.degrees(math.atan(x)),
+    "pi": math.pi,
+    "e": math.e,
+    "E": math.e,
+    "factorial": _factorial,
+    "nPr": _npr,
+    "nCr": _ncr,
+    "norm": norm,
+    "dot": dot,
+    "cross": cross,
+    "det": det,
+    "inv": inv,
+    "transpose": transpose,
+    "_vec": vector,
+    "_array": array,
+    "_norm": norm,
+    "_times": times,
+    "_divide": divide,
+    "_power": power,
+    "_floordiv": floordiv,
+    "_mod": mod,
+}
+_FUNCTIONS = {name for name, value in NAMESPACE.items() if callable(value) and name != "math"}
+_CONSTANTS = {"pi", "e", "E"}
+_CONSTANT_VALUES = {name: NAMESPACE[name] for name in _CONSTANTS}
+_KNOWN = _FUNCTIONS | _CONSTANTS | {"math"}
+
+_BINARY = {
+    "+": (10, ast.Add),
+    "-": (10, ast.Sub),
+    "*": (20, ast.Mult),
+    "/": (20, ast.Div),
+    "//": (20, ast.FloorDiv),
+    "%": (20, ast.Mod),
+    "@": (20, ast.MatMult),
+    "·": (20, None),  # dot product
+    "**": (40, ast.Pow),
+}
+# Names whose value may be a vector or matrix; '*' next to one is checked at run time
+_VECTOR_VALUES = {"_vec", "_array", "cross", "inv", "transpose"}
+_UNARY_BP = 30
+_POSTFIX_BP = 50
+_CLOSERS = {"[": "]", "{": "}"}
+
+
+def tokenize(text, x_is_times=True, literals=True, min_literal=1):
+    """
+    Split input into (kind, value) tokens in one left-to-right pass.
+    With x_is_times, a bare 'x' is multiplication (2x3 == 6), as on a calculator.
+    With literals, a bracketed list (or ||norm|| body) of at least
+    min_literal plain numbers becomes a single ("array", tuple of floats) token.
+    """
+    tokens = []
+    pos, end = 0, len(text)
+    while pos < end:
+        match = _TOKEN.match(text, pos)
+        if match is None or match.end() == pos:
+            if text[pos:].strip() == "":
+                break
+            raise ValueError(f"Unexpected character '{text[pos]}' at position {pos}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "name" and x_is_times and value not in _KNOWN and "x" in value:
+            # Re-scan from the first 'x', emitting it as '*'
+            head = value[:value.index("x")]
+            start = match.start(kind)
+            if head:
+                tokens.append(("name", head))
+            tokens.append(("op", "*"))
+            pos = start + len(head) + 1
+            continue
+        if kind == "sup":
+            exponent = value.translate(_SUPERSCRIPT_MAP)
+            if exponent == "-1" and tokens and tokens[-1][0] == "name" and tokens[-1][1] in _INVERSE_TRIG:
+                tokens[-1] = ("name", _INVERSE_TRIG[tokens[-1][1]])
+            else:
+                tokens.append(("sup", exponent))
+        elif kind == "op" and literals and value in _CLOSERS:
+            start = match.start(kind)
+            close = text.find(_CLOSERS[value], start)
+            values = _number_list(text[start + 1:close]) if close > 0 else None
+            if values is None or len(values) < min_literal:
+                tokens.append(("op", value))
+            else:
+                tokens.append(("array", values))
+                pos = close + 1
+                continue
+        elif kind == "op" and literals and value == "||":
+            # ||1, 2, ...|| takes the same fast path as [1, 2, ...]
+            start = match.start(kind) + 2
+            close = text.find("||", start)
+            values = _number_list(text[start:close]) if close > 0 else None
+            if values is None or len(values) < min_literal:
+                tokens.append(("op", value))
+            else:
+                tokens.extend([("op", "||"), ("array", values), ("op", "||")])
+                pos = close + 2
+                continue
+        elif kind == "op":
+            tokens.append(("op", _OP_ALIASES.get(value, value)))
+        else:
+            tokens.append((kind, value))
+        pos = match.end()
+    tokens.append(("end", None))
+    return tokens
+
+
+def _number_list(body):
+    """'1, 2.5, -3e2' -> (1.0, 2.5, -300.0); None if it is not just numbers."""
+    if body.translate(_LITERAL_CHARS):
+        return None
+    try:
+        return tuple(map(float, body.split(",")))
+    except ValueError:
+        return None  # e.g. '2-1' or an empty list: leave it to the parser
+
+
+class _Parser:
+    def __init__(self, tokens, symbolic=False):
+        self.tokens = tokens
+        self.pos = 0
+        self.symbolic = symbolic  # unknown names are symbols and functions
+        self.literals = []        # number lists, bound to names at evaluation time
+
+    def peek(self):
+        return self.tokens[self.pos]
+
+    def next(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def expect(self, value):
+        kind, got = self.next()
+        if got != value or kind != "op":
+            raise ValueError(f"Expected '{value}' but found '{got or 'end of input'}'")
+
+    def at(self, value):
+        kind, got = self.peek()
+        return kind == "op" and got == value
+
+    def lbp(self, token):
+        kind, value = token
+        if kind == "sup":
+            return _BINARY["**"][0]
+        if kind != "op":
+            return 0
+        if value == "!":
+            return _POSTFIX_BP
+        return _BINARY[value][0] if value in _BINARY else 0
+
+    def parse(self):
+        node = self.expression()
+        kind, value = self.peek()
+        if kind != "end":
+            raise ValueError(f"Unexpected '{value}'")
+        return node
+
+    def expression(self, rbp=0):
+        left = self.nud(self.next())
+        while rbp < self.lbp(self.peek()):
+            left = self.led(self.next(), left)
+        return left
+
+    def nud(self, token):
+        kind, value = token
+        if kind == "num":
+            number = float(value) if any(c in value for c in ".eE") else int(value)
+            return ast.Constant(number)
+        if kind == "name":
+            return self.name(value)
+        if kind == "array":
+            # Kept out of the AST: compiling a huge tuple constant is slower than parsing it
+            self.literals.append(value)
+            return ast.Name(f"_literal{len(self.literals) - 1}", ast.Load())
+        if kind == "op":
+            if value == "(":
+                node = self.expression()
+                self.expect(")")
+                return node
+            if value in ("-", "+"):
+                op = ast.USub() if value == "-" else ast.UAdd()
+                return ast.UnaryOp(op, self.expression(_UNARY_BP))
+            if value in _CLOSERS:
+                return _call("_vec", self.sequence(_CLOSERS[value]))
+            if value == "||":
+                return _call("_norm", self.norm_parts())
+        raise ValueError(f"Unexpected '{value or 'end of input'}'")
+
+    def led(self, token, left):
+        kind, value = token
+        if kind == "sup":
+            exponent = ast.Constant(int(value)) if value.lstrip("-").isdigit() else None
+            if exponent is None:
+                raise ValueError("Invalid superscript exponent")
+            if _may_be_vector(left):
+                return _call("_power", [left, exponent])
+            return ast.BinOp(left, ast.Pow(), exponent)
+        if value == "!":
+            return _call("factorial", [left])
+        bp, op = _BINARY[value]
+        # '**' is right-associative: 2**3**2 == 2**9
+        right = self.expression(bp - 1 if value == "**" else bp)
+        if value == "·":
+            return _call("dot", [left, right])
+        if value in OPERATOR_CALLS and (_may_be_vector(left) or _may_be_vector(right)):
+            # Checked at run time: vectors are never combined element-wise
+            return _call(OPERATOR_CALLS[value][0], [left, right])
+        return ast.BinOp(left, op(), right)
+
+    def name(self, word):
+        if word == "math":
+            self.expect(".")
+            kind, attr = self.next()
+            if kind != "name" or attr.startswith("_") or not hasattr(math, attr):
+                raise ValueError(f"Unknown name 'math.{attr}'")
+            func = ast.Attribute(ast.Name("math", ast.Load()), attr, ast.Load())
+            if self.at("("):
+                self.next()
+                return ast.Call(func, self.sequence(")"), [])
+            return func
+        if word in _FUNCTIONS and not word.startswith("_"):
+            self.expect("(")
+            return _call(word, self.sequence(")"))
+        if word in _CONSTANTS:
+            return ast.Name(word, ast.Load())
+        if self.symbolic and not word.startswith("_"):
+            if self.at("("):
+                self.next()
+                return _call(word, self.sequence(")"))
+            return ast.Name(word, ast.Load())
+        raise ValueError(f"Unknown name '{word}'")
+
+    def sequence(self, closer):
+        items = []
+        if self.at(closer):
+            self.next()
+            return items
+        while True:
+            items.append(self.expression())
+            if self.at(","):
+                self.next()
+                continue
+            self.expect(closer)
+            return items
+
+    def norm_parts(self):
+        # ||a, b||, ||a b|| and ||[a, b] + [c, d]|| are all accepted
+        parts = []
+        while True:
+            if self.at("||"):
+                self.next()
+                if not parts:
+                    return [ast.Constant(0)]
+                return parts
+            if self.peek()[0] == "end":
+                raise ValueError("Unclosed '||' norm")
+            parts.append(self.expression())
+            if self.at(","):
+                self.next()
+
+
+def _may_be_vector(node):
+    return any(
+        isinstance(n, ast.Name) and (n.id in _VECTOR_VALUES or n.id.startswith("_literal"))
+        for n in ast.walk(node)
+    )
+
+
+def _call(name, args):
+    return ast.Call(ast.Name(name, ast.Load()), list(args), [])
+
+
+def _parse(text, x_is_times, symbolic=False):
+    """
+    Parse calculator input into a Python ast.Expression (no evaluation),
+    plus its number-list literals: tuples of floats the tree refers to as
+    _literal0, _literal1, ... With symbolic, unknown names are kept as
+    symbols (for SymPy) and only long lists become literals; short ones
+    stay in the tree as exact numbers.
+    """
+    min_literal = _SYMBOLIC_LITERAL_MIN if symbolic else 1
+    parser = _Parser(tokenize(text, x_is_times, min_literal=min_literal), symbolic)
+    tree = ast.Expression(parser.parse())
+    return ast.fix_missing_locations(tree), parser.literals
+
+
+# (text, x_is_times) -> (ast.Expression, code object, approximation, rejection,
+# namespace). The admission verdict is part of the entry, so each distinct
+# input is costed once; the namespace carries its number-list literals as arrays.
+compiled_cache = LRUCache(max_entries=ARITH_CACHE_MAX_ENTRIES)
+
+
+def _frozen(values):
+    values.flags.writeable = False  # shared by every evaluation of the cached entry
+    return values
+
+
+def compile_arithmetic(text, x_is_times=True):
+    key = (text, x_is_times)
+    compiled = compiled_cache.get(key)
+    if compiled is None:
+        try:
+            tree, literals = _parse(text, x_is_times)
+        except RecursionError:
+            raise ValueError("Expression is nested too deeply")
+        approximation, rejection = None, None
+        try:
+            approximation = check_arithmetic(tree, NAMESPACE, _CONSTANT_VALUES)
+        except ExpressionTooExpensive as exc:
+            rejection = (exc.reason, str(exc))
+        code = compile(tree, "<arithmetic>", "eval") if rejection is None else None
+        namespace = NAMESPACE
+        if literals and code is not None:
+            namespace = dict(NAMESPACE)
+            for i, values in enumerate(literals):
+                namespace[f"_literal{i}"] = _frozen(array(values))
+        compiled = (tree, code, approximation, rejection, namespace)
+        compiled_cache.set(key, compiled)
+    return compiled
+
+
+def evaluate_arithmetic(text, x_is_times=True):
+    """
+    Evaluate calculator input. Returns a number, a NumPy vector or matrix,
+    or - when the exact value is too large to compute - a string in
+    scientific notation.
+    """
+    _, code, approximation, rejection, namespace = compile_arithmetic(text, x_is_times)
+    record_check()
+    if rejection is not None:
+        record_rejection(rejection[0])
+        raise ExpressionTooExpensive(*rejection)
+    if approximation is not None:
+        record_approximation()
+        return approximation
+    try:
+        return eval(code, namespace)
+    except ZeroDivisionError:
+        raise ValueError("Division by zero")
+    except (OverflowError, TypeError) as e:
+        raise ValueError(str(e))
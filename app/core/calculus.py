@@ -0,0 +1,108 @@
+"""
+Calculus operations requested one by one: derivatives (nth-order, partial),
+indefinite and definite integrals, and limits. Only the requested ones are
+computed. A definite integral that SymPy cannot do within a short budget is
+integrated numerically with adaptive Gauss-Kronrod quadrature instead.
+"""
+from app.config import INTEGRAL_SYMBOLIC_SECONDS
+from app.core.deadline import SoftTimeout, soft_deadline
+from app.core.lazy import lazy_module
+
+sympy = lazy_module("sympy")
+
+OPERATIONS = ("derivative", "integral", "definite_integral", "limit")
+DEFAULT_OPERATIONS = ({"op": "derivative"}, {"op": "integral"})
+
+
+def _parse_value(text, name):
+    from app.core.parser import parse_equation
+
+    if text is None:
+        raise ValueError(f"'{name}' is required")
+    return parse_equation(str(text).replace("^", "**"))
+
+
+def _derivative(expr, var, operation):
+    names = operation.get("variables")
+    if names:
+        # Mixed partial derivative: differentiate by each variable in turn
+        return sympy.diff(expr, *[sympy.Symbol(n) for n in names])
+    return sympy.diff(expr, var, operation.get("order", 1))
+
+
+def _definite_integral(expr, var, operation, report):
+    lower = _parse_value(operation.get("lower"), "lower")
+    upper = _parse_value(operation.get("upper"), "upper")
+    try:
+        with soft_deadline(INTEGRAL_SYMBOLIC_SECONDS):
+            value = sympy.integrate(expr, (var, lower, upper))
+        if not value.has(sympy.Integral):
+            # nan, zoo or +-oo: the integral diverges (1/x over [-1, 1]), which is no converged value
+            converged = not value.has(sympy.nan, sympy.zoo, sympy.oo, -sympy.oo)
+            return {"value": value, "approx": _approx(value), "method": "symbolic", "error": None, "converged": converged}
+    except SoftTimeout:
+        pass
+
+    # No antiderivative found quickly: integrate the lambdified integrand numerically
+    report("quadrature")
+    extra = sorted(str(s) for s in expr.free_symbols if s != var)
+    if extra or not (lower.is_number and upper.is_number):
+        raise ValueError("Numeric integration needs numeric bounds and a single variable")
+    from app.core.numeric import compile_function
+    from app.core.quadrature import integrate_adaptive
+
+    func = compile_function(expr, [str(var)])
+    value, error, converged = integrate_adaptive(func, float(lower), float(upper))
+    return {
+        "value": value,
+        "approx": value,
+        "method": "gauss_kronrod",
+        "error": error,
+        "converged": converged,
+    }
+
+
+def _approx(value):
+    try:
+        number = complex(sympy.N(value))
+    except (TypeError, ValueError):
+        return None
+    return number.real if abs(number.imag) < 1e-12 else None
+
+
+def _limit(expr, var, operation):
+    point = _parse_value(operation.get("point"), "point")
+    direction = operation.get("direction") or "+-"
+    if direction not in ("+", "-", "+-"):
+        raise ValueError("Limit direction must be '+', '-' or '+-'")
+    return sympy.limit(expr, var, point, direction)
+
+
+def run_operations(expr, var, operations=None, report=None):
+    """
+    Compute the requested operations, keyed by operation name (repeats get
+    a numeric suffix: derivative, derivative_2, ...).
+    """
+    report = report or (lambda stage: None)
+    results = {}
+    for operation in operations or DEFAULT_OPERATIONS:
+        name = operation.get("op")
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown calculus operation '{name}' (expected one of: {', '.join(OPERATIONS)})")
+        target = sympy.Symbol(operation["variable"]) if operation.get("variable") else var
+        report(name)
+        if name == "derivative":
+            value = _derivative(expr, target, operation)
+        elif name == "integral":
+            value = sympy.integrate(expr, target)
+        elif name == "definite_integral":
+            value = _definite_integral(expr, target, operation, report)
+        else:
+            value = _limit(expr, target, operation)
+
+        key, n = name, 1
+        while key in results:
+            n += 1
+            key = f"{name}_{n}"
+        results[key] = value
+    return results
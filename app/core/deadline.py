@@ -0,0 +1,39 @@
+"""
+Soft deadlines inside a worker process: a symbolic step gets a short budget
+and the caller falls back to a numeric method when it runs out, while the
+pool's hard deadline still bounds the task as a whole.
+"""
+import signal
+import threading
+from contextlib import contextmanager
+
+
+class SoftTimeout(Exception):
+    """Raised inside a soft_deadline block when its time is up."""
+
+
+@contextmanager
+def soft_deadline(seconds):
+    """
+    Interrupt the block with SoftTimeout after `seconds`, using SIGALRM.
+    Signals only reach the main thread, so this is a no-op elsewhere (e.g.
+    when solving inline in a server thread rather than in a worker process).
+    """
+    if (
+        not seconds
+        or not hasattr(signal, "setitimer")
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        yield
+        return
+
+    def expire(signum, frame):
+        raise SoftTimeout()
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
@@ -0,0 +1,338 @@
+import multiprocessing
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import (
+    SOLVE_WORKERS,
+    SOLVE_WORKER_START_METHOD,
+    SOLVE_WORKER_MAX_TASKS,
+    SOLVE_TIMEOUT_SECONDS,
+    STAGE_TIMEOUTS,
+)
+from app.core.metrics import stage
+from app.utils.exceptions import SolveTimeout, ExpressionTooExpensive
+
+_CRASHED = {"ok": False, "status_code": 500, "detail": "Internal Server Error: worker process crashed"}
+
+# A system of equations to solve (see solve_system_task); plain tuples are
+# single-equation (eq_text, variable, eq_type, operations[, steps, fmt]) tasks
+SystemTask = namedtuple("SystemTask", ["equations", "variables", "guess"])
+# Vector syntax to expand with SymPy: reduce_vectors' source and matrices
+VectorTask = namedtuple("VectorTask", ["source", "matrices"])
+
+_pool = None
+_pool_failed = False
+_pool_lock = threading.Lock()
+
+
+def solve_task(eq_text, variable, eq_type, operations=None, steps=False, fmt="plain", on_stage=None):
+    """
+    Parse, solve and format one symbolic equation in the output format
+    `fmt`, and with `steps` derive the full step-by-step explanation while
+    the expression is at hand.
+    Runs inside a worker process, so it never raises: errors come back as values.
+    """
+    from app.core.parser import parse_equation
+    from app.core.solver import solve_with_strategy
+    from app.core.formatter import format_result
+
+    report = on_stage or (lambda stage: None)
+    try:
+        report("parse")
+        expr = parse_equation(eq_text)
+        raw_result, strategy = solve_with_strategy(expr, variable, eq_type, report, operations)
+        report("format")
+        outcome = {"ok": True, "result": format_result(raw_result, eq_type, fmt), "strategy": strategy}
+        if steps:
+            from app.core.steps import derivation
+
+            report("steps")
+            outcome["steps"] = derivation(expr, variable, eq_type, strategy, operations, raw_result)
+        return outcome
+    except ExpressionTooExpensive as exc:
+        return {"ok": False, "status_code": 422, "detail": too_expensive_error(exc)}
+    except ValueError as ve:
+        return {"ok": False, "status_code": 400, "detail": str(ve)}
+    except Exception as e:
+        return {"ok": False, "status_code": 500, "detail": f"Internal Server Error: {str(e)}"}
+
+
+def solve_system_task(equations, variables, guess=None, on_stage=None):
+    """Parse, solve and format a system of equations (each already in '== 0' form)."""
+    from app.core.parser import parse_equation
+    from app.core.systems import solve_system
+    from app.core.formatter import format_system
+    from app.core.lazy import load
+
+    report = on_stage or (lambda stage: None)
+    try:
+        report("parse")
+        exprs = [parse_equation(text) for text in equations]
+        sympy = load("sympy")
+        symbols = [sympy.Symbol(name) for name in variables]
+        solutions, strategy = solve_system(exprs, symbols, guess, report)
+        report("format")
+        return {"ok": True, "result": format_system(solutions, variables), "strategy": strategy}
+    except ExpressionTooExpensive as exc:
+        return {"ok": False, "status_code": 422, "detail": too_expensive_error(exc)}
+    except ValueError as ve:
+        return {"ok": False, "status_code": 400, "detail": str(ve)}
+    except Exception as e:
+        return {"ok": False, "status_code": 500, "detail": f"Internal Server Error: {str(e)}"}
+
+
+def expand_vectors_task(source, matrices, on_stage=None):
+    """Rewrite vector syntax into a plain SymPy expression (see linalg.expand_vectors)."""
+    from app.core.linalg import expand_vectors
+
+    report = on_stage or (lambda stage: None)
+    try:
+        report("vectors")
+        return {"ok": True, "text": expand_vectors(source, matrices)}
+    except ExpressionTooExpensive as exc:
+        return {"ok": False, "status_code": 422, "detail": too_expensive_error(exc)}
+    except ValueError as ve:
+        return {"ok": False, "status_code": 400, "detail": str(ve)}
+    except Exception as e:
+        return {"ok": False, "status_code": 500, "detail": f"Internal Server Error: {str(e)}"}
+
+
+def execute(task, on_stage=None):
+    """Run a task of any kind (in a worker, or inline when there is no pool)."""
+    if isinstance(task, SystemTask):
+        return solve_system_task(*task, on_stage=on_stage)
+    if isinstance(task, VectorTask):
+        return expand_vectors_task(*task, on_stage=on_stage)
+    return solve_task(*task, on_stage=on_stage)
+
+
+def timeout_error(exc: SolveTimeout) -> dict:
+    return {
+        "message": str(exc),
+        "stage": exc.stage,
+        "timeout": exc.timeout,
+    }
+
+
+def too_expensive_error(exc: ExpressionTooExpensive) -> dict:
+    return {
+        "message": str(exc),
+        "reason": exc.reason,
+    }
+
+
+def _worker_main(conn):
+    # Import the SymPy stack up front so a fresh worker is warm before its first task
+    from app.core import parser, solver, formatter  # noqa: F401
+    from app.core.lazy import load
+
+    load("sympy")
+    load("numpy")
+
+    def report(stage):
+        conn.send(("stage", stage))
+
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        if task is None:
+            return
+        conn.send(("done", execute(task, on_stage=report)))
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class WorkerPool:
+    """
+    Fixed-size pool of killable worker processes. Unlike ProcessPoolExecutor,
+    a task that overruns its deadline gets its worker killed and replaced, so
+    one pathological input cannot pin a process for minutes.
+    """
+
+    def __init__(self, size, start_method="spawn", max_tasks_per_worker=None):
+        self.size = size
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self._context = multiprocessing.get_context(start_method)
+        self._idle = queue.LifoQueue()  # LIFO keeps recently used workers hot
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.timeouts = 0
+        self.crashes = 0
+        self.recycled = 0
+        for _ in range(size):
+            self._idle.put(_Worker(self._context))
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return _Worker(self._context)
+
+    def _replace(self, worker):
+        worker.kill()
+        self._idle.put(_Worker(self._context))
+
+    def run(self, task, timeout, stage_timeouts=None):
+        """Run one task; raise SolveTimeout naming the stage that overran."""
+        stage_timeouts = stage_timeouts or {}
+        deadline = time.monotonic() + timeout
+        stage("queue")
+        if not self._slots.acquire(timeout=timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise SolveTimeout("queue", timeout)
+        try:
+            worker = self._checkout()
+            try:
+                worker.conn.send(task)
+                current, stage_deadline = "queue", deadline
+                while True:
+                    limit_at = min(deadline, stage_deadline)
+                    remaining = limit_at - time.monotonic()
+                    if remaining <= 0 or not worker.conn.poll(remaining):
+                        self._replace(worker)
+                        with self._lock:
+                            self.timeouts += 1
+                            self.recycled += 1
+                        limit = stage_timeouts[current] if limit_at < deadline else timeout
+                        raise SolveTimeout(current, limit)
+                    kind, payload = worker.conn.recv()
+                    if kind == "stage":
+                        current = payload
+                        stage(current)
+                        stage_limit = stage_timeouts.get(current)
+                        stage_deadline = time.monotonic() + stage_limit if stage_limit else deadline
+                        continue
+                    break
+            except (EOFError, OSError):
+                self._replace(worker)
+                with self._lock:
+                    self.crashes += 1
+                return dict(_CRASHED)
+
+            worker.tasks += 1
+            with self._lock:
+                self.completed += 1
+            if self.max_tasks_per_worker and worker.tasks >= self.max_tasks_per_worker:
+                worker.stop()
+                self._idle.put(_Worker(self._context))
+                with self._lock:
+                    self.recycled += 1
+            else:
+                self._idle.put(worker)
+            return payload
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.size,
+                "idle": self._idle.qsize(),
+                "completed": self.completed,
+                "timeouts": self.timeouts,
+                "crashes": self.crashes,
+                "recycled": self.recycled,
+            }
+
+
+def get_pool():
+    """Return the shared worker pool, or None when workers are disabled/unavailable."""
+    global _pool, _pool_failed
+    if SOLVE_WORKERS <= 0 or _pool_failed:
+        return None
+    with _pool_lock:
+        if _pool is None and not _pool_failed:
+            try:
+                _pool = WorkerPool(SOLVE_WORKERS, SOLVE_WORKER_START_METHOD, SOLVE_WORKER_MAX_TASKS)
+            except (OSError, ValueError, NotImplementedError, ImportError):
+                # e.g. sandboxes that cannot start processes: solve in-process instead
+                _pool_failed = True
+        return _pool
+
+
+def run_task(task, timeout=None):
+    """
+    Solve one (eq_text, variable, eq_type[, operations, steps, fmt]) task, SystemTask or VectorTask
+    under a deadline. Without a worker pool the task runs inline and
+    deadlines are not enforced.
+    """
+    pool = get_pool()
+    if pool is None:
+        return execute(task, on_stage=stage)
+    return pool.run(task, timeout or SOLVE_TIMEOUT_SECONDS, STAGE_TIMEOUTS)
+
+
+def _run_task_outcome(task, timeout):
+    try:
+        return run_task(task, timeout)
+    except SolveTimeout as exc:
+        return {"ok": False, "status_code": 408, "detail": timeout_error(exc)}
+
+
+def solve_many(tasks, timeouts=None):
+    """
+    Solve a list of (eq_text, variable, eq_type[, operations]) tuples, spreading them across
+    the worker pool when one is available. Results are returned in order, with
+    timeouts reported per task. `timeouts` optionally gives a deadline per task.
+    """
+    if not tasks:
+        return []
+    timeouts = timeouts or [None] * len(tasks)
+    pool = get_pool()
+    if pool is None or len(tasks) == 1:
+        return [_run_task_outcome(task, timeout) for task, timeout in zip(tasks, timeouts)]
+
+    # Dispatch threads only wait on worker pipes, so one per worker is enough
+    with ThreadPoolExecutor(max_workers=pool.size) as dispatch:
+        return list(dispatch.map(_run_task_outcome, tasks, timeouts))
+
+
+def pool_stats():
+    pool = _pool
+    if pool is None:
+        return {"workers": 0, "enabled": SOLVE_WORKERS > 0 and not _pool_failed}
+    return {"enabled": True, **pool.stats()}
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
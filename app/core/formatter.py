@@ -0,0 +1,119 @@
+from app.core.lazy import lazy_module
+
+np = lazy_module("numpy")
+sympy = lazy_module("sympy")
+
+# Output formats for symbolic results; only the requested one is rendered
+FORMATS = ("plain", "latex", "mathml", "srepr", "numeric")
+
+
+def render(value, fmt="plain"):
+    """One SymPy value (or number) as a string in the given output format."""
+    if fmt == "plain":
+        return str(value)
+    if fmt == "latex":
+        return sympy.latex(value)
+    if fmt == "mathml":
+        return sympy.mathml(value, printer="presentation")
+    if fmt == "srepr":
+        return sympy.srepr(value)
+    if fmt == "numeric":
+        return _numeric(value)
+    raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+
+
+def _numeric(value):
+    number = sympy.N(value, 15)
+    if not number.is_number:
+        return str(number)  # free symbols stay, with float coefficients
+    re, im = (float(part) for part in number.as_real_imag())
+    if abs(im) <= 1e-12 * max(1.0, abs(re)):
+        return f"{re + 0.0:.15g}"
+    return f"{re + 0.0:.15g} {'-' if im < 0 else '+'} {abs(im):.15g}*I"
+
+
+def truncate(value, limit):
+    """
+    Shorten every string longer than `limit` characters in a JSON-ready
+    result (nested lists and dicts included) to its first `limit`
+    characters plus a note of how much was cut. Returns (value, whether
+    anything was cut); a limit of 0 keeps everything.
+    """
+    if not limit:
+        return value, False
+    if isinstance(value, str):
+        if len(value) <= limit:
+            return value, False
+        return f"{value[:limit]}… ({len(value) - limit} more characters)", True
+    if isinstance(value, list):
+        items = [truncate(item, limit) for item in value]
+        return [item for item, _ in items], any(cut for _, cut in items)
+    if isinstance(value, dict):
+        items = {key: truncate(item, limit) for key, item in value.items()}
+        return {key: item for key, (item, _) in items.items()}, any(cut for _, cut in items.values())
+    return value, False
+
+
+def _angles(radians):
+    """Radian and degree approximations for an array of angles, in one vectorized pass."""
+    degrees = np.degrees(radians)
+    known = np.isfinite(radians)
+    return {
+        "approx_rad": [float(r) if k else None for r, k in zip(radians.tolist(), known)],
+        "approx_deg": [float(d) if k else None for d, k in zip(degrees.tolist(), known)],
+    }
+
+
+def format_result(raw_result, eq_type, fmt="plain"):
+    """Normalize SymPy objects into JSON-serializable strings in the output format `fmt`."""
+    if eq_type == "algebra":
+        # SymPy usually returns a list of solutions
+        if isinstance(raw_result, (list, tuple)):
+            return [render(r, fmt) for r in raw_result]
+        return [render(raw_result, fmt)]
+    elif eq_type == "trig":
+        # Trig: provide exact and numeric approximations (radians & degrees)
+        if isinstance(raw_result, (list, tuple)):
+            sols = list(raw_result)
+        else:
+            sols = [raw_result]
+
+        exact = [render(s, fmt) for s in sols]
+        radians = np.full(len(sols), np.nan)
+        for i, s in enumerate(sols):
+            try:
+                value = complex(sympy.N(s))
+            except Exception:
+                continue  # SymPy cannot evaluate it numerically (e.g. free symbols)
+            if abs(value.imag) < 1e-12:
+                radians[i] = value.real
+        return {"exact": exact, **_angles(radians)}
+    elif eq_type == "calculus":
+        # Expect a dict with derivative / integral
+        if isinstance(raw_result, dict):
+            # Definite integrals carry a value plus how it was obtained
+            return {
+                k: {**v, "value": render(v["value"], fmt)} if isinstance(v, dict) else render(v, fmt)
+                for k, v in raw_result.items()
+            }
+        return {"value": render(raw_result, fmt)}
+    return render(raw_result, fmt)
+
+
+def format_numeric_roots(roots, eq_type):
+    """Format floats from the numeric root finder like the symbolic results."""
+    if eq_type == "trig":
+        # No exact form: only the approximations are known
+        return {"exact": [], **_angles(np.asarray(roots, dtype=float))}
+    return [f"{r + 0.0:.15g}" for r in roots]  # + 0.0 turns -0.0 into 0.0
+
+
+def format_system(solutions, names):
+    """Solutions of a system as {variable: value} dicts of strings, in variable order."""
+    symbols = [sympy.Symbol(n) for n in names]
+    return [{n: str(solution.get(s, s)) for n, s in zip(names, symbols)} for solution in solutions]
+
+
+def format_numeric_system(values, names):
+    """A numeric system's unique solution, formatted like format_numeric_roots."""
+    return [{n: f"{v + 0.0:.15g}" for n, v in zip(names, values.tolist())}]
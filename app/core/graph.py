@@ -1,19 +1,134 @@
-import matplotlib.pyplot as plt
-import numpy as np
-from sympy import lambdify, symbols
+import io
+import threading
+
+from app.config import PLOT_CACHE_MAX_ENTRIES, PLOT_CACHE_MAX_BYTES, PLOT_MAX_POINTS
+from app.core.cache import LRUCache
+from app.core.lazy import lazy_module, load
+from app.core.numeric import call_compiled, compile_function, real_values
+
+np = lazy_module("numpy")
+
+# (expression, variable, xmin, xmax, width, height, format) -> image bytes
+plot_cache = LRUCache(max_entries=PLOT_CACHE_MAX_ENTRIES, max_bytes=PLOT_CACHE_MAX_BYTES)
+
+# Figures are independent objects, but font and text caches inside matplotlib
+# are shared, so rendering itself is serialized.
+_render_lock = threading.Lock()
+
+_INITIAL_POINTS = 65
+_MAX_DEPTH = 12
+_CURVATURE_TOL = 2e-3  # midpoint deviation from a straight line, relative to the y-range
+
+
+def _evaluate(func, x):
+    with np.errstate(all="ignore"):
+        y = real_values(call_compiled(func, x))
+    return np.broadcast_to(y, x.shape).copy()
+
+
+def adaptive_sample(func, xmin, xmax, max_points=PLOT_MAX_POINTS):
+    """
+    Sample func on [xmin, xmax], bisecting only the intervals whose midpoint
+    strays from a straight line (curvature) or crosses a domain boundary or
+    discontinuity. Flat stretches keep the coarse initial spacing.
+    """
+    x = np.linspace(xmin, xmax, _INITIAL_POINTS)
+    y = _evaluate(func, x)
+    active = np.ones(len(x) - 1, dtype=bool)
+    # Measure the y-range on the uniform grid: refined samples cluster near poles
+    lo, hi = _view_limits(y)
+    scale = hi - lo
+
+    for _ in range(_MAX_DEPTH):
+        idx = np.flatnonzero(active)
+        budget = max_points - len(x)
+        if idx.size == 0 or budget <= 0:
+            break
+        xm = (x[idx] + x[idx + 1]) / 2
+        ym = _evaluate(func, xm)
+        y0, y1 = y[idx], y[idx + 1]
+
+        finite = np.isfinite(y0) & np.isfinite(y1) & np.isfinite(ym)
+        edge = ~finite & (np.isfinite(y0) | np.isfinite(y1) | np.isfinite(ym))
+        error = np.where(finite, np.abs(ym - (y0 + y1) / 2), 0.0) / scale
+        refine = edge | (error > _CURVATURE_TOL)
+        if not refine.any():
+            break
+        if refine.sum() > budget:
+            # Spend the remaining budget on the worst intervals
+            keep = np.argsort(np.where(edge, np.inf, error))[::-1][:budget]
+            refine = np.zeros_like(refine)
+            refine[keep] = True
+
+        chosen = idx[refine]
+        x = np.insert(x, chosen + 1, xm[refine])
+        y = np.insert(y, chosen + 1, ym[refine])
+        refined = np.zeros(len(active), dtype=bool)
+        refined[chosen] = True
+        # A refined interval becomes two active halves; the rest go quiet
+        active = np.repeat(refined, np.where(refined, 2, 1))
+    return x, y
+
+
+def _view_limits(y):
+    known = y[np.isfinite(y)]
+    if known.size == 0:
+        return -1.0, 1.0
+    lo, hi = np.percentile(known, [2, 98])
+    if hi - lo < 1e-12:
+        lo, hi = lo - 1, hi + 1
+    pad = (hi - lo) * 0.1
+    return lo - pad, hi + pad
+
+
+def _break_jumps(x, y, ylim):
+    """Insert NaN where consecutive samples jump across most of the view (e.g. tan at pi/2)."""
+    span = ylim[1] - ylim[0]
+    jumps = np.flatnonzero(
+        (np.abs(np.diff(y)) > 0.5 * span) & (np.sign(y[:-1]) != np.sign(y[1:]))
+    )
+    if jumps.size:
+        x = np.insert(x, jumps + 1, (x[jumps] + x[jumps + 1]) / 2)
+        y = np.insert(y, jumps + 1, np.nan)
+    return x, y
+
+
+def render_plot(expr, variable="x", xmin=-10.0, xmax=10.0, width=600, height=400, fmt="png"):
+    """Render expr to PNG or SVG bytes in memory; results are cached."""
+    key = (expr, variable, xmin, xmax, width, height, fmt)
+    image = plot_cache.get(key)
+    if image is not None:
+        return image
+
+    func = compile_function(expr, [variable])
+    x, y = adaptive_sample(func, xmin, xmax)
+    ylim = _view_limits(_evaluate(func, np.linspace(xmin, xmax, 401)))
+    x, y = _break_jumps(x, y, ylim)
+
+    # matplotlib is only imported once a plot is actually requested
+    Figure = load("matplotlib.figure").Figure
+    FigureCanvasAgg = load("matplotlib.backends.backend_agg").FigureCanvasAgg
+
+    dpi = 100
+    with _render_lock:
+        fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        ax.plot(x, y, label=str(expr))
+        ax.set_xlim(xmin, xmax)
+        ax.set_ylim(*ylim)
+        ax.set_xlabel(variable)
+        ax.set_ylabel("y")
+        ax.set_title("Equation Graph")
+        ax.grid(True)
+        ax.legend()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt)
+    image = buffer.getvalue()
+    plot_cache.set(key, image)
+    return image
+
 
 def plot_equation(expr, variable="x", filename="graph.png"):
-    var = symbols(variable)
-    func = lambdify(var, expr, "numpy")
-    x_vals = np.linspace(-10, 10, 400)
-    y_vals = func(x_vals)
-    
-    plt.figure(figsize=(6,4))
-    plt.plot(x_vals, y_vals, label=str(expr))
-    plt.xlabel(variable)
-    plt.ylabel("y")
-    plt.title("Equation Graph")
-    plt.grid(True)
-    plt.legend()
-    plt.savefig(filename)
-    plt.close()
+    with open(filename, "wb") as f:
+        f.write(render_plot(expr, variable, fmt=filename.rsplit(".", 1)[-1].lower()))
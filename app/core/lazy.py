@@ -0,0 +1,105 @@
+"""
+Lazy imports for the heavy scientific stack. SymPy, NumPy and matplotlib
+are loaded on the first request that needs them, so a cold instance can
+answer arithmetic without paying for them. First-load times are recorded
+for the startup report.
+"""
+import importlib
+import sys
+import threading
+import time
+
+_lock = threading.Lock()
+_loaded = {}  # module name -> module, once fully imported
+import_times = {}  # module name -> seconds spent on its first import
+_prewarm = {"state": "disabled", "targets": [], "seconds": None, "error": None}
+
+
+def load(name):
+    """Import a module (once), recording how long the first import took."""
+    module = _loaded.get(name)
+    if module is not None:
+        return module
+    with _lock:
+        module = _loaded.get(name)
+        if module is None:
+            # Not sys.modules: while another thread is still importing the
+            # module it is there half-initialized; import_module waits for it
+            first = name not in sys.modules
+            start = time.perf_counter()
+            module = importlib.import_module(name)
+            if first:
+                import_times[name] = time.perf_counter() - start
+            _loaded[name] = module
+    return module
+
+
+class LazyModule:
+    """Module proxy that imports on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = load(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_module(name):
+    return LazyModule(name)
+
+
+def _run_prewarm(targets):
+    start = time.perf_counter()
+    try:
+        for target in targets:
+            if target == "workers":
+                from app.core.executor import get_pool
+
+                get_pool()
+            elif target == "matplotlib":
+                load("matplotlib.figure")
+                load("matplotlib.backends.backend_agg")
+            else:
+                load(target)
+        _prewarm["state"] = "done"
+    except Exception as e:
+        _prewarm["state"] = "failed"
+        _prewarm["error"] = str(e)
+    _prewarm["seconds"] = time.perf_counter() - start
+
+
+def prewarm(targets, background=True):
+    """
+    Import the given targets ("sympy", "numpy", "matplotlib", "workers")
+    ahead of the first request, by default on a background thread so
+    startup itself is not delayed.
+    """
+    targets = [t for t in targets if t]
+    if not targets:
+        return
+    _prewarm.update(state="running", targets=targets)
+    if background:
+        threading.Thread(target=_run_prewarm, args=(targets,), name="prewarm", daemon=True).start()
+    else:
+        _run_prewarm(targets)
+
+
+def startup_report(app_imports):
+    """Combine the app's own import timings with the lazily loaded modules."""
+
+    def ms(seconds):
+        return round(seconds * 1000, 2) if seconds is not None else None
+
+    return {
+        "app_imports_ms": {name: ms(seconds) for name, seconds in app_imports.items()},
+        "lazy_imports_ms": {name: ms(seconds) for name, seconds in import_times.items()},
+        "loaded": {name: name in sys.modules for name in ("sympy", "numpy", "matplotlib")},
+        "prewarm": {**_prewarm, "seconds": ms(_prewarm["seconds"])},
+    }
@@ -0,0 +1,423 @@
+"""
+Admission control: estimate the cost of an expression from its Python AST
+before anything is evaluated, so inputs like 9**9**9, factorial(10**7) or
+(x+1)**10**6 are rejected (or approximated) instead of freezing a worker.
+"""
+import ast
+import math
+import operator
+import sys
+import threading
+
+from app.config import (
+    MAX_RESULT_BITS,
+    MAX_FACTORIAL_ARG,
+    MAX_EXPONENT_TOWER,
+    MAX_POLY_DEGREE,
+    OVERSIZE_POLICY,
+)
+from app.utils.exceptions import ExpressionTooExpensive
+
+# Constant subtrees whose estimated size is below this are folded exactly,
+# which keeps the bounds tight (factorial(10**3) is cheap, factorial(10**7) is not).
+_FOLD_BITS = 4096
+_FLOAT_BITS = 1024  # float arithmetic overflows (cheaply) beyond this
+
+_FOLD_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+# Every spelling of the combinatorial functions (calculator, math and SymPy
+# names), so they all get the same estimate and the same approximation
+_CHOOSE = frozenset({"nCr", "comb", "binomial"})
+_PERMUTE = frozenset({"nPr", "perm"})
+
+_lock = threading.Lock()
+_counters = {"checked": 0, "approximated": 0, "rejected": {}}
+
+
+class _Estimate:
+    __slots__ = ("value", "bits", "is_int", "degree")
+
+    def __init__(self, value=None, bits=0.0, is_int=False, degree=0):
+        self.value = value      # exact value when cheaply known, else None
+        self.bits = bits        # upper bound on log2(|value| + 1)
+        self.is_int = is_int    # exact integer arithmetic (the expensive kind)
+        self.degree = degree    # polynomial degree bound in the symbols, None if not polynomial
+
+
+class _Rejected(Exception):
+    def __init__(self, reason, message, node, operands=()):
+        self.reason = reason
+        self.message = message
+        self.node = node
+        self.operands = operands
+
+
+def max_result_bits():
+    """
+    MAX_RESULT_BITS, capped at what can still be printed: Python refuses to
+    convert an int of more than sys.get_int_max_str_digits() digits to str.
+    """
+    digits = sys.get_int_max_str_digits() if hasattr(sys, "get_int_max_str_digits") else 0
+    if not digits:  # 0: no limit
+        return MAX_RESULT_BITS
+    return min(MAX_RESULT_BITS, int(digits * math.log2(10)))
+
+
+def _bits_of(value):
+    try:
+        return math.log2(abs(value) + 1)
+    except (TypeError, ValueError, OverflowError):
+        return float(_FLOAT_BITS)
+
+
+def _tower_height(node):
+    height = 0
+    while isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+        height += 1
+        node = node.right
+    return height
+
+
+def _call_name(node):
+    if isinstance(node.func, ast.Name):
+        return node.func.id
+    if isinstance(node.func, ast.Attribute):
+        return node.func.attr
+    return None
+
+
+def _log2_factorial(n):
+    return math.lgamma(n + 1) / math.log(2)
+
+
+class _Estimator:
+    def __init__(self, functions, constants, symbolic):
+        self.functions = functions  # name -> callable used to fold constant calls
+        self.constants = constants  # name -> numeric value
+        self.symbolic = symbolic    # unknown names are symbols rather than errors
+
+    def visit(self, node):
+        method = getattr(self, "visit_" + type(node).__name__, None)
+        if method is None:
+            # Unknown node type (tuples, comparisons, ...): check children, assume nothing
+            for child in ast.iter_child_nodes(node):
+                self.visit(child)
+            return _Estimate(degree=None)
+        return method(node)
+
+    def visit_Expression(self, node):
+        return self.visit(node.body)
+
+    def visit_Constant(self, node):
+        value = node.value
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return _Estimate(degree=None)
+        return _Estimate(value, _bits_of(value), isinstance(value, int), 0)
+
+    def visit_Name(self, node):
+        if node.id in self.constants:
+            value = self.constants[node.id]
+            return _Estimate(value, _bits_of(value), False, 0)
+        if self.symbolic:
+            return _Estimate(None, 0.0, False, 1)
+        return _Estimate(degree=None)
+
+    def visit_Attribute(self, node):
+        return _Estimate(None, 64.0, False, None)
+
+    def visit_UnaryOp(self, node):
+        operand = self.visit(node.operand)
+        value = None
+        if operand.value is not None and isinstance(node.op, (ast.USub, ast.UAdd)):
+            value = -operand.value if isinstance(node.op, ast.USub) else operand.value
+        return _Estimate(value, operand.bits, operand.is_int, operand.degree)
+
+    def visit_BinOp(self, node):
+        if isinstance(node.op, ast.Pow) and _tower_height(node) > MAX_EXPONENT_TOWER:
+            raise _Rejected(
+                "exponent_tower",
+                f"Exponent tower is too tall (max {MAX_EXPONENT_TOWER} levels)",
+                node,
+            )
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        op = node.op
+        is_int = left.is_int and right.is_int
+        degree = None
+
+        if isinstance(op, (ast.Add, ast.Sub)):
+            bits = max(left.bits, right.bits) + 1
+            if left.degree is not None and right.degree is not None:
+                degree = max(left.degree, right.degree)
+        elif isinstance(op, (ast.Mult, ast.MatMult)):
+            bits = left.bits + right.bits
+            if left.degree is not None and right.degree is not None:
+                degree = left.degree + right.degree
+        elif isinstance(op, ast.Pow):
+            bits, is_int, degree = self._power(node, left, right)
+        elif isinstance(op, ast.Div):
+            bits, is_int = left.bits, False
+            if right.degree == 0:
+                degree = left.degree
+        else:  # FloorDiv, Mod and anything else keep the left operand's size
+            bits = left.bits
+            if right.degree == 0:
+                degree = left.degree
+
+        self._check_size(node, bits, is_int, degree, (left, right))
+        value = None
+        if left.value is not None and right.value is not None and bits <= _FOLD_BITS:
+            value = self._fold(node, left.value, right.value)
+            if value is not None:
+                bits = _bits_of(value)
+        return _Estimate(value, bits, is_int, degree)
+
+    def _power(self, node, base, exponent):
+        degree = None
+        if exponent.value is not None:
+            e = exponent.value
+            if isinstance(e, (int, float)) and e < 0:
+                return 1.0, False, None
+            if base.value is None:
+                bits = base.bits * e
+            elif abs(base.value) <= 1:
+                bits = 0.0
+            else:  # exact base: log2(|b| + 1) would overstate 2**n by more than half
+                bits = math.log2(abs(base.value)) * e + 1
+            if base.degree is not None and isinstance(e, int):
+                degree = base.degree * e
+        else:
+            e_bound = 2.0 ** exponent.bits if exponent.bits < 1000 else math.inf
+            bits = base.bits * e_bound if base.bits else 0.0
+        is_int = base.is_int and exponent.is_int
+        if not is_int:
+            bits = min(bits, _FLOAT_BITS)
+        return bits, is_int, degree
+
+    def _fold(self, node, left, right):
+        fold = _FOLD_OPS.get(type(node.op))
+        if fold is None:
+            return None
+        try:
+            value = fold(left, right)
+        except Exception:
+            return None
+        return value if isinstance(value, (int, float)) else None
+
+    def _check_size(self, node, bits, is_int, degree, operands):
+        limit = max_result_bits()
+        if is_int and bits > limit:
+            raise _Rejected(
+                "result_bits",
+                f"Result would have ~{_short(bits)} bits (max {limit:,})",
+                node,
+                operands,
+            )
+        if degree is not None and degree > MAX_POLY_DEGREE:
+            raise _Rejected(
+                "polynomial_degree",
+                f"Polynomial degree {degree:,} exceeds the limit of {MAX_POLY_DEGREE:,}",
+                node,
+            )
+
+    def visit_Call(self, node):
+        name = _call_name(node)
+        args = [self.visit(arg) for arg in node.args]
+        for keyword in node.keywords:
+            self.visit(keyword.value)
+
+        if (name == "factorial" or name in _PERMUTE) and len(args) == 1:  # perm(n) is n!
+            return self._factorial(node, args[0])
+        if name in _CHOOSE | _PERMUTE and len(args) == 2:
+            return self._combinatorial(node, name, args[0], args[1])
+
+        is_int = False
+        degree = None
+        if name in ("sqrt",) and args:
+            bits = args[0].bits / 2
+        elif name in ("log", "ln", "log10", "log2", "sin", "cos", "tan", "asin", "acos", "atan"):
+            bits = math.log2(max(args[0].bits, 1.0) + 2) + 8 if args else 0.0
+        elif name == "exp" and args:
+            bits = min(1.45 * 2.0 ** min(args[0].bits, 64), _FLOAT_BITS)
+        elif name in ("abs", "Abs") and args:
+            bits, is_int, degree = args[0].bits, args[0].is_int, args[0].degree
+        else:
+            bits = max((a.bits for a in args), default=0.0) + math.log2(len(args) + 1)
+            bits = min(bits, _FLOAT_BITS) if not self.symbolic else bits
+
+        value = None
+        func = self.functions.get(name)
+        if func is not None and all(a.value is not None for a in args) and bits <= _FOLD_BITS:
+            try:
+                value = func(*(a.value for a in args))
+            except Exception:
+                value = None
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                bits = _bits_of(value)
+            else:
+                value = None
+        return _Estimate(value, bits, is_int, degree)
+
+    def _factorial(self, node, arg):
+        n = arg.value if arg.value is not None else 2.0 ** min(arg.bits, 1000)
+        if n > MAX_FACTORIAL_ARG:
+            raise _Rejected(
+                "factorial",
+                f"Factorial argument {_short(n)} exceeds the limit of {MAX_FACTORIAL_ARG:,}",
+                node,
+                (arg,),
+            )
+        bits = _log2_factorial(max(n, 0))
+        self._check_size(node, bits, True, None, (arg,))
+        value = None
+        if arg.value is not None and bits <= _FOLD_BITS and float(arg.value).is_integer() and arg.value >= 0:
+            value = math.factorial(int(arg.value))
+        return _Estimate(value, bits, True, None)
+
+    def _combinatorial(self, node, name, n_est, r_est):
+        n = n_est.value if n_est.value is not None else 2.0 ** min(n_est.bits, 1000)
+        r = r_est.value if r_est.value is not None else None
+        if r is not None and 0 <= r <= n:
+            bits = _log2_factorial(n) - _log2_factorial(n - r)
+            if name in _CHOOSE:
+                bits -= _log2_factorial(r)
+        else:
+            bits = n if name in _CHOOSE else _log2_factorial(n)
+        self._check_size(node, bits, True, None, (n_est, r_est))
+        return _Estimate(None, bits, True, None)
+
+
+def _short(n):
+    if math.isinf(n):
+        return "unbounded"
+    return f"{n:,.0f}" if n < 1e15 else f"{n:.3e}"
+
+
+def _record(key, reason=None):
+    with _lock:
+        if reason is None:
+            _counters[key] += 1
+        else:
+            _counters[key][reason] = _counters[key].get(reason, 0) + 1
+
+
+def _log10_magnitude(node, operands):
+    """log10(|value|) and sign for an oversized power, factorial or nCr/nPr (any spelling), or None."""
+    values = [op.value for op in operands]
+    if any(v is None for v in values):
+        return None
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+        base, exponent = values
+        if base == 0:
+            return None
+        negative = base < 0 and float(exponent).is_integer() and int(exponent) % 2 == 1
+        return exponent * math.log10(abs(base)), negative
+    name = _call_name(node) if isinstance(node, ast.Call) else None
+    ln10 = math.log(10)
+    if (name == "factorial" or name in _PERMUTE) and len(values) == 1:
+        return math.lgamma(values[0] + 1) / ln10, False
+    if name in _CHOOSE | _PERMUTE and len(values) == 2 and 0 <= values[1] <= values[0]:
+        n, r = values
+        log_value = math.lgamma(n + 1) - math.lgamma(n - r + 1)
+        if name in _CHOOSE:
+            log_value -= math.lgamma(r + 1)
+        return log_value / ln10, False
+    return None
+
+
+def format_approximation(log10_value, negative=False):
+    """Render 10**log10_value in scientific notation with the digits a float can vouch for."""
+    exponent = math.floor(log10_value)
+    mantissa = 10 ** (log10_value - exponent)
+    digits = max(1, 14 - len(str(abs(exponent))))
+    text = f"{mantissa:.{digits}f}e+{exponent}"
+    return "-" + text if negative else text
+
+
+def _approximate(root, rejected):
+    if rejected.reason not in ("result_bits", "factorial"):
+        return None
+    node, negate = root, False
+    while isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        negate ^= isinstance(node.op, ast.USub)
+        node = node.operand
+    if rejected.node is not node:
+        return None  # only the outermost operation can be summarized as a single number
+    magnitude = _log10_magnitude(node, rejected.operands)
+    if magnitude is None:
+        return None
+    log10_value, negative = magnitude
+    return format_approximation(log10_value, negative ^ negate)
+
+
+def check_arithmetic(tree, functions, constants):
+    """
+    Estimate the cost of a compiled arithmetic AST.
+    Returns None when it is safe to evaluate, or an approximate result string
+    when the exact value is too large. Raises ExpressionTooExpensive otherwise.
+    """
+    try:
+        _Estimator(functions, constants, symbolic=False).visit(tree)
+        return None
+    except _Rejected as rejected:
+        approximation = None
+        if OVERSIZE_POLICY == "approximate":
+            approximation = _approximate(tree.body, rejected)
+        if approximation is not None:
+            return approximation
+        raise ExpressionTooExpensive(rejected.reason, rejected.message)
+
+
+def check_symbolic(text):
+    """Reject symbolic input whose numbers or polynomial degree would be too expensive."""
+    record_check()
+    try:
+        tree = ast.parse(text.replace("^", "**"), mode="eval")
+    except (SyntaxError, ValueError, RecursionError):
+        return  # Not Python syntax: leave the error reporting to SymPy
+    constants = {"pi": math.pi, "E": math.e}
+    try:
+        _Estimator({"factorial": math.factorial}, constants, symbolic=True).visit(tree)
+    except _Rejected as rejected:
+        record_rejection(rejected.reason)
+        raise ExpressionTooExpensive(rejected.reason, rejected.message)
+    except RecursionError:
+        record_rejection("nesting")
+        raise ExpressionTooExpensive("nesting", "Expression is nested too deeply")
+
+
+def record_check():
+    _record("checked")
+
+
+def record_rejection(reason):
+    _record("rejected", reason)
+
+
+def record_approximation():
+    _record("approximated")
+
+
+def admission_stats():
+    with _lock:
+        return {
+            "checked": _counters["checked"],
+            "approximated": _counters["approximated"],
+            "rejected": dict(_counters["rejected"]),
+            "rejected_total": sum(_counters["rejected"].values()),
+            "limits": {
+                "max_result_bits": max_result_bits(),
+                "max_factorial_arg": MAX_FACTORIAL_ARG,
+                "max_exponent_tower": MAX_EXPONENT_TOWER,
+                "max_poly_degree": MAX_POLY_DEGREE,
+                "oversize_policy": OVERSIZE_POLICY,
+            },
+        }
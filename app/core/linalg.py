@@ -0,0 +1,411 @@
+"""
+Vectors and matrices in the expression language: [a, b], {a, b},
+[[a, b], [c, d]], ||v||, +, -, scalar *, @, dot, cross, det, inv and
+transpose. Numeric operands are NumPy arrays; symbolic ones (in equations
+to solve) are SymPy matrices, and the same functions handle both.
+"""
+import ast
+import math
+import operator
+import sys
+from collections import namedtuple
+
+from app.core.lazy import lazy_module
+
+np = lazy_module("numpy")
+sympy = lazy_module("sympy")
+
+
+def _is_symbolic(value):
+    # Nothing can be symbolic before SymPy is loaded; don't import it to find out
+    if "sympy" not in sys.modules:
+        return False
+    return isinstance(value, (sympy.Basic, sympy.MatrixBase))
+
+
+def _is_matrix(value):
+    return _is_symbolic(value) and getattr(value, "is_Matrix", False)
+
+
+def is_vector(value):
+    """True for NumPy arrays with at least one axis (not 0-d results such as a dot product)."""
+    return getattr(value, "ndim", 0) > 0
+
+
+def _scalar(value):
+    return float(value) if getattr(value, "ndim", None) == 0 else value
+
+
+def vector(*components):
+    """[a, b, c] as a float array; nested vectors [[a, b], [c, d]] make a matrix."""
+    if any(_is_symbolic(c) for c in components):
+        if all(_is_matrix(c) for c in components):
+            return sympy.Matrix([list(c) for c in components])
+        return sympy.Matrix(components)
+    try:
+        return np.array(components, dtype=float)
+    except ValueError:
+        raise ValueError("Matrix rows must all have the same length")
+
+
+def array(values):
+    """A numeric vector literal, parsed in one pass by the tokenizer."""
+    return np.array(values, dtype=float)
+
+
+def norm(*parts):
+    """Euclidean (Frobenius) norm over scalars, vectors and matrices: ||3,4|| == ||[3,4]|| == 5."""
+    if any(_is_symbolic(p) for p in parts):
+        total = 0
+        for part in parts:
+            total += sum(e ** 2 for e in part) if _is_matrix(part) else part ** 2
+        return sympy.sqrt(total)
+    total = 0.0
+    for part in parts:
+        if is_vector(part):
+            flat = part.ravel()
+            total += float(flat @ flat)
+        else:
+            total += part * part
+    return math.sqrt(total)
+
+
+def _operands(*values):
+    """Both as SymPy matrices if either is symbolic, else as NumPy arrays."""
+    if any(_is_symbolic(v) for v in values):
+        return True, [v if _is_matrix(v) else sympy.Matrix(v) if is_vector(v) else v for v in values]
+    return False, [np.asarray(v, dtype=float) for v in values]
+
+
+def _nonscalar(value):
+    return is_vector(value) or _is_matrix(value)
+
+
+def times(a, b):
+    """'*': a scalar times a scalar, vector or matrix (vectors are not multiplied element-wise)."""
+    if _nonscalar(a) and _nonscalar(b):
+        raise ValueError("'*' needs a scalar operand; use dot(a, b), a·b or @ to multiply vectors and matrices")
+    return a * b
+
+
+def divide(a, b):
+    """'/': a scalar, vector or matrix divided by a scalar (vectors are not divided element-wise)."""
+    if _nonscalar(b):
+        raise ValueError("'/' needs a scalar divisor; vectors and matrices are not divided element-wise")
+    if b == 0:
+        raise ZeroDivisionError("division by zero")
+    return a / b
+
+
+def _numbers_only(symbol, operation):
+    def apply(a, b):
+        if _nonscalar(a) or _nonscalar(b):
+            raise ValueError(f"'{symbol}' needs numbers; vectors and matrices only take +, -, "
+                             "scalar * and /, @, dot and cross")
+        return operation(a, b)
+    return apply
+
+
+power = _numbers_only("**", operator.pow)
+floordiv = _numbers_only("//", operator.floordiv)
+mod = _numbers_only("%", operator.mod)
+
+# Operators the parser routes through the functions above when an operand
+# may be a vector: the call name, and the AST operator it stands for
+OPERATOR_CALLS = {
+    "*": ("_times", ast.Mult),
+    "/": ("_divide", ast.Div),
+    "**": ("_power", ast.Pow),
+    "//": ("_floordiv", ast.FloorDiv),
+    "%": ("_mod", ast.Mod),
+}
+_OPERATORS = {ast.Mult: times, ast.Div: divide, ast.Pow: power, ast.FloorDiv: floordiv, ast.Mod: mod}
+_CALL_OPERATORS = {name: op for name, op in OPERATOR_CALLS.values()}
+
+
+def dot(a, b):
+    if not (_nonscalar(a) and _nonscalar(b)):
+        return a * b  # '·' between numbers is plain multiplication
+    symbolic, (a, b) = _operands(a, b)
+    if a.shape != b.shape and (len(a.shape) == 1 or min(a.shape) == 1):
+        raise ValueError(f"dot needs vectors of the same length, got {_shape(a)} and {_shape(b)}")
+    if symbolic:
+        return a.dot(b)
+    return _scalar(np.dot(a, b))
+
+
+def cross(a, b):
+    symbolic, (a, b) = _operands(a, b)
+    if len(a) != 3 or len(b) != 3:
+        raise ValueError("cross needs two 3-component vectors")
+    if symbolic:
+        return a.cross(b)
+    return np.cross(a, b)
+
+
+def _square(m, name):
+    if len(m.shape) != 2 or m.shape[0] != m.shape[1]:
+        raise ValueError(f"{name} needs a square matrix, got {_shape(m)}")
+
+
+def det(m):
+    symbolic, (m,) = _operands(m)
+    _square(m, "det")
+    if symbolic:
+        return m.det()
+    return float(np.linalg.det(m))
+
+
+def inv(m):
+    symbolic, (m,) = _operands(m)
+    _square(m, "inv")
+    if symbolic:
+        if m.det() == 0:
+            raise ValueError("Matrix is singular")
+        return m.inv()
+    try:
+        return np.linalg.inv(m)
+    except np.linalg.LinAlgError:
+        raise ValueError("Matrix is singular")
+
+
+def transpose(m):
+    symbolic, (m,) = _operands(m)
+    return m.T
+
+
+def _shape(m):
+    return "×".join(str(n) for n in m.shape)
+
+
+# Vector syntax in symbolic input: brackets, braces, a || norm or a · dot product
+_VECTOR_SYNTAX = ("[", "{", "||", "·")
+
+# Names SymPy resolves to the vector functions when evaluating rewritten input
+_SYMBOLIC_NAMES = {
+    "_vec": vector,
+    "_norm": norm,
+    "_times": times,
+    "_divide": divide,
+    "_power": power,
+    "_floordiv": floordiv,
+    "_mod": mod,
+    "norm": norm,
+    "dot": dot,
+    "cross": cross,
+    "det": det,
+    "inv": inv,
+    "transpose": transpose,
+}
+
+# Integers up to this size are exact in float64, so integer input reduced
+# with NumPy stays exact below it
+_EXACT = 2 ** 53
+
+# A value reduced with NumPy; exact when it is an integer (array) computed
+# without rounding, root when it is an integer n that stands for sqrt(n)
+_Folded = namedtuple("_Folded", ["value", "exact", "root"])
+
+
+def _bounded(value):
+    return float(np.abs(value).max(initial=0.0)) < _EXACT
+
+
+def _integral(values):
+    return bool(np.all(values == np.trunc(values))) and _bounded(values)
+
+
+def _operand(item):
+    """A folded value, or a number constant as one; None for anything else."""
+    if isinstance(item, _Folded):
+        return item
+    if isinstance(item, ast.Constant) and type(item.value) in (int, float):
+        if isinstance(item.value, int) and abs(item.value) >= _EXACT:
+            return None  # left to SymPy, which keeps it exact
+        return _Folded(item.value, isinstance(item.value, int), False)
+    return None
+
+
+def _apply(node, args):
+    """Evaluate one node on folded operands with NumPy; None leaves it to SymPy."""
+    if any(arg.root for arg in args):
+        return None
+    values = [arg.value for arg in args]
+    exact = all(arg.exact for arg in args)
+    if isinstance(node, ast.UnaryOp):
+        if isinstance(node.op, ast.USub):
+            return _Folded(-values[0], exact, False)
+        return args[0] if isinstance(node.op, ast.UAdd) else None
+    if isinstance(node, ast.BinOp):
+        a, b = values
+        vectors = (is_vector(a), is_vector(b))
+        op = type(node.op)
+        if op in (ast.Add, ast.Sub) and all(vectors):
+            if a.shape != b.shape:
+                raise ValueError(f"Cannot combine shapes {_shape(a)} and {_shape(b)}")
+            result = a + b if op is ast.Add else a - b
+        elif op in _OPERATORS and any(vectors):
+            result = _OPERATORS[op](a, b)
+            exact = exact and op is ast.Mult
+        elif op is ast.MatMult and all(vectors) and a.ndim == 2:
+            if a.shape[1] != b.shape[0]:
+                raise ValueError(f"Cannot multiply shapes {_shape(a)} and {_shape(b)}")
+            result = a @ b
+            exact = exact and _bounded(np.abs(a) @ np.abs(b))
+        else:
+            return None
+        return _Folded(result, exact and _bounded(result), False)
+    if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Name):
+        return None
+    name = node.func.id
+    if name in _CALL_OPERATORS and len(args) == 2:
+        return _apply(ast.BinOp(node.args[0], _CALL_OPERATORS[name](), node.args[1]), args)
+    if name == "_vec":
+        return _Folded(vector(*values), exact, False)
+    if name in ("_norm", "norm"):
+        total = 0.0
+        for value in values:
+            flat = np.ravel(value)
+            total += float(flat @ flat)
+        if exact and total < _EXACT:
+            return _Folded(int(total), True, True)
+        return _Folded(math.sqrt(total), False, False)
+    if not all(is_vector(value) for value in values):
+        return None
+    if name == "dot" and len(values) == 2:
+        bound = np.sum(np.abs(values[0]) * np.abs(values[1])) if exact else 0.0
+        return _Folded(dot(*values), exact and bound < _EXACT, False)
+    if name == "cross" and len(values) == 2:
+        result = cross(*values)
+        bound = 2 * np.abs(values[0]).max(initial=0.0) * np.abs(values[1]).max(initial=0.0)
+        return _Folded(result, exact and bound < _EXACT, False)
+    if name == "transpose" and len(values) == 1:
+        return _Folded(transpose(values[0]), exact, False)
+    if name in ("det", "inv") and len(values) == 1:
+        return _Folded((det if name == "det" else inv)(values[0]), False, False)
+    return None
+
+
+def _fold(node, literals, matrices):
+    """
+    Reduce every numeric subexpression that involves a number-list literal
+    (a norm, dot product, sum, ...) with NumPy, bottom-up. Returns a
+    _Folded for a reduced subtree, else the node with its children reduced.
+    """
+    if isinstance(node, ast.Name) and node.id in literals:
+        values = literals[node.id]
+        return _Folded(values, _integral(values), False)
+    if isinstance(node, ast.BinOp):
+        children = [_fold(node.left, literals, matrices), _fold(node.right, literals, matrices)]
+    elif isinstance(node, ast.UnaryOp):
+        children = [_fold(node.operand, literals, matrices)]
+    elif isinstance(node, ast.Call):
+        children = [_fold(arg, literals, matrices) for arg in node.args]
+    else:
+        return node
+    args = [_operand(child) for child in children]
+    if any(isinstance(child, _Folded) for child in children) and None not in args:
+        folded = _apply(node, args)
+        if folded is not None:
+            return folded
+    nodes = [_emit(child, matrices) for child in children]
+    if isinstance(node, ast.BinOp):
+        return ast.BinOp(nodes[0], node.op, nodes[1])
+    if isinstance(node, ast.UnaryOp):
+        return ast.UnaryOp(node.op, nodes[0])
+    operator_call = _CALL_OPERATORS.get(getattr(node.func, "id", None))
+    if operator_call is not None and not any(_may_be_matrix(n) for n in nodes):
+        return ast.BinOp(nodes[0], operator_call(), nodes[1])  # numbers after all: plain SymPy input
+    return ast.Call(node.func, nodes, [])
+
+
+def _may_be_matrix(node):
+    return any(
+        isinstance(n, ast.Name) and (n.id.startswith("_matrix") or n.id in ("_vec", "cross", "inv", "transpose"))
+        for n in ast.walk(node)
+    )
+
+
+def _emit(item, matrices):
+    """
+    A folded value back as an AST node; a vector or matrix becomes a name,
+    its values kept in `matrices` for SymPy.
+    """
+    if not isinstance(item, _Folded):
+        return item
+    value = item.value
+    if item.root:
+        root = math.isqrt(value)
+        return ast.Constant(root) if root * root == value else ast.Call(ast.Name("sqrt", ast.Load()), [ast.Constant(value)], [])
+    if is_vector(value):
+        name = f"_matrix{len(matrices)}"
+        matrices[name] = value.astype(np.int64) if item.exact else value
+        return ast.Name(name, ast.Load())
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError("Vector expression does not have a finite value")
+    return ast.Constant(int(value) if item.exact else value)
+
+
+def reduce_vectors(text):
+    """
+    The NumPy half of expand_vectors, cheap enough for the web process:
+    parse the input and reduce numeric subexpressions over long number
+    lists (10,000-component norms, dot products, sums, ...) with NumPy,
+    exactly for integers. Returns (source, matrices): plain SymPy input and
+    None when no vector is left, else source that still needs
+    expand_vectors(source, matrices), with the vectors it names.
+    """
+    if not any(token in text for token in _VECTOR_SYNTAX):
+        return text, None
+    from app.core.arithmetic import _parse
+    from app.core.limits import check_symbolic
+
+    try:
+        tree, literals = _parse(text, x_is_times=False, symbolic=True)
+        arrays = {f"_literal{i}": array(values) for i, values in enumerate(literals)}
+        matrices = {}
+        with np.errstate(all="ignore"):  # inf and nan are caught when emitted
+            folded = _fold(tree.body, arrays, matrices)
+    except RecursionError:
+        raise ValueError("Expression is nested too deeply")
+    except ZeroDivisionError:
+        raise ValueError("Division by zero")
+    if isinstance(folded, _Folded) and is_vector(folded.value):
+        folded = _apply(ast.Call(ast.Name("_norm", ast.Load()), [], []), [folded])  # stands for its norm
+    body = _emit(folded, matrices)
+    vectors = any(isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _SYMBOLIC_NAMES
+                  for node in ast.walk(body))
+    source = ast.unparse(body)
+    check_symbolic(source)
+    return source, matrices if matrices or vectors else None
+
+
+def expand_vectors(text, matrices=None):
+    """
+    Rewrite vector syntax in an equation into a plain SymPy expression, e.g.
+    ||[x, 1] + [2, 3]|| -> sqrt((x + 2)**2 + 16). Numeric parts over long
+    number lists are reduced first (see reduce_vectors), then the rest is
+    evaluated with SymPy matrices; a vector or matrix result stands for its
+    norm. Text without vector syntax is returned unchanged. Given the
+    matrices from reduce_vectors, `text` is its source and only the SymPy
+    step runs, which is what worker tasks do.
+    """
+    if matrices is None:
+        text, matrices = reduce_vectors(text)
+        if matrices is None:
+            return text
+    names = dict(_SYMBOLIC_NAMES)
+    for name, values in matrices.items():
+        names[name] = sympy.Matrix(values.tolist())
+    try:
+        value = sympy.sympify(text, locals=names)
+    except (TypeError, ValueError, AttributeError) as e:  # SympifyError and ShapeError are ValueErrors
+        raise ValueError(f"Invalid vector expression: {e}")
+    except ZeroDivisionError:
+        raise ValueError("Division by zero")
+    if _is_matrix(value):
+        value = norm(value)
+    if any(isinstance(node, sympy.MatrixBase) for node in sympy.preorder_traversal(value)):
+        raise ValueError("Vectors can only be combined with vector operations")
+    return str(value)
@@ -0,0 +1,344 @@
+"""
+Per-request stage timing, aggregated into Prometheus histograms.
+
+Each HTTP request gets a RequestTimer (held in a context variable). Code on
+the request path calls stage("name") before each step; the previous stage
+ends when the next one starts, so stages never overlap and the overhead is
+one clock read per step. Outside a request stage() does nothing.
+"""
+import bisect
+import collections
+import contextvars
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+
+from app.config import SLOW_REQUEST_SECONDS, PROFILE_SLOW_REQUESTS, PROFILE_INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; fast stages (cache hits, parsing) land in the first few
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current = contextvars.ContextVar("request_timer", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name, help_text, label_names, buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            base = _labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {values[-1]}')
+            lines.append(f"{self.name}_sum{{{base}}} {values[-2]:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {values[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = collections.Counter()
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{{{_labels(self.label_names, labels)}}} {value}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+request_duration = Histogram(
+    "calc_request_duration_seconds", "End-to-end request latency by request type.", ("type",)
+)
+stage_duration = Histogram(
+    "calc_stage_duration_seconds", "Time spent in each processing stage by request type.", ("type", "stage")
+)
+requests_total = Counter("calc_requests_total", "Requests handled by request type.", ("type",))
+errors_total = Counter("calc_request_errors_total", "Requests answered with a 4xx/5xx status.", ("type", "status"))
+slow_total = Counter(
+    "calc_slow_requests_total", f"Requests slower than {SLOW_REQUEST_SECONDS:g}s.", ("type",)
+)
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+class RequestTimer:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.label = None
+        self.stages = {}  # name -> seconds, in first-seen order
+        self.thread_id = None  # thread running the endpoint, for the profiler
+        self.handler_end = None
+        self.samples = None
+        self._stage = None
+        self._stage_start = None
+        self._depth = 0
+
+    def stage(self, name):
+        now = time.perf_counter()
+        self._close(now)
+        self._stage, self._stage_start = name, now
+
+    def _close(self, now):
+        if self._stage is not None:
+            self.stages[self._stage] = self.stages.get(self._stage, 0.0) + now - self._stage_start
+            self._stage = None
+
+    def server_timing(self, total):
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.stages.items()]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+def current_timer():
+    return _current.get()
+
+
+def stage(name):
+    """Start timing `name` for the current request (ending the previous stage)."""
+    timer = _current.get()
+    if timer is not None:
+        timer.stage(name)
+
+
+def detach_timer():
+    """
+    Stop reporting stages from the current context, for work run concurrently
+    on behalf of a request (its laps would interleave). Call it inside the
+    copied context of a worker thread; the request itself is still timed.
+    """
+    _current.set(None)
+
+
+def label_request(label):
+    """Set the request type used to label histograms, unless already set."""
+    timer = _current.get()
+    if timer is not None and timer.label is None:
+        timer.label = label
+
+
+def timed(label=None):
+    """
+    Decorate an endpoint so the time between its return and the response
+    being sent is reported as the "serialize" stage. Nested calls (e.g. the
+    batch endpoint calling solve_eq) are attributed to the outer endpoint.
+    """
+
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timer = _current.get()
+            if timer is None or timer._depth:
+                return func(*args, **kwargs)
+            if label is not None:
+                label_request(label)
+            timer.thread_id = threading.get_ident()
+            timer._depth += 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timer._depth -= 1
+                timer.handler_end = time.perf_counter()
+                timer._close(timer.handler_end)
+
+        return wrapper
+
+    return decorate
+
+
+class MetricsMiddleware:
+    """ASGI middleware: times each HTTP request and adds a Server-Timing header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        global _in_flight
+        timer = RequestTimer()
+        token = _current.set(timer)
+        status = 500
+        with _in_flight_lock:
+            _in_flight += 1
+        _profiler.watch(timer)
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                now = time.perf_counter()
+                if timer.handler_end is not None:
+                    timer.stages["serialize"] = now - timer.handler_end
+                else:
+                    timer._close(now)
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timer.server_timing(now - timer.start).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            with _in_flight_lock:
+                _in_flight -= 1
+            _profiler.unwatch(timer)
+            _finish(timer, status)
+
+
+def _finish(timer, status):
+    total = time.perf_counter() - timer.start
+    label = timer.label or "other"
+    requests_total.inc((label,))
+    request_duration.observe((label,), total)
+    for name, seconds in timer.stages.items():
+        stage_duration.observe((label, name), seconds)
+    if status >= 400:
+        errors_total.inc((label, str(status)))
+    if total >= SLOW_REQUEST_SECONDS:
+        slow_total.inc((label,))
+        if timer.samples:
+            _profiler.report(timer, label, total)
+
+
+class SlowRequestProfiler:
+    """
+    Opt-in sampling profiler. A background thread periodically snapshots the
+    stack of every endpoint thread that has been running longer than the slow
+    threshold; when such a request finishes, the aggregated stacks are logged.
+    Symbolic work in worker processes shows up as the wait in WorkerPool.run
+    (set CALC_SOLVE_WORKERS=0 to profile it in-process).
+    """
+
+    def __init__(self, enabled, threshold, interval, keep=20):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.interval = interval
+        self.recent = collections.deque(maxlen=keep)
+        self._active = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def watch(self, timer):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._active.add(timer)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+                self._thread.start()
+
+    def unwatch(self, timer):
+        if self.enabled:
+            with self._lock:
+                self._active.discard(timer)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            # Sample under the lock so a finished (unwatched) request is never written to
+            with self._lock:
+                due = [t for t in self._active if t.thread_id is not None and now - t.start >= self.threshold]
+                if not due:
+                    continue
+                frames = sys._current_frames()
+                for timer in due:
+                    frame = frames.get(timer.thread_id)
+                    if frame is None:
+                        continue
+                    if timer.samples is None:
+                        timer.samples = collections.Counter()
+                    timer.samples[_stack_key(frame)] += 1
+
+    def report(self, timer, label, total):
+        top = timer.samples.most_common(5)
+        profile = {
+            "type": label,
+            "seconds": round(total, 4),
+            "stages_ms": {name: round(s * 1000, 2) for name, s in timer.stages.items()},
+            "samples": sum(timer.samples.values()),
+            "stacks": [{"count": count, "stack": stack} for stack, count in top],
+        }
+        self.recent.append(profile)
+        lines = [f"Slow {label} request took {total:.3f}s ({profile['samples']} samples)"]
+        for stack, count in top:
+            lines.append(f"  {count} x {stack}")
+        logger.warning("\n".join(lines))
+
+
+def _stack_key(frame, limit=40):
+    """Collapse a stack into 'file:function:line;...' from outermost to innermost."""
+    parts = []
+    while frame is not None and len(parts) < limit:
+        code = frame.f_code
+        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+_profiler = SlowRequestProfiler(PROFILE_SLOW_REQUESTS, SLOW_REQUEST_SECONDS, PROFILE_INTERVAL_SECONDS)
+
+
+def slow_profiles():
+    return {"enabled": _profiler.enabled, "threshold": SLOW_REQUEST_SECONDS, "recent": list(_profiler.recent)}
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format."""
+    lines = [
+        "# HELP calc_requests_in_flight Requests currently being handled.",
+        "# TYPE calc_requests_in_flight gauge",
+        f"calc_requests_in_flight {_in_flight}",
+    ]
+    for metric in (requests_total, errors_total, slow_total, request_duration, stage_duration):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,103 @@
+from app.config import NUMERIC_CACHE_MAX_ENTRIES, MAX_EVAL_POINTS
+from app.core.cache import LRUCache
+from app.core.lazy import lazy_module
+
+np = lazy_module("numpy")
+sympy = lazy_module("sympy")
+
+# (expression, variable names) -> lambdified NumPy function
+compiled_functions = LRUCache(max_entries=NUMERIC_CACHE_MAX_ENTRIES)
+
+
+def compile_function(expr, variables):
+    """Lambdify expr over the given variable names once and cache the result."""
+    key = (expr, tuple(variables))
+    func = compiled_functions.get(key)
+    if func is None:
+        func = sympy.lambdify([sympy.Symbol(v) for v in variables], expr, "numpy")
+        compiled_functions.set(key, func)
+    return func
+
+
+def call_compiled(func, *args):
+    """
+    Call a lambdified function. The NumPy printer leaves out functions it
+    has no translation for (besselj, ...), so calling them raises NameError;
+    report that as a ValueError instead.
+    """
+    try:
+        return func(*args)
+    except NameError as e:
+        raise ValueError(f"'{e.name}' has no numeric implementation") from None
+
+
+def build_input(spec):
+    """Turn an explicit list or a {start, stop, num|step} range into a float64 array."""
+    if isinstance(spec, (list, tuple)):
+        return np.asarray(spec, dtype=np.float64)
+    if spec.step is not None:
+        if spec.step == 0 or (spec.stop - spec.start) / spec.step < 0:
+            raise ValueError("Range step must move from start towards stop")
+        count = int(np.floor((spec.stop - spec.start) / spec.step + 1e-9)) + 1
+        if count > MAX_EVAL_POINTS:
+            raise ValueError(f"Too many points requested (max {MAX_EVAL_POINTS:,})")
+        return spec.start + spec.step * np.arange(count, dtype=np.float64)
+    num = spec.num if spec.num is not None else 100
+    if num > MAX_EVAL_POINTS:
+        raise ValueError(f"Too many points requested (max {MAX_EVAL_POINTS:,})")
+    return np.linspace(spec.start, spec.stop, num, dtype=np.float64)
+
+
+def evaluate_function(expr, variables, inputs, grid=False):
+    """
+    Evaluate expr over arrays of inputs in a single vectorized call.
+    Inputs are broadcast together element-wise, or combined as a
+    Cartesian grid (one axis per variable) when grid=True.
+    Returns a float64 array; undefined points are NaN.
+    """
+    missing = sorted(str(s) for s in expr.free_symbols if str(s) not in variables)
+    if missing:
+        raise ValueError(f"No values given for variable(s): {', '.join(missing)}")
+
+    if grid and len(inputs) > 1:
+        shape = tuple(len(a) for a in inputs)
+        if int(np.prod(shape)) > MAX_EVAL_POINTS:
+            raise ValueError(f"Too many points requested (max {MAX_EVAL_POINTS:,})")
+        arrays = np.meshgrid(*inputs, indexing="ij", sparse=True)
+    else:
+        try:
+            arrays = np.broadcast_arrays(*inputs)
+        except ValueError:
+            raise ValueError("Input arrays must have the same length (or use grid=true)")
+        shape = arrays[0].shape if arrays else ()
+        if int(np.prod(shape)) > MAX_EVAL_POINTS:
+            raise ValueError(f"Too many points requested (max {MAX_EVAL_POINTS:,})")
+
+    func = compile_function(expr, variables)
+    with np.errstate(all="ignore"):
+        try:
+            values = np.asarray(call_compiled(func, *arrays))
+        except (TypeError, ValueError, ZeroDivisionError) as e:
+            raise ValueError(f"Could not evaluate expression: {str(e)}")
+
+    return np.broadcast_to(real_values(values), shape)
+
+
+def real_values(values):
+    """
+    Convert function output to float64. Points with an imaginary part are
+    undefined on the real line and become NaN.
+    """
+    values = np.asarray(values)
+    if np.iscomplexobj(values):
+        values = np.where(np.abs(values.imag) < 1e-12, values.real, np.nan)
+    return values.astype(np.float64, copy=False)
+
+
+def to_json_values(values):
+    """Flatten to a list with NaN/±inf mapped to None (JSON has no NaN)."""
+    flat = values.ravel()
+    out = flat.tolist()
+    for i in np.flatnonzero(~np.isfinite(flat)).tolist():
+        out[i] = None
+    return out
@@ -1,8 +1,24 @@
-from sympy import sympify
+from app.config import EXPR_CACHE_MAX_ENTRIES
+from app.core.cache import LRUCache
+from app.core.limits import check_symbolic
+from app.core.lazy import lazy_module
+
+sympy = lazy_module("sympy")
+
+# Normalized input text -> parsed SymPy expression. SymPy expressions are
+# immutable, so the same object can safely be shared between requests.
+expression_cache = LRUCache(max_entries=EXPR_CACHE_MAX_ENTRIES)
+
 
 def parse_equation(equation_str):
-    try:
-        expr = sympify(equation_str)
+    expr = expression_cache.get(equation_str)
+    if expr is not None:
         return expr
+    # sympify evaluates numbers eagerly (9**9**9 would hang here), so cost it first
+    check_symbolic(equation_str)
+    try:
+        expr = sympy.sympify(equation_str)
     except Exception:
         raise ValueError("Invalid equation format")
+    expression_cache.set(equation_str, expr)
+    return expr
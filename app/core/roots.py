@@ -0,0 +1,171 @@
+"""
+Numeric root finding over an interval. The function is lambdified once,
+scanned on a grid for sign changes and for extrema that touch zero, and all
+brackets are refined together: each iteration is one vectorized call.
+
+The batch form solves a whole family f(x, *params) at once: each parameter
+row gets its own grid row, and brackets from every row are refined together.
+"""
+import warnings
+
+from app.config import NUMERIC_SCAN_POINTS, NUMERIC_MAX_ITERATIONS, MAX_EVAL_POINTS
+from app.core.lazy import lazy_module
+from app.core.numeric import call_compiled, compile_function, real_values
+
+np = lazy_module("numpy")
+
+_GOLDEN = 0.6180339887498949
+
+
+def _evaluate(func, x, args=()):
+    with np.errstate(all="ignore"):
+        shape = np.broadcast_shapes(np.shape(x), *(np.shape(a) for a in args))
+        return np.broadcast_to(real_values(call_compiled(func, x, *args)), shape).copy()
+
+
+def _illinois(func, a, b, fa, fb, args, tol, max_iter):
+    """
+    Refine every bracket [a, b] (fa, fb of opposite sign) with the Illinois
+    variant of regula falsi, falling back to bisection whenever the secant
+    step leaves the bracket. Returns the estimates and a mask of brackets
+    that did not hit an undefined point.
+    """
+    c = (a + b) / 2
+    alive = np.ones(a.shape, dtype=bool)
+    active = np.ones(a.shape, dtype=bool)
+    for _ in range(max_iter):
+        idx = np.flatnonzero(active)
+        if idx.size == 0:
+            break
+        ai, bi, fai, fbi = a[idx], b[idx], fa[idx], fb[idx]
+        with np.errstate(all="ignore"):
+            ci = bi - fbi * (bi - ai) / (fbi - fai)
+        outside = ~np.isfinite(ci) | (ci <= np.minimum(ai, bi)) | (ci >= np.maximum(ai, bi))
+        ci = np.where(outside, (ai + bi) / 2, ci)
+        fci = _evaluate(func, ci, [p[idx] for p in args])
+        c[idx] = ci
+
+        undefined = np.isnan(fci)
+        alive[idx[undefined]] = False
+        flip = fci * fbi < 0
+        # Root lies between c and b: b becomes the far end. Otherwise the far
+        # end has been kept twice, so halve its value (the Illinois step).
+        a[idx] = np.where(flip, bi, ai)
+        fa[idx] = np.where(flip, fbi, fai / 2)
+        b[idx], fb[idx] = ci, fci
+
+        width = np.abs(b[idx] - a[idx])
+        done = undefined | (fci == 0) | (width <= tol * np.maximum(1.0, np.abs(ci)))
+        active[idx[done]] = False
+    return c, alive
+
+
+def _golden_minimize(func, lo, hi, args, tol, max_iter):
+    """Vectorized golden-section search for the minimum of |f| on each [lo, hi]."""
+    x1 = hi - _GOLDEN * (hi - lo)
+    x2 = lo + _GOLDEN * (hi - lo)
+    f1 = np.abs(_evaluate(func, x1, args))
+    f2 = np.abs(_evaluate(func, x2, args))
+    for _ in range(max_iter):
+        if np.all(hi - lo <= tol * np.maximum(1.0, np.abs(lo))):
+            break
+        left = ~(f1 > f2)  # the minimum lies in [lo, x2]; NaN keeps the left side
+        lo, hi = np.where(left, lo, x1), np.where(left, x2, hi)
+        x_new = np.where(left, hi - _GOLDEN * (hi - lo), lo + _GOLDEN * (hi - lo))
+        f_new = np.abs(_evaluate(func, x_new, args))
+        x1, x2, f1, f2 = (
+            np.where(left, x_new, x2),
+            np.where(left, x1, x_new),
+            np.where(left, f_new, f2),
+            np.where(left, f1, f_new),
+        )
+    return np.where(f1 <= f2, x1, x2)
+
+
+def _scan(func, args, x, tol, max_iter):
+    """Roots for one chunk of parameter rows: returns (row index, root) arrays."""
+    rows = len(args[0]) if args else 1
+    grid_args = [p[:, None] for p in args]
+    y = np.broadcast_to(_evaluate(func, x[None, :], grid_args), (rows, len(x)))
+    finite = np.isfinite(y)
+    # Residual accepted as zero, relative to each row's typical size
+    magnitude = np.where(finite, np.abs(y), np.nan)
+    with np.errstate(all="ignore"), warnings.catch_warnings():
+        # Rows undefined everywhere make nanmedian warn; they just get scale 1
+        warnings.simplefilter("ignore", RuntimeWarning)
+        scale = np.maximum(1.0, np.nan_to_num(np.nanmedian(magnitude, axis=1), nan=1.0))
+
+    zero_rows, zero_cols = np.nonzero(y == 0)
+    found_rows, found = [zero_rows], [x[zero_cols]]
+
+    # Sign changes between neighbouring samples
+    r, i = np.nonzero(finite[:, :-1] & finite[:, 1:] & (y[:, :-1] * y[:, 1:] < 0))
+    if r.size:
+        bracket_args = [p[r] for p in args]
+        roots, alive = _illinois(func, x[i], x[i + 1], y[r, i], y[r, i + 1], bracket_args, tol, max_iter)
+        residual = np.abs(_evaluate(func, roots, bracket_args))
+        keep = alive & (residual <= 1e-6 * scale[r])
+        found_rows.append(r[keep])
+        found.append(roots[keep])
+
+    # Extrema of f that approach zero without crossing it, e.g. (x-1)**2 or sin(x)-1
+    ya, yb, yc = y[:, :-2], y[:, 1:-1], y[:, 2:]
+    touch = (
+        finite[:, :-2] & finite[:, 1:-1] & finite[:, 2:]
+        & (yb != 0) & (ya * yb > 0) & (yb * yc > 0)
+        & (np.abs(yb) <= np.abs(ya)) & (np.abs(yb) <= np.abs(yc))
+    )
+    r, m = np.nonzero(touch)
+    if r.size:
+        m = m + 1
+        bracket_args = [p[r] for p in args]
+        roots = _golden_minimize(func, x[m - 1], x[m + 1], bracket_args, tol, 2 * max_iter)
+        residual = np.abs(_evaluate(func, roots, bracket_args))
+        keep = residual <= 1e-10 * scale[r]
+        found_rows.append(r[keep])
+        found.append(roots[keep])
+
+    return np.concatenate(found_rows), np.concatenate(found)
+
+
+def _split_rows(rows, roots, count, tol):
+    """Group roots by row, sorted, with near-duplicates merged."""
+    order = np.lexsort((roots, rows))
+    rows, roots = rows[order], roots[order]
+    if roots.size > 1:
+        same_row = rows[1:] == rows[:-1]
+        close = np.diff(roots) <= np.maximum(tol, 1e-9) * np.maximum(1.0, np.abs(roots[1:]))
+        keep = np.concatenate(([True], ~(same_row & close)))
+        rows, roots = rows[keep], roots[keep]
+    bounds = np.searchsorted(rows, np.arange(count + 1))
+    return [roots[bounds[k]:bounds[k + 1]] for k in range(count)]
+
+
+def find_roots_batch(func, args, xmin, xmax, tol=1e-12, points=NUMERIC_SCAN_POINTS, max_iter=NUMERIC_MAX_ITERATIONS):
+    """
+    Real roots in [xmin, xmax] of func(x, *row) for every row of the
+    parameter arrays `args` (all the same length). Returns one sorted
+    array per row; with no args there is a single row.
+    """
+    args = [np.asarray(p, dtype=np.float64) for p in args]
+    count = len(args[0]) if args else 1
+    x = np.linspace(xmin, xmax, points)
+    # Keep each chunk's grid within the evaluation point limit
+    chunk = max(1, MAX_EVAL_POINTS // points)
+    results = []
+    for start in range(0, count, chunk):
+        part = [p[start:start + chunk] for p in args]
+        size = len(part[0]) if part else 1
+        rows, roots = _scan(func, part, x, tol, max_iter)
+        results.extend(_split_rows(rows, roots, size, tol))
+    return results
+
+
+def find_roots(expr, variable, xmin, xmax, tol=1e-12, points=NUMERIC_SCAN_POINTS, max_iter=NUMERIC_MAX_ITERATIONS):
+    """
+    All real roots of expr == 0 in [xmin, xmax], sorted. Roots closer
+    together than the scan spacing may be missed; poles where the sign flips
+    (tan(x) at pi/2) are recognized by their large residual and dropped.
+    """
+    func = compile_function(expr, [variable])
+    return find_roots_batch(func, [], xmin, xmax, tol, points, max_iter)[0]
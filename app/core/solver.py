@@ -1,18 +1,110 @@
-from sympy import symbols, solve, diff, integrate, sympify
+from app.core.lazy import lazy_module
+
+sympy = lazy_module("sympy")
+np = lazy_module("numpy")
+
+# Polynomial degree -> strategy name for the closed-form fast paths
+_CLOSED_FORM = {1: "linear", 2: "quadratic", 3: "cubic", 4: "quartic"}
+
+
+def classify_equation(expr, var):
+    """
+    Classify expr (== 0) in var as linear, quadratic, cubic, quartic,
+    polynomial or general. Returns (strategy, Poly or None).
+    """
+    if not expr.is_polynomial(var):
+        return "general", None
+    try:
+        poly = sympy.Poly(expr, var)
+    except sympy.PolynomialError:
+        return "general", None
+    degree = poly.degree()
+    if degree < 1:
+        return "general", None
+    return _CLOSED_FORM.get(degree, "polynomial"), poly
+
+
+def _ordered(roots):
+    # sympy.solve returns its solutions in this canonical order
+    return sorted(roots, key=sympy.default_sort_key)
+
+
+def _companion_roots(poly):
+    """Numeric roots as eigenvalues of the companion matrix (numpy.roots)."""
+    coeffs = [complex(c) for c in poly.all_coeffs()]
+    solutions = []
+    for root in np.roots(coeffs).tolist():
+        scale = max(1.0, abs(root))
+        if abs(root.imag) <= 1e-12 * scale:
+            solutions.append(sympy.Float(root.real))
+        else:
+            solutions.append(sympy.Float(root.real) + sympy.Float(root.imag) * sympy.I)
+    # Real roots first, ascending, then complex ones by real and imaginary part
+    # (rounded, so that conjugate pairs stay together despite eigenvalue noise)
+    return sorted(solutions, key=lambda r: (not r.is_real, *(round(float(p), 9) for p in r.as_real_imag())))
+
+
+def solve_polynomial(poly, strategy):
+    """
+    Solve poly == 0 without going through generic solve. Returns
+    (solutions, strategy actually used), or None when no fast path applies.
+    """
+    degree = poly.degree()
+    if strategy == "linear":
+        a, b = poly.all_coeffs()
+        return [-b / a], strategy
+    # roots() dispatches to the quadratic/Cardano/Ferrari formulas by degree
+    # and factors higher degrees; it may return only some of the roots
+    found = sympy.roots(poly, multiple=False)
+    if sum(found.values()) == degree:
+        return _ordered(found), strategy
+    if strategy == "polynomial" and all(c.is_number for c in poly.all_coeffs()):
+        return _companion_roots(poly), "companion_matrix"
+    return None
+
+
+def solve_with_strategy(expr, variable="x", eq_type="algebra", on_stage=None, operations=None):
+    """
+    Like solve_equation, but also returns the name of the strategy used
+    (None for calculus, which does not solve).
+    """
+    # on_stage(name) is called before each expensive step so callers can
+    # attribute time (and timeouts) to the stage that is running.
+    report = on_stage or (lambda stage: None)
+    var = sympy.symbols(variable)
 
-def solve_equation(expr, variable="x", eq_type="algebra"):
-    var = symbols(variable)
-    
     if eq_type == "algebra":
-        solution = solve(expr, var)
-        return solution  # SymPy list of solutions
+        report("classify")
+        strategy, poly = classify_equation(expr, var)
+        report("solve")
+        if poly is not None:
+            solved = solve_polynomial(poly, strategy)
+            if solved is not None:
+                return solved
+        solution = sympy.solve(expr, var)
+        return solution, "general"  # SymPy list of solutions
     elif eq_type == "calculus":
-        return {
-            "derivative": diff(expr, var),
-            "integral": integrate(expr, var)
-        }
+        from app.core.calculus import run_operations
+
+        # Only the requested operations (default: derivative and integral)
+        return run_operations(expr, var, operations, report), None
     elif eq_type == "trig":
-        solution = solve(expr, var)
-        return solution
+        report("solve")
+        solution = sympy.solve(expr, var)
+        return solution, "general"
     else:
         raise ValueError("Unsupported equation type")
+
+
+def solve_numeric(expr, variable="x", xmin=-10.0, xmax=10.0, tol=1e-12):
+    """Every real root of expr == 0 in [xmin, xmax], found numerically (floats, ascending)."""
+    from app.core.roots import find_roots
+
+    extra = sorted(str(s) for s in expr.free_symbols if str(s) != variable)
+    if extra:
+        raise ValueError(f"Numeric mode needs a single variable; found free variable(s): {', '.join(extra)}")
+    return find_roots(expr, variable, xmin, xmax, tol).tolist()
+
+
+def solve_equation(expr, variable="x", eq_type="algebra", on_stage=None, operations=None):
+    return solve_with_strategy(expr, variable, eq_type, on_stage, operations)[0]
@@ -1,6 +1,408 @@
-def generate_steps(equation, result):
-    steps = []
-    steps.append(f"Equation received: {equation}")
+"""
+Step-by-step explanations. The summary is a few lines formatted from the
+result. The full derivation replays the transformations behind it: moving
+terms, factoring, the quadratic and cubic formulas, inverse functions,
+differentiation rules, integration rules (substitution, by parts, ...) and
+limits. Derivers are generators, so a derivation stops as soon as it hits
+the line cap or its time budget, and nothing is derived unless asked for.
+"""
+import dataclasses
+from itertools import islice
+
+from app.config import STEPS_MAX, STEPS_SECONDS
+from app.core.deadline import SoftTimeout, soft_deadline
+from app.core.lazy import lazy_module
+
+sympy = lazy_module("sympy")
+
+DETAILS = ("summary", "full")
+
+# Polynomial strategies whose derivation goes through the coefficients
+_POLYNOMIAL = ("linear", "quadratic", "cubic", "quartic", "polynomial", "companion_matrix")
+
+
+def summary_steps(equation, result, strategy=None):
+    """The short explanation every response gets by default."""
+    steps = [f"Equation received: {equation}"]
+    if strategy is not None:
+        steps.append(f"Solved with the {strategy} strategy")
     steps.append(f"Solving equation gives: {result}")
-    steps.append("Steps generation complete")
     return steps
+
+
+def numeric_steps(equation, xmin, xmax, points, roots):
+    """How the numeric root finder got its result (nothing to derive symbolically)."""
+    return [
+        f"Equation received: {equation} = 0",
+        f"Sample the left side at {points} points in [{xmin:g}, {xmax:g}]",
+        "Bracket each sign change, and each local minimum of |f| that touches zero",
+        "Refine every bracket together with the Illinois method until it is narrower than the tolerance",
+        f"Real roots found: {roots}" if roots else "No real roots in the interval",
+    ]
+
+
+def derivation(expr, variable, eq_type, strategy=None, operations=None, solutions=None):
+    """
+    The full derivation as a list of lines, plus whether it is complete:
+    it is cut off after STEPS_MAX lines or STEPS_SECONDS of work (the
+    latter only where soft deadlines apply, i.e. in a worker process).
+    """
+    steps = []
+    lines = derive(expr, variable, eq_type, strategy, operations, solutions)
+    try:
+        with soft_deadline(STEPS_SECONDS):
+            # One line past the cap tells whether the derivation was cut off
+            steps.extend(islice(lines, STEPS_MAX + 1))
+    except SoftTimeout:
+        return steps, False
+    except Exception:
+        # An explanation must never fail the solve: keep the lines so far
+        return steps, False
+    return steps[:STEPS_MAX], len(steps) <= STEPS_MAX
+
+
+def derive(expr, variable, eq_type, strategy=None, operations=None, solutions=None):
+    """Yield the derivation of a solved equation (or calculus result) line by line."""
+    var = sympy.Symbol(variable)
+    if eq_type == "calculus":
+        yield from _calculus(expr, var, operations, solutions or {})
+        return
+    yield f"Solve {expr} = 0 for {var}"
+    if strategy in _POLYNOMIAL:
+        yield from _polynomial(expr, var, strategy)
+    else:
+        yield from _isolate(expr, var)
+    if solutions is not None:
+        yield f"Solutions: {[str(s) for s in solutions]}"
+
+
+# --- Equations ---------------------------------------------------------------
+
+
+def _polynomial(expr, var, strategy):
+    poly = sympy.Poly(expr, var)
+    standard = poly.as_expr()
+    if standard != expr:
+        yield f"Expand and collect powers of {var}: {standard} = 0"
+    # Factoring over the rationals is cheap; with symbolic or float coefficients it is not (or meaningless)
+    coeff, factors = sympy.factor_list(poly) if poly.domain.is_ZZ or poly.domain.is_QQ else (1, [])
+    if len(factors) > 1 or (factors and factors[0][1] > 1):
+        product = sympy.Mul(*(f.as_expr() ** m for f, m in factors), evaluate=False)
+        yield f"Factor: {product if coeff == 1 else sympy.Mul(coeff, product, evaluate=False)} = 0"
+        yield "A product is zero when one of its factors is: solve each factor"
+        for factor, multiplicity in factors:
+            note = f" (multiplicity {multiplicity})" if multiplicity > 1 else ""
+            yield f"Factor {factor.as_expr()} = 0{note}"
+            yield from _by_degree(factor, var, strategy)
+        return
+    yield from _by_degree(poly, var, strategy)
+
+
+def _by_degree(poly, var, strategy):
+    degree = poly.degree()
+    if degree == 1:
+        yield from _linear(poly, var)
+    elif degree == 2:
+        yield from _quadratic(poly, var)
+    elif degree == 3:
+        yield from _cubic(poly, var)
+    elif degree == 4:
+        a, b = poly.all_coeffs()[:2]
+        yield f"Ferrari's method: substitute {var} = t - ({b})/(4*{a}) to remove the cubic term,"
+        yield "then split the depressed quartic into two quadratics using a root of its resolvent cubic"
+        yield f"Roots: {_roots(poly)}"
+    elif strategy == "companion_matrix" or not all(c.is_Rational for c in poly.all_coeffs()):
+        yield f"Degree {degree}: no general formula in radicals (Abel-Ruffini)"
+        yield "Find the roots numerically as the eigenvalues of the companion matrix"
+    else:
+        yield f"Degree {degree}: look for roots with SymPy's polynomial root finder"
+        yield f"Roots: {_roots(poly)}"
+
+
+def _roots(poly):
+    return [str(r) for r in dict.fromkeys(sympy.roots(poly, multiple=True))]
+
+
+def _linear(poly, var):
+    a, b = poly.all_coeffs()
+    if b != 0:
+        yield f"Move {b} to the other side: {a * var} = {-b}"
+    if a != 1:
+        yield f"Divide both sides by {a}: {var} = {-b / a}"
+    elif b == 0:
+        yield f"{var} = 0"
+
+
+def _quadratic(poly, var):
+    a, b, c = poly.all_coeffs()
+    yield f"Coefficients: a = {a}, b = {b}, c = {c}"
+    disc = sympy.expand(b ** 2 - 4 * a * c)
+    yield f"Discriminant: b**2 - 4*a*c = ({b})**2 - 4*({a})*({c}) = {disc}"
+    if disc.is_positive:
+        yield "The discriminant is positive: two distinct real roots"
+    elif disc.is_zero:
+        yield "The discriminant is zero: one repeated real root"
+    elif disc.is_negative:
+        yield "The discriminant is negative: two complex conjugate roots"
+    yield f"Quadratic formula: {var} = (-b ± sqrt(b**2 - 4*a*c)) / (2*a) = ({-b} ± sqrt({disc})) / {2 * a}"
+    yield " or ".join(f"{var} = {r}" for r in _roots(poly))
+
+
+def _cubic(poly, var):
+    a, b, c, d = poly.all_coeffs()
+    p = sympy.simplify((3 * a * c - b ** 2) / (3 * a ** 2))
+    q = sympy.simplify((2 * b ** 3 - 9 * a * b * c + 27 * a ** 2 * d) / (27 * a ** 3))
+    t = sympy.Symbol("t")
+    if b != 0:
+        yield f"Substitute {var} = t - ({b})/(3*{a}) to remove the squared term"
+    yield f"Depressed cubic: {t ** 3 + p * t + q} = 0 (p = {p}, q = {q})"
+    yield f"Cardano's formula: t = cbrt(-q/2 + sqrt(q**2/4 + p**3/27)) + cbrt(-q/2 - sqrt(q**2/4 + p**3/27))"
+    yield f"Roots: {_roots(poly)}"
+
+
+# Inverse of each invertible function, applied to both sides by _isolate
+_INVERSES = {
+    "sin": "asin", "cos": "acos", "tan": "atan", "exp": "log", "log": "exp",
+    "asin": "sin", "acos": "cos", "atan": "tan",
+    "sinh": "asinh", "cosh": "acosh", "tanh": "atanh",
+}
+_PERIODIC = ("sin", "cos", "tan")
+
+
+def _isolate(expr, var):
+    """Undo the operations around the variable one by one, as long as it occurs once."""
+    lhs, rhs = expr, sympy.S.Zero
+    for _ in range(50):
+        if lhs == var:
+            if lhs is expr:
+                yield f"{var} = 0"
+            return  # every step above ends in the rearranged equation
+        if lhs.is_Add:
+            rest, term = lhs.as_independent(var, as_Add=True)
+            if rest == 0:
+                break
+            lhs, rhs = term, rhs - rest
+            yield f"Move {rest} to the other side: {lhs} = {rhs}"
+        elif lhs.is_Mul:
+            factor, rest = lhs.as_independent(var, as_Add=False)
+            if factor == 1:
+                if rhs == 0:
+                    yield f"A product is zero when one of its factors is: {' = 0 or '.join(map(str, rest.args))} = 0"
+                    return
+                break
+            lhs, rhs = rest, rhs / factor
+            yield f"Divide both sides by {factor}: {lhs} = {rhs}"
+        elif lhs.is_Pow:
+            base, exp = lhs.as_base_exp()
+            if not exp.has(var):
+                lhs, rhs = base, rhs ** (1 / exp)
+                note = " (and its negative)" if exp.is_even else ""
+                yield f"Raise both sides to the power 1/{exp}: {lhs} = {rhs}{note}"
+            elif not base.has(var):
+                lhs, rhs = exp, sympy.log(rhs) / sympy.log(base)
+                yield f"Take logarithms: {lhs} = {rhs}"
+            else:
+                break
+        elif lhs.is_Function and len(lhs.args) == 1 and lhs.func.__name__ in _INVERSES:
+            name = lhs.func.__name__
+            inverse = _INVERSES[name]
+            lhs, rhs = lhs.args[0], getattr(sympy, inverse)(rhs)
+            yield f"Apply {inverse} to both sides: {lhs} = {rhs}"
+            if name in _PERIODIC:
+                yield f"{name} is periodic: this is the principal value, and other solutions differ by its period"
+        else:
+            break
+    yield f"{var} cannot be isolated step by step here; solve {lhs} = {rhs} with SymPy's general solver"
+
+
+# --- Calculus ----------------------------------------------------------------
+
+
+def _calculus(expr, var, operations, results):
+    from sympy.integrals.manualintegrate import integral_steps
+
+    from app.core.calculus import DEFAULT_OPERATIONS
+
+    seen = {}
+    for operation in operations or DEFAULT_OPERATIONS:
+        name = operation["op"]
+        seen[name] = seen.get(name, 0) + 1
+        key = name if seen[name] == 1 else f"{name}_{seen[name]}"
+        target = sympy.Symbol(operation["variable"]) if operation.get("variable") else var
+        result = results.get(key)
+        if name == "derivative":
+            yield from _derivative(expr, target, operation, result)
+        elif name == "integral":
+            yield f"Integrate {expr} with respect to {target}"
+            yield from _integral_rule(integral_steps(expr, target))
+            if result is not None:
+                yield f"Add the constant of integration: ∫ {expr} d{target} = {result} + C"
+        elif name == "definite_integral":
+            yield from _definite_integral(expr, target, operation, result)
+        elif name == "limit":
+            yield from _limit(expr, target, operation, result)
+
+
+def _derivative(expr, var, operation, result):
+    names = operation.get("variables")
+    order = [sympy.Symbol(n) for n in names] if names else [var] * operation.get("order", 1)
+    current = expr
+    for i, target in enumerate(order, 1):
+        label = f" (derivative {i} of {len(order)})" if len(order) > 1 else ""
+        yield f"Differentiate {current} with respect to {target}{label}"
+        yield from _diff_rules(current, target)
+        current = sympy.diff(current, target)
+        yield f"Simplify: {current}"
+    if result is not None and str(result) != str(current):
+        yield f"Result: {result}"
+
+
+def _d(f, x):
+    return f"d/d{x}[{f}]"
+
+
+def _diff_rules(f, x):
+    """The rule used at each node of f, outermost first (chain rule, product rule, ...)."""
+    if not f.has(x):
+        yield f"Constant rule: {_d(f, x)} = 0"
+    elif f == x:
+        yield f"{_d(x, x)} = 1"
+    elif f.is_Add:
+        yield f"Sum rule: {_d(f, x)} = {' + '.join(_d(t, x) for t in f.args)}"
+        for term in f.args:
+            yield from _diff_rules(term, x)
+    elif f.is_Mul:
+        const, rest = f.as_independent(x, as_Add=False)
+        if const != 1:
+            yield f"Constant multiple rule: {_d(f, x)} = {const} * {_d(rest, x)}"
+            yield from _diff_rules(rest, x)
+            return
+        u, v = rest.args[0], sympy.Mul(*rest.args[1:])
+        yield f"Product rule: {_d(f, x)} = ({v}) * {_d(u, x)} + ({u}) * {_d(v, x)}"
+        yield from _diff_rules(u, x)
+        yield from _diff_rules(v, x)
+    elif f.is_Pow:
+        base, exp = f.as_base_exp()
+        if not exp.has(x):
+            power = exp * base ** (exp - 1)
+            if base == x:
+                yield f"Power rule: {_d(f, x)} = {power}"
+            else:
+                yield f"Power rule with the chain rule: {_d(f, x)} = {power} * {_d(base, x)}"
+                yield from _diff_rules(base, x)
+        elif not base.has(x):
+            yield f"Exponential rule with the chain rule: {_d(f, x)} = {f * sympy.log(base)} * {_d(exp, x)}"
+            yield from _diff_rules(exp, x)
+        else:
+            rewritten = sympy.exp(exp * sympy.log(base))
+            yield f"Variable base and exponent: rewrite {f} as {rewritten}"
+            yield from _diff_rules(rewritten, x)
+    elif f.is_Function and len(f.args) == 1:
+        arg = f.args[0]
+        u = sympy.Dummy("u")
+        outer = sympy.diff(f.func(u), u).subs(u, arg)
+        if arg == x:
+            yield f"Derivative of {f.func}: {_d(f, x)} = {outer}"
+        else:
+            yield f"Chain rule: {_d(f, x)} = {outer} * {_d(arg, x)}"
+            yield from _diff_rules(arg, x)
+    else:
+        yield f"{_d(f, x)} = {sympy.diff(f, x)}"
+
+
+# Names of the integration rules of sympy.integrals.manualintegrate
+_RULE_NAMES = {
+    "ConstantRule": "Constant rule",
+    "ConstantTimesRule": "Pull out the constant factor",
+    "PowerRule": "Power rule",
+    "AddRule": "Integrate term by term",
+    "URule": "Substitution",
+    "PartsRule": "Integration by parts",
+    "CyclicPartsRule": "Integration by parts until the integral recurs, then solve for it",
+    "RewriteRule": "Rewrite the integrand",
+    "ExpRule": "Exponential rule",
+    "ReciprocalRule": "Reciprocal rule",
+    "ArctanRule": "Arctangent rule",
+    "TrigSubstitutionRule": "Trigonometric substitution",
+    "DontKnowRule": "No elementary rule applies",
+}
+
+
+def _integral_rule(rule):
+    """One line per rule of a manualintegrate rule tree, depth first."""
+    from sympy.integrals.manualintegrate import Rule
+
+    kind = type(rule).__name__
+    if kind == "AlternativeRule":
+        yield from _integral_rule(rule.alternatives[0])
+        return
+    name = _RULE_NAMES.get(kind) or f"{kind[:-4]} rule"
+    if kind == "URule":
+        du = sympy.diff(rule.u_func, rule.variable)
+        name = f"Substitute {rule.u_var} = {rule.u_func}, d{rule.u_var} = {du} d{rule.variable}"
+    elif kind == "PartsRule":
+        name = f"Integrate by parts with u = {rule.u}, dv = {rule.dv} d{rule.variable or 'x'}"
+    elif kind == "RewriteRule":
+        name = f"Rewrite the integrand as {rule.rewritten}"
+    if rule.integrand is None:
+        yield name  # a step inside CyclicPartsRule
+    else:
+        yield f"{name}: ∫ {rule.integrand} d{rule.variable} = {rule.eval()}"
+    for field in dataclasses.fields(rule):
+        value = getattr(rule, field.name)
+        for sub in value if isinstance(value, list) else [value]:
+            if isinstance(sub, Rule):
+                yield from _integral_rule(sub)
+
+
+def _definite_integral(expr, var, operation, result):
+    lower, upper = operation.get("lower"), operation.get("upper")
+    yield f"Integrate {expr} with respect to {var} from {lower} to {upper}"
+    if result and result.get("method") == "gauss_kronrod":
+        yield "No antiderivative within the time budget: integrate numerically instead"
+        yield ("Adaptive Gauss-Kronrod (G7/K15) quadrature, splitting subintervals until the error "
+               f"estimate is small enough: {result['value']} (error {result['error']:.3g})")
+        return
+    from sympy.integrals.manualintegrate import integral_steps
+
+    rule = integral_steps(expr, var)
+    yield from _integral_rule(rule)
+    antiderivative = rule.eval()
+    yield f"Antiderivative: F({var}) = {antiderivative}"
+    if result is not None and not result.get("converged", True):
+        yield f"The integral diverges on [{lower}, {upper}]: {result['value']}"
+    elif result is not None:
+        yield f"Fundamental theorem of calculus: F({upper}) - F({lower}) = {result['value']}"
+
+
+def _limit(expr, var, operation, result):
+    from app.core.parser import parse_equation
+
+    point = parse_equation(str(operation.get("point")).replace("^", "**"))
+    direction = operation.get("direction") or "+-"
+    side = {"+": " from the right", "-": " from the left"}.get(direction, "")
+    yield f"Limit of {expr} as {var} -> {point}{side}"
+    direct = expr.subs(var, point)
+    if direct.is_finite and not direct.has(sympy.nan, sympy.zoo):
+        yield f"Substitute {var} = {point}: {direct}"
+    else:
+        num, den = sympy.fraction(sympy.together(expr))
+        for _ in range(5):
+            top, bottom = num.subs(var, point), den.subs(var, point)
+            zero = top == 0 and bottom == 0
+            infinite = top.is_infinite and bottom.is_infinite
+            if not (zero or infinite):
+                break
+            form = "0/0" if zero else "∞/∞"
+            num, den = sympy.diff(num, var), sympy.diff(den, var)
+            yield f"Indeterminate form {form}: apply L'Hôpital's rule to get ({num}) / ({den})"
+        else:
+            yield "Still indeterminate: evaluate the limit with series expansion"
+    if result is not None:
+        yield f"Limit: {result}"
+
+
+def page(steps, offset=0, limit=None):
+    """A slice of a long derivation, with where the next page starts (None at the end)."""
+    end = len(steps) if limit is None else min(len(steps), offset + limit)
+    return steps[offset:end], end if end < len(steps) else None
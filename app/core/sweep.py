@@ -0,0 +1,89 @@
+"""
+Parametric sweeps: one equation family, many parameter rows. The equation is
+solved symbolically once in terms of the parameters; the solutions are
+lambdified together and evaluated for every row in one NumPy call. Rows the
+closed form does not cover (no solution found, or a solution undefined for
+that row, such as a = 0 in the quadratic formula) are solved numerically,
+all at once, by the batched root finder.
+"""
+from app.config import SWEEP_MAX_NUMERIC_ROWS, NUMERIC_SCAN_POINTS
+from app.core.lazy import lazy_module
+from app.core.numeric import call_compiled, compile_function
+from app.core.roots import find_roots_batch
+from app.utils.exceptions import ExpressionTooExpensive
+
+np = lazy_module("numpy")
+sympy = lazy_module("sympy")
+
+
+def _closed_form(solutions, names, columns, xmin, xmax, tol):
+    """
+    Evaluate the solutions for every row. Returns (roots, covered): sorted
+    real roots in [xmin, xmax] per row, NaN-padded to shape
+    (rows, len(solutions)), and the rows where every solution evaluated to
+    a finite number.
+    """
+    rows = len(columns[0])
+    func = compile_function(sympy.Tuple(*solutions), names)
+    # Complex inputs, so sqrt(b**2 - 4*a*c) of a negative discriminant is
+    # a complex root rather than NaN
+    inputs = [c.astype(np.complex128) for c in columns]
+    with np.errstate(all="ignore"):
+        values = np.stack(
+            [np.broadcast_to(np.asarray(v, dtype=np.complex128), (rows,)) for v in call_compiled(func, *inputs)],
+            axis=1,
+        )
+    covered = np.isfinite(values).all(axis=1)
+    real = np.abs(values.imag) <= 1e-9 * np.maximum(1.0, np.abs(values.real))
+    # The same interval the numeric rows are searched in, so a row's roots don't depend on its path
+    inside = (values.real >= xmin) & (values.real <= xmax)
+    roots = np.sort(np.where(real & inside & covered[:, None], values.real, np.nan), axis=1)
+    # A double root (zero discriminant) shows up once per solution expression
+    repeat = np.abs(np.diff(roots, axis=1)) <= np.maximum(tol, 1e-9) * np.maximum(1.0, np.abs(roots[:, 1:]))
+    roots[:, 1:][repeat] = np.nan
+    return roots, covered
+
+
+def _compilable(solutions, variable):
+    return bool(solutions) and not any(
+        s.has(sympy.RootOf) or sympy.Symbol(variable) in s.free_symbols for s in solutions
+    )
+
+
+def sweep_roots(expr, variable, names, columns, solutions, xmin, xmax, tol=1e-12, report=None):
+    """
+    Real roots of expr == 0 in `variable` within [xmin, xmax] for each row
+    of the parameter columns. `solutions` are the symbolic solutions in terms of the
+    parameters (empty when there is no closed form). Returns the roots per
+    row (lists of floats) and the indices of the rows solved numerically.
+    """
+    report = report or (lambda stage: None)
+    columns = [np.asarray(c, dtype=np.float64) for c in columns]
+    rows = len(columns[0])
+    result = [None] * rows
+
+    numeric = np.arange(rows)
+    if _compilable(solutions, variable):
+        report("closed_form")
+        try:
+            roots, covered = _closed_form(solutions, names, columns, xmin, xmax, tol)
+        except (TypeError, ValueError, ZeroDivisionError):
+            pass  # not evaluable with NumPy (e.g. special functions): solve every row numerically
+        else:
+            for i, row in zip(np.flatnonzero(covered).tolist(), roots[covered].tolist()):
+                result[i] = [r for r in row if r == r]  # drop the NaN padding
+            numeric = np.flatnonzero(~covered)
+
+    if numeric.size:
+        if numeric.size > SWEEP_MAX_NUMERIC_ROWS:
+            raise ExpressionTooExpensive(
+                "sweep_rows",
+                f"{numeric.size:,} rows have no closed-form solution; at most "
+                f"{SWEEP_MAX_NUMERIC_ROWS:,} can be solved numerically per request",
+            )
+        report("numeric")
+        func = compile_function(expr, [variable] + list(names))
+        found = find_roots_batch(func, [c[numeric] for c in columns], xmin, xmax, tol, NUMERIC_SCAN_POINTS)
+        for i, row in zip(numeric.tolist(), found):
+            result[i] = (row + 0.0).tolist()  # + 0.0 turns -0.0 into 0.0
+    return result, numeric.tolist()
@@ -0,0 +1,208 @@
+"""
+Systems of equations. Linear systems are recognized up front and solved
+through their matrix: numeric ones with an LU factorization (sparse when
+SciPy is installed and the matrix is large and sparse), small integer and
+symbolic ones exactly with linsolve, which eliminates fraction-free over
+the rationals. Nonlinear systems get sympy.solve under a soft deadline,
+then nsolve from an initial guess.
+"""
+import re
+
+from app.config import SYSTEM_EXACT_MAX_UNKNOWNS, SYSTEM_SPARSE_MIN_UNKNOWNS, SYSTEM_SYMBOLIC_SECONDS
+from app.core.deadline import SoftTimeout, soft_deadline
+from app.core.lazy import lazy_module, load
+
+np = lazy_module("numpy")
+sympy = lazy_module("sympy")
+
+_NUMBER = r"(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?"
+_NAME = r"[A-Za-z_][A-Za-z0-9_]*"
+# One term of a plain linear side: number * name, number or name, with its sign
+_TERM = rf"(?:{_NUMBER}\s*\*\s*{_NAME}|{_NUMBER}|{_NAME})"
+_SIDE = re.compile(rf"\s*[+-]?\s*{_TERM}(?:\s*[+-]\s*{_TERM})*\s*")
+_TERMS = re.compile(rf"([+-]?)\s*(?:({_NUMBER})\s*\*\s*({_NAME})|({_NUMBER})|({_NAME}))")
+# Densest matrix that is still factorized as sparse
+_SPARSE_DENSITY = 0.05
+
+_reserved = None
+_sparse = None
+
+
+def zero_form(text):
+    """'lhs = rhs' -> '(lhs) - (rhs)'; an expression without '=' is already == 0."""
+    if text.count("=") > 1:
+        raise ValueError(f"An equation may contain at most one '=': {text}")
+    if "=" not in text:
+        return text
+    lhs, rhs = (side.strip() for side in text.split("="))
+    if not lhs or not rhs:
+        raise ValueError(f"Both sides of '=' are required: {text}")
+    return f"({lhs}) - ({rhs})"
+
+
+def _reserved_names():
+    # Names sympify maps to constants and functions (E, I, N, beta, ...), not symbols.
+    # dir() of the lazy proxy would only list the proxy's own attributes.
+    global _reserved
+    if _reserved is None:
+        _reserved = frozenset(dir(load("sympy")))
+    return _reserved
+
+
+def parse_linear(texts, variables=None):
+    """
+    Read equations written as plain sums of number*name terms ('2*x - y + 3 = 0')
+    straight into coefficient triples, without SymPy parsing. Each side is
+    checked and split by two regex passes, and the numbers are converted in
+    one go. Returns (names, rows, cols, values, b, exact), or None
+    when any equation has another form, a parameter or a reserved name;
+    exact means every number is an integer.
+    """
+    terms, term_rows, side_signs = [], [], []
+    for i, text in enumerate(texts):
+        sides = text.split("=")
+        if len(sides) > 2:
+            return None
+        for side, sign in zip(sides, (1.0, -1.0)):
+            if _SIDE.fullmatch(side) is None:
+                return None
+            found = _TERMS.findall(side)
+            terms.extend(found)
+            term_rows.extend([i] * len(found))
+            side_signs.extend([sign] * len(found))
+
+    signs, numbers, names, alone, bare = zip(*terms)
+    digits = [n or a for n, a in zip(numbers, alone)]
+    joined = "".join(digits)
+    exact = not any(c in joined for c in ".eE")
+    values = np.fromiter(map(float, [d or "1" for d in digits]), dtype=float, count=len(digits))
+    values *= np.array(side_signs) * np.where(np.array(signs) == "-", -1.0, 1.0)
+    term_rows = np.array(term_rows, dtype=np.intp)
+    term_names = [n or b for n, b in zip(names, bare)]
+
+    constant = np.array([not n for n in term_names])
+    b = -np.bincount(term_rows[constant], weights=values[constant], minlength=len(texts))
+    used = set(term_names) - {""}
+    if used & _reserved_names():
+        return None
+    unknowns = list(variables) if variables else sorted(used)
+    if not used <= set(unknowns):
+        return None  # symbolic parameters: needs the exact solver
+    index = {name: j for j, name in enumerate(unknowns)}
+    cols = np.array([index[n] for n in term_names if n], dtype=np.intp)
+    # Repeated (row, col) pairs are summed when the matrix is assembled
+    return unknowns, term_rows[~constant], cols, values[~constant], b, exact
+
+
+def _sparse_solver():
+    """scipy.sparse and its spsolve when SciPy is installed, else None."""
+    global _sparse
+    if _sparse is None:
+        try:
+            import scipy.sparse
+            import scipy.sparse.linalg
+        except ImportError:
+            _sparse = False
+        else:
+            _sparse = (scipy.sparse, scipy.sparse.linalg.spsolve)
+    return _sparse or None
+
+
+def solve_linear_numeric(n, rows, cols, values, b):
+    """
+    Solve a square numeric system given as coefficient triples. Returns
+    (solution array, strategy), or None when the matrix is not square or is
+    (numerically) singular, so the caller can fall back to exact elimination.
+    """
+    if len(b) != n:
+        return None
+    sparse = _sparse_solver() if n >= SYSTEM_SPARSE_MIN_UNKNOWNS else None
+    with np.errstate(all="ignore"):
+        if sparse is not None and len(values) <= _SPARSE_DENSITY * n * n:
+            module, spsolve = sparse
+            matrix = module.csc_matrix((values, (rows, cols)), shape=(n, n))  # duplicates are summed
+            x, strategy = spsolve(matrix, b), "sparse_lu"
+        else:
+            matrix = np.zeros((n, n))
+            np.add.at(matrix, (rows, cols), values)
+            try:
+                x, strategy = np.linalg.solve(matrix, b), "dense_lu"
+            except np.linalg.LinAlgError:
+                return None
+        if not np.all(np.isfinite(x)):
+            return None
+        # A nearly singular matrix solves without error but does not reproduce b
+        residual = np.linalg.norm(matrix @ x - b)
+        scale = np.abs(values).max(initial=0.0) * np.linalg.norm(x) + np.linalg.norm(b)
+    if residual > 1e-9 * max(scale, 1.0):
+        return None
+    return x, strategy
+
+
+def _linear_matrix(exprs, symbols):
+    try:
+        return sympy.linear_eq_to_matrix(exprs, symbols)
+    except ValueError:  # NonlinearError: a product or power of unknowns
+        return None
+
+
+def solve_linear_matrix(exprs, names):
+    """
+    Factorize a linear system parse_linear could not read ('x*2 + y = 0',
+    '2*(x + y) = 1') like the ones it could, from its SymPy matrix. Returns
+    (solution array, strategy), or None when the system is nonlinear, has a
+    coefficient that is not a number, is small enough and integral to solve
+    exactly, or is singular.
+    """
+    linear = _linear_matrix(exprs, [sympy.Symbol(name) for name in names])
+    if linear is None:
+        return None
+    matrix, rhs = linear
+    entries = matrix.todok()  # nonzero entries only; iterating every zero is slow
+    coefficients = list(entries.values()) + list(rhs)
+    if not all(c.is_Number for c in coefficients):
+        return None
+    if len(names) <= SYSTEM_EXACT_MAX_UNKNOWNS and all(c.is_Rational for c in coefficients):
+        return None
+    index = np.array(list(entries), dtype=np.intp).reshape(-1, 2)
+    values = np.array([float(c) for c in entries.values()])
+    b = np.array([float(c) for c in rhs])
+    return solve_linear_numeric(len(names), index[:, 0], index[:, 1], values, b)
+
+
+def solve_system(exprs, symbols, guess=None, on_stage=None):
+    """
+    Solve exprs == 0 for symbols. Returns (solutions, strategy), where each
+    solution maps every symbol to its value (a free symbol stands for itself).
+    """
+    report = on_stage or (lambda stage: None)
+    report("classify")
+    linear = _linear_matrix(exprs, symbols)
+    if linear is not None:
+        report("solve")
+        matrix, rhs = linear
+        rational = all(c.is_Rational for c in list(matrix) + list(rhs))
+        solutions = [dict(zip(symbols, values)) for values in sympy.linsolve(linear, symbols)]
+        return solutions, "linear_exact" if rational else "linear_symbolic"
+
+    report("solve")
+    try:
+        with soft_deadline(SYSTEM_SYMBOLIC_SECONDS):
+            return sympy.solve(exprs, symbols, dict=True), "nonlinear"
+    except (SoftTimeout, NotImplementedError):
+        pass
+
+    # No closed form in time: Newton's method from the guess (or all ones)
+    report("nsolve")
+    extra = set().union(*(e.free_symbols for e in exprs)) - set(symbols)
+    if extra or len(exprs) != len(symbols):
+        raise ValueError("Could not solve the system symbolically; a numeric solve needs "
+                         "as many equations as unknowns and no other symbols")
+    start = list(guess) if guess else [1.0] * len(symbols)
+    if len(start) != len(symbols):
+        raise ValueError(f"guess needs one value per unknown ({len(symbols)})")
+    try:
+        values = sympy.nsolve(exprs, symbols, start)
+    except (ValueError, ZeroDivisionError, TypeError):
+        raise ValueError("No solution found from the initial guess; try another 'guess'")
+    return [dict(zip(symbols, values))], "nsolve"
@@ -1,11 +1,32 @@
+import time
+
+_start = time.perf_counter()
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+_fastapi_loaded = time.perf_counter()
 from app.api.calculator import router as calc_router
+from app.api.metrics import router as metrics_router
+from app.core.executor import shutdown_pool
+from app.core.lazy import prewarm
+from app.core.metrics import MetricsMiddleware
+from app.config import PREWARM, GZIP_MIN_BYTES
+_app_loaded = time.perf_counter()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Stop the symbolic worker processes (if any were started)
+    shutdown_pool()
+
 
 app = FastAPI(
     title="Equation Calculator API",
     description="Math engine supporting arithmetic, algebra, calculus with step-by-step solutions",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS (for React / frontend)
@@ -17,8 +38,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses (sweeps, evaluations, long derivations)
+if GZIP_MIN_BYTES > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_BYTES)
+
+# Stage timings: Server-Timing header on every response, histograms at /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Register calculator routes
 app.include_router(calc_router, prefix="/api/calc")
+app.include_router(metrics_router)
+
+# Import cost of this entry point, reported by GET /api/calc/startup
+app.state.import_times = {
+    "fastapi": _fastapi_loaded - _start,
+    "app": _app_loaded - _fastapi_loaded,
+    "total": time.perf_counter() - _start,
+}
+
+# Serverless platforms may never run the lifespan hook, so warm up from here
+prewarm(PREWARM)
 
 # Optional: for Vercel serverless entrypoint (api/index.py imports this)
 export_app = app
@@ -1,6 +1,81 @@
-from pydantic import BaseModel
+from typing import Dict, List, Optional, Union
+from pydantic import BaseModel, Field
+
+class CalculusOperation(BaseModel):
+    op: str  # derivative, integral, definite_integral, limit
+    variable: Optional[str] = None         # defaults to the request's variable
+    order: int = Field(1, ge=1, le=100)    # nth derivative
+    variables: Optional[List[str]] = None  # mixed partial derivative, e.g. ["x", "y"]
+    lower: Optional[str] = None            # definite integral bounds, e.g. "0", "pi", "oo"
+    upper: Optional[str] = None
+    point: Optional[str] = None            # limit point
+    direction: str = "+-"                  # limit direction: +, - or +-
+
 
 class EquationRequest(BaseModel):
     equation: str
     variable: str = "x"
     type: str = "algebra"  # algebra, trig, calculus
+    timeout: Optional[float] = Field(None, gt=0)  # seconds; capped by the server limit
+    # symbolic, numeric (every real root in [xmin, xmax]) or auto (symbolic
+    # under a short deadline, numeric when it times out or finds nothing)
+    mode: str = "symbolic"
+    xmin: float = -10.0  # numeric search interval
+    xmax: float = 10.0
+    tolerance: float = Field(1e-12, gt=0)
+    # calculus: operations to compute, as names or CalculusOperation objects
+    # (default: derivative and indefinite integral)
+    operations: Optional[List[Union[str, CalculusOperation]]] = None
+    # Explanation: summary (a few lines) or full (the derivation, computed
+    # only when asked for and paged with steps_offset/steps_limit)
+    include_steps: bool = True
+    step_detail: str = "summary"
+    steps_offset: int = Field(0, ge=0)
+    steps_limit: Optional[int] = Field(None, gt=0)
+    # Symbolic results as plain text, latex, mathml, srepr or numeric
+    # (decimal approximations); longer strings are cut to max_length
+    # characters (default: the server limit, 0: no limit)
+    format: str = "plain"
+    max_length: Optional[int] = Field(None, ge=0)
+
+
+class SystemRequest(BaseModel):
+    equations: List[str]                   # "2*x + y = 3" or "2*x + y - 3" (== 0)
+    variables: Optional[List[str]] = None  # unknowns; default: every symbol, sorted
+    timeout: Optional[float] = Field(None, gt=0)  # seconds; capped by the server limit
+    guess: Optional[List[float]] = None    # nsolve starting point, one value per unknown
+    max_length: Optional[int] = Field(None, ge=0)  # longest solution string (default: the server limit, 0: no limit)
+
+
+class SweepRequest(BaseModel):
+    equation: str                     # e.g. "a*x**2 + b*x + c", solved for variable
+    variable: str = "x"
+    parameters: Dict[str, List[float]]  # one column of values per parameter, equal lengths
+    timeout: Optional[float] = Field(None, gt=0)  # symbolic solve deadline
+    xmin: float = -10.0  # roots are reported in [xmin, xmax], however the row was solved
+    xmax: float = 10.0
+    tolerance: float = Field(1e-12, gt=0)
+
+
+class RangeSpec(BaseModel):
+    start: float
+    stop: float
+    num: Optional[int] = Field(None, gt=0)  # number of evenly spaced points (stop included)
+    step: Optional[float] = None             # or a fixed step from start to stop
+
+
+class EvaluateRequest(BaseModel):
+    expression: str
+    variables: Dict[str, Union[List[float], RangeSpec]]
+    grid: bool = False     # Cartesian product of the variables instead of element-wise
+    format: str = "json"   # json, binary (raw little-endian float64)
+
+
+class GraphRequest(BaseModel):
+    equation: str
+    variable: str = "x"
+    xmin: float = -10.0
+    xmax: float = 10.0
+    width: int = Field(600, ge=100, le=2000)   # pixels
+    height: int = Field(400, ge=100, le=2000)  # pixels
+    format: str = "png"  # png, svg
@@ -0,0 +1,38 @@
+from typing import Any, Dict, List, Optional, Union
+from pydantic import BaseModel
+
+# Responses are validated and encoded straight to JSON by pydantic-core.
+# Fields a handler did not set are left out (response_model_exclude_unset).
+
+
+class SolveResponse(BaseModel):
+    success: bool
+    equation: Optional[str] = None
+    variable: Optional[str] = None
+    type: Optional[str] = None
+    # algebra: list of solutions; trig: {exact, approx_rad, approx_deg};
+    # calculus: {operation: value}; arithmetic: a number, vector or matrix
+    result: Union[str, List[Any], Dict[str, Any]]
+    format: Optional[str] = None
+    truncated: Optional[bool] = None          # some string was cut to max_length
+    approximate: Optional[bool] = None        # arithmetic result too large to compute exactly
+    shape: Optional[List[int]] = None         # vector and matrix results
+    norm: Optional[str] = None
+    steps: Optional[List[str]] = None
+    steps_total: Optional[int] = None
+    steps_complete: Optional[bool] = None
+    steps_next: Optional[int] = None          # steps_offset of the next page
+    strategy: Optional[str] = None
+
+
+class ItemError(BaseModel):
+    success: bool
+    status_code: int
+    detail: Any
+
+
+class BatchResponse(BaseModel):
+    success: bool
+    count: int
+    solved: int
+    results: List[Union[SolveResponse, ItemError]]
@@ -2,3 +2,19 @@ class InvalidEquation(Exception):
     """Custom exception for invalid equations"""
     pass
 
+
+class SolveTimeout(Exception):
+    """Raised when symbolic work overruns its request or stage deadline"""
+
+    def __init__(self, stage, timeout):
+        self.stage = stage
+        self.timeout = timeout
+        super().__init__(f"Computation exceeded {timeout:g}s during '{stage}' stage")
+
+
+class ExpressionTooExpensive(ValueError):
+    """Raised when admission control rejects an expression before evaluation"""
+
+    def __init__(self, reason, message):
+        self.reason = reason
+        super().__init__(message)
@@ -0,0 +1,89 @@
+"""
+Microbenchmark: compiled arithmetic engine vs. the previous regex + eval pipeline.
+
+    python -m benchmarks.bench_arithmetic
+"""
+import math
+import re
+import timeit
+
+from app.core.arithmetic import evaluate_arithmetic, compiled_cache
+
+CORPUS = [
+    "2+3",
+    "5x5-12/4",
+    "7⁴+2×3",
+    "(2+1)!+5!",
+    "sin(30)+cos(60)",
+    "nCr(10,3)+nPr(6,2)",
+    "sqrt(16)+log(1000)+ln(e)",
+    "[3,4]+[1,2]",
+    "||3,4||",
+]
+
+
+def legacy_arithmetic(equation):
+    """The string-rewriting pipeline that the compiled engine replaced."""
+    super_map = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹⁻", "0123456789-")
+    safe_dict = {
+        "math": math,
+        "sqrt": math.sqrt,
+        "log": math.log10,
+        "ln": math.log,
+        "sin": lambda x: math.sin(math.radians(x)),
+        "cos": lambda x: math.cos(math.radians(x)),
+        "tan": lambda x: math.tan(math.radians(x)),
+        "pi": math.pi,
+        "e": math.e,
+        "E": math.e,
+        "factorial": math.factorial,
+        "nPr": lambda n, r: math.factorial(int(n)) // math.factorial(int(n) - int(r)),
+        "nCr": lambda n, r: math.comb(int(n), int(r)),
+    }
+    text = equation.strip()
+    text = text.replace("sin⁻¹", "asin").replace("cos⁻¹", "acos").replace("tan⁻¹", "atan")
+    text = re.sub(r"[⁰¹²³⁴⁵⁶⁷⁸⁹⁻]+", lambda m: "**" + m.group(0).translate(super_map), text)
+    text = re.sub(r"\{([^\}]+)\}", r"[\1]", text)
+    text = re.sub(r"\|\|([^|]+)\|\|", lambda m: "sqrt(" + "+".join(f"(({p})**2)" for p in re.split(r"\s*,\s*", m.group(1))) + ")", text)
+    text = re.sub(r"\{([^\}]+)\}", r"[\1]", text)
+    if "[" in text:
+        text = re.sub(
+            r"\[([^\]]+)\]\s*([+\-])\s*\[([^\]]+)\]",
+            lambda m: "[" + ",".join(f"({a}){m.group(2)}({b})" for a, b in zip(m.group(1).split(","), m.group(3).split(","))) + "]",
+            text,
+        )
+        parts = text.strip().strip("[]").split(",")
+        return math.sqrt(sum(eval(p.replace("x", "*"), {"__builtins__": None}, safe_dict) ** 2 for p in parts))
+    text = text.replace("x", "*").replace("^", "**").replace("×", "*")
+    text = re.sub(r"(\d+)!", r"factorial(\1)", text)
+    text = re.sub(r"\(([^()]+)\)!", r"factorial(\1)", text)
+    return eval(text, {"__builtins__": None}, safe_dict)
+
+
+def bench(func, number):
+    total = min(timeit.repeat(lambda: [func(eq) for eq in CORPUS], number=number, repeat=5))
+    return total / (number * len(CORPUS)) * 1e6  # µs per expression
+
+
+def main(number=2000):
+    for eq in CORPUS:
+        evaluate_arithmetic(eq)  # warm the compiled cache
+
+    legacy = bench(legacy_arithmetic, number)
+    cached = bench(evaluate_arithmetic, number)
+
+    def cold(eq):
+        compiled_cache.clear()
+        return evaluate_arithmetic(eq)
+
+    uncached = bench(cold, number // 10)
+
+    print(f"{'pipeline':<28}{'µs/expr':>10}{'speedup':>10}")
+    print(f"{'legacy regex + eval':<28}{legacy:>10.2f}{1.0:>10.1f}x")
+    print(f"{'engine, cold (parse+compile)':<28}{uncached:>10.2f}{legacy / uncached:>10.1f}x")
+    print(f"{'engine, cached':<28}{cached:>10.2f}{legacy / cached:>10.1f}x")
+    return {"legacy_us": legacy, "cold_us": uncached, "cached_us": cached}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Microbenchmark: the cost of putting a result on the wire, per stage —
+rendering SymPy values in each output format, encoding the response
+(pydantic-core vs. json.dumps) and its size raw, gzipped and truncated.
+
+    python -m benchmarks.bench_serialize
+"""
+import gzip
+import json
+import time
+
+import numpy as np
+import sympy
+
+from app.core.encoding import dumps
+from app.core.formatter import FORMATS, render, truncate
+
+# Results whose printed form ranges from short to very long
+CORPUS = {
+    "quadratic": "x**2-5*x+3",
+    "cubic": "x**3+x+1",
+    "quartic": "x**4+3*x+1",
+}
+EVALUATE_POINTS = 100_000
+# A client's max_length; the server default only cuts far longer strings
+MAX_LENGTH = 200
+
+
+def best_of(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(repeat=5):
+    x = sympy.Symbol("x")
+    results = {"render_ms": {}, "bytes": {}}
+
+    print(f"{'render ms':<12}" + "".join(f"{fmt:>10}" for fmt in FORMATS))
+    roots = {name: sympy.solve(sympy.sympify(text), x) for name, text in CORPUS.items()}
+    for name, values in roots.items():
+        times = {fmt: best_of(lambda: [render(v, fmt) for v in values], repeat) * 1e3 for fmt in FORMATS}
+        results["render_ms"][name] = times
+        print(f"{name:<12}" + "".join(f"{times[fmt]:>10.2f}" for fmt in FORMATS))
+
+    print(f"\n{'bytes':<18}{'raw':>10}{'gzip':>10}{f'cut@{MAX_LENGTH}':>10}")
+    for name, values in roots.items():
+        for fmt in ("plain", "latex", "mathml"):
+            payload = {"success": True, "result": [render(v, fmt) for v in values]}
+            raw = dumps(payload)
+            cut = dumps({**payload, "result": truncate(payload["result"], MAX_LENGTH)[0]})
+            sizes = {"raw": len(raw), "gzip": len(gzip.compress(raw)), "truncated": len(cut)}
+            results["bytes"][f"{name}/{fmt}"] = sizes
+            print(f"{name + '/' + fmt:<18}{sizes['raw']:>10,}{sizes['gzip']:>10,}{sizes['truncated']:>10,}")
+
+    # A large numeric response: /evaluate over many points
+    values = np.sin(np.linspace(0, 100, EVALUATE_POINTS)).tolist()
+    payload = {"success": True, "shape": [EVALUATE_POINTS], "values": values}
+    fast = best_of(lambda: dumps(payload), repeat) * 1e3
+    stdlib = best_of(lambda: json.dumps(payload).encode(), repeat) * 1e3
+    raw = dumps(payload)
+    results["encode_ms"] = {"pydantic_core": fast, "json": stdlib}
+    print(f"\nencode {EVALUATE_POINTS:,} floats: pydantic-core {fast:.1f} ms, "
+          f"json.dumps {stdlib:.1f} ms ({stdlib / fast:.1f}x)")
+    print(f"size: {len(raw):,} bytes raw, {len(gzip.compress(raw)):,} gzip")
+    return results
+
+
+if __name__ == "__main__":
+    main()
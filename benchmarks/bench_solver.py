@@ -0,0 +1,57 @@
+"""
+Microbenchmark: algebra fast paths (closed form, roots, companion matrix)
+vs. generic sympy.solve, per strategy.
+
+    python -m benchmarks.bench_solver
+
+SymPy memoizes heavily, so its cache is cleared before every call; both
+sides are timed cold, as a new expression in a worker would be.
+"""
+import time
+
+import sympy
+from sympy.core.cache import clear_cache
+
+from app.core.solver import solve_with_strategy
+
+CORPUS = {
+    "linear": ["2*x+3", "7*x-12", "a*x+b"],
+    "quadratic": ["x**2-4", "x**2+1", "3*x**2-5*x+2"],
+    "cubic": ["x**3-6*x**2+11*x-6", "x**3-2", "x**3+x+1"],
+    "quartic": ["x**4-5*x**2+4", "x**4-16"],
+    "polynomial": ["(x-1)**10", "x**6-1", "x**8-3*x**4+2"],
+    "companion_matrix": ["x**5-x+1", "x**7-3*x+1", "x**9+x**2-2*x+5"],
+    "general": ["sin(x)-1", "exp(x)-2"],
+}
+
+
+def bench(func, exprs, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        elapsed = 0.0
+        for expr in exprs:
+            clear_cache()
+            start = time.perf_counter()
+            func(expr)
+            elapsed += time.perf_counter() - start
+        best = min(best, elapsed)
+    return best / len(exprs) * 1e3  # ms per equation
+
+
+def main(repeat=5):
+    x = sympy.Symbol("x")
+    print(f"{'strategy':<18}{'fast ms':>10}{'solve ms':>10}{'speedup':>10}")
+    results = {}
+    for strategy, texts in CORPUS.items():
+        exprs = [sympy.sympify(t) for t in texts]
+        used = {solve_with_strategy(e)[1] for e in exprs}
+        assert used == {strategy}, (strategy, used)
+        fast = bench(lambda e: solve_with_strategy(e), exprs, repeat)
+        generic = bench(lambda e: sympy.solve(e, x), exprs, repeat)
+        print(f"{strategy:<18}{fast:>10.2f}{generic:>10.2f}{generic / fast:>10.1f}x")
+        results[strategy] = {"fast_ms": fast, "solve_ms": generic}
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Load test: /api/calc/solve/stream over a large generated NDJSON corpus,
+against a real uvicorn server so TCP flow control is in play.
+
+    python -m benchmarks.bench_stream [lines]
+
+The client writes the request body on one thread while reading results on
+another, as any streaming client must: the server stops reading once its
+window of pending results is full. Reports throughput and the server
+process's peak RSS (Linux), sampled along the way to show that it stays
+flat as the input grows.
+"""
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+# One line per template in turn; parameters repeat every FAMILY lines, so the
+# stream exercises the result cache the way a real bulk file does
+FAMILY = 500
+TEMPLATES = [
+    lambda i: {"equation": f"{i}*7+{i % 13}/4", "type": "arithmetic"},
+    lambda i: {"equation": f"x**2-{i % FAMILY}"},
+    lambda i: {"equation": f"{i % FAMILY + 1}*x-{i % 17}"},
+    lambda i: {"equation": f"sin(x)-0.{i % 9 + 1}", "mode": "numeric", "xmin": 0, "xmax": 3},
+    lambda i: {"equation": f"||{i % FAMILY}, 3, 4||"},
+]
+CHUNK_LINES = 200
+
+
+def corpus(lines):
+    """The NDJSON body, generated chunk by chunk (never held in memory)."""
+    for start in range(0, lines, CHUNK_LINES):
+        block = [json.dumps(TEMPLATES[i % len(TEMPLATES)](i)) for i in range(start, min(start + CHUNK_LINES, lines))]
+        yield ("\n".join(block) + "\n").encode()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _rss_kb(pid, field):
+    """VmRSS or VmHWM (peak) of a process in KiB, or None off Linux."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+
+def _start_server(port):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, "CALC_PREWARM": "all"},
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/api/calc/startup")
+            prewarm = json.loads(conn.getresponse().read())["prewarm"]["state"]
+            if prewarm in ("done", "failed", "disabled"):
+                return server
+        except OSError:
+            pass
+        time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+def _send(conn, lines):
+    for chunk in corpus(lines):
+        conn.send(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+    conn.send(b"0\r\n\r\n")
+
+
+def run(port, pid, lines):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    conn.putrequest("POST", "/api/calc/solve/stream")
+    conn.putheader("Content-Type", "application/x-ndjson")
+    conn.putheader("Transfer-Encoding", "chunked")
+    conn.endheaders()
+    writer = threading.Thread(target=_send, args=(conn, lines), daemon=True)
+
+    start = time.perf_counter()
+    writer.start()
+    response = conn.getresponse()
+    received = failed = 0
+    samples = []  # (lines done, server RSS KiB)
+    for raw in response:
+        item = json.loads(raw)
+        assert item["index"] == received, (item["index"], received)
+        received += 1
+        failed += not item["success"]
+        if received % max(1, lines // 10) == 0:
+            samples.append((received, _rss_kb(pid, "VmRSS")))
+    elapsed = time.perf_counter() - start
+    writer.join()
+    assert received == lines, (received, lines)
+    return elapsed, failed, samples
+
+
+def main(lines=200_000):
+    port = _free_port()
+    server = _start_server(port)
+    try:
+        baseline = _rss_kb(server.pid, "VmRSS")
+        elapsed, failed, samples = run(port, server.pid, lines)
+        peak = _rss_kb(server.pid, "VmHWM")
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"lines       {lines:,} ({failed} failed)")
+    print(f"elapsed     {elapsed:.2f} s")
+    print(f"throughput  {lines / elapsed:,.0f} lines/s")
+    if peak is not None:
+        print(f"server RSS  {baseline / 1024:.1f} MiB idle, {peak / 1024:.1f} MiB peak")
+        print("RSS while streaming: " + ", ".join(f"{n:,}: {kb / 1024:.1f}" for n, kb in samples))
+    return {"lines": lines, "seconds": elapsed, "failed": failed, "peak_rss_kb": peak, "samples": samples}
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,416 @@
+"""
+Benchmark suite: per-stage microbenchmarks and an in-process load test of
+/api/calc/solve over a versioned corpus, written to a JSON file and
+optionally compared against a saved baseline.
+
+    python -m benchmarks.suite [--out results.json] [--baseline old.json]
+
+The corpus (benchmarks/corpus/<version>.jsonl) holds one request per line,
+grouped by type (arithmetic, vectors, algebra, trig, calculus) and tagged
+"pathological" where the input is meant to be rejected, approximated or
+cut off by a deadline; "expect" is the status code it should get. Change
+the corpus only by adding a new version, so that results stay comparable.
+
+Microbenchmarks run each stage of the /solve pipeline in-process with the
+app's and SymPy's caches cleared, and report the best of --repeat runs.
+The load test drives the ASGI app through httpx at --concurrency, first
+with empty caches (cold), then for --requests requests cycling through the
+corpus (warm), and reports throughput, p50/p95/p99 latency and the mean of
+each Server-Timing stage. With --baseline, every metric that got worse by
+more than --threshold is listed and the exit status is 1.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+CORPUS_VERSION = "v1"
+SCHEMA = 1
+# Differences below this many milliseconds are noise, whatever the ratio
+MIN_DELTA_MS = 0.05
+# Stages slower than this are timed once, not --repeat times
+SLOW_STAGE_SECONDS = 0.25
+
+
+def load_corpus(version=CORPUS_VERSION, types=None, pathological=True):
+    entries = []
+    with open(CORPUS_DIR / f"{version}.jsonl", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if types and entry["type"] not in types:
+                continue
+            if not pathological and "pathological" in entry.get("tags", ()):
+                continue
+            entries.append(entry)
+    return entries
+
+
+def _percentiles(latencies):
+    import numpy as np
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if latencies else (0.0, 0.0, 0.0)
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99)}
+
+
+# --- microbenchmarks ---------------------------------------------------------
+
+def _timed(func, repeat, setup=None):
+    """(best milliseconds, value) over `repeat` runs; slow calls run once."""
+    best, value = float("inf"), None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        value = func()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        if elapsed > SLOW_STAGE_SECONDS:
+            break
+    return best * 1e3, value
+
+
+def _stages(entry):
+    """
+    The /solve pipeline for one corpus request as (stage, func, setup)
+    steps; each func takes the previous stage's value.
+    """
+    from sympy.core.cache import clear_cache
+
+    from app.api.calculator import _is_norm_only, _operations, normalize_superscripts
+    from app.config import AUTO_SYMBOLIC_SECONDS
+    from app.core.arithmetic import compiled_cache, evaluate_arithmetic
+    from app.core.deadline import SoftTimeout, soft_deadline
+    from app.core.encoding import dumps
+    from app.core.formatter import format_numeric_roots, format_result
+    from app.core.linalg import expand_vectors
+    from app.core.parser import expression_cache, parse_equation
+    from app.core.solver import solve_numeric, solve_with_strategy
+    from app.core.steps import derivation
+    from app.core.validator import validate_equation
+    from app.models.request import EquationRequest
+
+    req = EquationRequest.model_validate(entry["request"])
+    equation = req.equation.strip()
+    encode = ("encode", lambda result: dumps({"success": True, "result": result}), None)
+
+    if req.type == "arithmetic" or _is_norm_only(equation):
+        x_is_times = req.type == "arithmetic"
+        return [
+            ("arithmetic_cold", lambda _: evaluate_arithmetic(equation, x_is_times), compiled_cache.clear),
+            ("arithmetic_cached", lambda _: evaluate_arithmetic(equation, x_is_times), None),
+            ("encode", lambda value: dumps({"success": True, "result": str(value)}), None),
+        ]
+
+    def parse_setup():
+        expression_cache.clear()
+        clear_cache()
+
+    operations = []  # set by the validate stage, which rejects unknown ones
+
+    def validate(text):
+        validate_equation(text)
+        operations[:] = [_operations(req)]
+        return text
+
+    def solve(expr):
+        # Bounded like the worker's deadline; SoftTimeout ends the entry
+        with soft_deadline(AUTO_SYMBOLIC_SECONDS if req.mode == "auto" else req.timeout):
+            return solve_with_strategy(expr, req.variable, req.type, None, operations[0])
+
+    steps = [
+        ("normalize", lambda _: normalize_superscripts(equation), None),
+        ("vectors", expand_vectors, None),
+        ("validate", validate, None),
+        ("parse", parse_equation, parse_setup),
+    ]
+    numeric = ("numeric", lambda expr: format_numeric_roots(
+        solve_numeric(expr, req.variable, req.xmin, req.xmax, req.tolerance), req.type), None)
+    if req.mode == "numeric":
+        return steps + [numeric, encode]
+    if req.mode == "auto":
+        def attempt(expr):
+            # Like the server: a symbolic solve that fails or runs out of time falls back
+            try:
+                solve(expr)
+            except (SoftTimeout, NotImplementedError, ValueError):
+                pass
+            return expr
+
+        return steps + [("solve", attempt, clear_cache), numeric, encode]
+
+    steps += [
+        ("solve", lambda expr: (expr, *solve(expr)), clear_cache),
+        ("format", lambda solved: (*solved, format_result(solved[1], req.type, req.format)), None),
+    ]
+    if req.include_steps and req.step_detail == "full":
+        steps.append(("steps", lambda solved: (derivation(
+            solved[0], req.variable, req.type, solved[2], operations[0], solved[1]), solved)[1], clear_cache))
+    steps.append(("encode", lambda solved: dumps({"success": True, "result": solved[3]}), None))
+    return steps
+
+
+def micro(corpus, repeat=5):
+    """Per-entry stage timings, and their sums per request type."""
+    entries, totals = [], {}
+    for entry in corpus:
+        record = {"id": entry["id"], "type": entry["type"], "stages": {}, "outcome": "ok"}
+        value = None
+        for name, func, setup in _stages(entry):
+            start = time.perf_counter()
+            try:
+                ms, value = _timed(lambda: func(value), repeat, setup)
+            except Exception as exc:  # the stage that rejected the input is still timed
+                record["stages"][name] = (time.perf_counter() - start) * 1e3
+                record["outcome"] = type(exc).__name__
+                break
+            record["stages"][name] = ms
+        entries.append(record)
+    return {"entries": entries, "totals": _totals(entries)}
+
+
+def _totals(entries, skip=()):
+    """Stage timings summed per request type, leaving out the ids in `skip`."""
+    totals = {}
+    for record in entries:
+        if record["id"] in skip:
+            continue
+        by_stage = totals.setdefault(record["type"], {})
+        for name, ms in record["stages"].items():
+            by_stage[name] = by_stage.get(name, 0.0) + ms
+    return totals
+
+
+# --- load test -----------------------------------------------------------------
+
+def _server_timing(header):
+    stages = {}
+    for part in header.split(","):
+        name, _, duration = part.strip().partition(";dur=")
+        if duration:
+            stages[name] = float(duration)
+    return stages
+
+
+async def _drive(client, entries, count, concurrency):
+    """Send `count` requests cycling through entries from `concurrency` clients."""
+    samples = []  # (entry, status, seconds, server stages)
+    position = iter(range(count))
+
+    async def client_loop():
+        for i in position:
+            entry = entries[i % len(entries)]
+            start = time.perf_counter()
+            response = await client.post("/api/calc/solve", json=entry["request"])
+            elapsed = time.perf_counter() - start
+            samples.append((entry, response.status_code, elapsed, _server_timing(response.headers.get("server-timing", ""))))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return samples, time.perf_counter() - start
+
+
+def _summary(samples, elapsed):
+    latencies = [seconds * 1e3 for _, _, seconds, _ in samples]
+    unexpected = sorted({entry["id"] for entry, status, _, _ in samples if status != entry.get("expect", 200)})
+    statuses, stage_totals, by_type = {}, {}, {}
+    for entry, status, seconds, stages in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+        by_type.setdefault(entry["type"], []).append(seconds * 1e3)
+        for name, ms in stages.items():
+            stage_totals[name] = stage_totals.get(name, 0.0) + ms
+    return {
+        "requests": len(samples),
+        "seconds": elapsed,
+        "throughput_rps": len(samples) / elapsed if elapsed else 0.0,
+        **_percentiles(latencies),
+        "status": statuses,
+        "unexpected": unexpected,
+        "types": {name: _percentiles(values) for name, values in sorted(by_type.items())},
+        "server_stages_ms": {name: total / len(samples) for name, total in stage_totals.items()},
+    }
+
+
+async def _load(corpus, concurrency, requests):
+    import httpx
+
+    from app.api.calculator import result_cache, steps_cache
+    from app.core.arithmetic import compiled_cache
+    from app.core.lazy import prewarm
+    from app.core.parser import expression_cache
+    from app.main import app
+
+    # Imports and worker start-up are not what the cold phase measures
+    prewarm(["sympy", "numpy", "workers"], background=False)
+    for cache in (result_cache, steps_cache, expression_cache, compiled_cache):
+        cache.clear()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        cold = _summary(*await _drive(client, corpus, len(corpus), concurrency))
+        warm = _summary(*await _drive(client, corpus, requests, concurrency))
+    return {"concurrency": concurrency, "cold": cold, "warm": warm}
+
+
+def load(corpus, concurrency=8, requests=2000):
+    try:
+        return asyncio.run(_load(corpus, concurrency, requests))
+    finally:
+        from app.core.executor import shutdown_pool
+
+        shutdown_pool()
+
+
+# --- results and comparison --------------------------------------------------
+
+def environment():
+    import fastapi
+    import numpy
+    import sympy
+
+    from app.config import SOLVE_WORKERS
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).parent, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "sympy": sympy.__version__,
+        "numpy": numpy.__version__,
+        "fastapi": fastapi.__version__,
+        "solve_workers": SOLVE_WORKERS,
+        "commit": commit,
+    }
+
+
+def metrics(results, skip=()):
+    """
+    The comparable numbers in a results file, as a flat {name: value} dict;
+    microbenchmark totals leave out the entry ids in `skip`.
+    """
+    flat = {}
+    for kind, stages in _totals(results.get("micro", {}).get("entries", ()), skip).items():
+        for name, ms in stages.items():
+            flat[f"micro.{kind}.{name}_ms"] = ms
+    for phase in ("cold", "warm"):
+        summary = results.get("load", {}).get(phase)
+        if summary is None:
+            continue
+        for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            flat[f"load.{phase}.{key}"] = summary[key]
+        for kind, percentiles in summary["types"].items():
+            flat[f"load.{phase}.{kind}.p50_ms"] = percentiles["p50_ms"]
+    return flat
+
+
+def compare(current, baseline, threshold=0.25):
+    """
+    Metrics that regressed by more than `threshold` (a fraction) against the
+    baseline, as (name, baseline, current) tuples. Throughput regresses when
+    it drops, everything else (milliseconds) when it grows. Entries whose
+    outcome changed are reported by _changed_outcomes instead.
+    """
+    # An entry that now fails earlier (or no longer fails) times different stages
+    changed = {entry_id for entry_id, _, _ in _changed_outcomes(current, baseline)}
+    now, before = metrics(current, changed), metrics(baseline, changed)
+    regressions = []
+    for name in sorted(now.keys() & before.keys()):
+        old, new = before[name], now[name]
+        if name.endswith("_rps"):
+            worse = new * (1 + threshold) < old
+        else:
+            worse = new > old * (1 + threshold) and new - old > MIN_DELTA_MS
+        if worse:
+            regressions.append((name, old, new))
+    return regressions
+
+
+def _changed_outcomes(current, baseline):
+    before = {e["id"]: e["outcome"] for e in baseline.get("micro", {}).get("entries", ())}
+    return [(e["id"], before[e["id"]], e["outcome"])
+            for e in current.get("micro", {}).get("entries", ()) if before.get(e["id"], e["outcome"]) != e["outcome"]]
+
+
+def _print_micro(results):
+    totals = results["totals"]
+    stages = list(dict.fromkeys(name for by_stage in totals.values() for name in by_stage))
+    width = max(len(name) for name in stages) + 2
+    print(f"{'micro ms':<12}" + "".join(f"{name:>{width}}" for name in stages))
+    for kind, by_stage in totals.items():
+        print(f"{kind:<12}" + "".join(f"{by_stage[n]:>{width}.3f}" if n in by_stage else f"{'-':>{width}}" for n in stages))
+    rejected = [f"{e['id']} ({e['outcome']})" for e in results["entries"] if e["outcome"] != "ok"]
+    if rejected:
+        print("stopped early: " + ", ".join(rejected))
+
+
+def _print_load(results):
+    print(f"\n{'load':<8}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"   concurrency {results['concurrency']}")
+    for phase in ("cold", "warm"):
+        s = results[phase]
+        print(f"{phase:<8}{s['requests']:>10,}{s['throughput_rps']:>10.1f}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}")
+        if s["unexpected"]:
+            print(f"  unexpected status: {', '.join(s['unexpected'])}")
+    stages = results["warm"]["server_stages_ms"]
+    print("warm server stages (mean ms): " + ", ".join(f"{name} {ms:.3f}" for name, ms in stages.items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", default=CORPUS_VERSION, help="corpus version (file in benchmarks/corpus)")
+    parser.add_argument("--types", help="comma-separated request types to include (default: all)")
+    parser.add_argument("--skip-pathological", action="store_true", help="leave out pathological inputs")
+    parser.add_argument("--only", choices=("micro", "load"), help="run one part of the suite")
+    parser.add_argument("--repeat", type=int, default=5, help="microbenchmark runs per stage (best is kept)")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent load-test clients")
+    parser.add_argument("--requests", type=int, default=2000, help="warm load-test requests")
+    parser.add_argument("--out", default="benchmark-results.json", help="where to write the results")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, as a fraction")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus, args.types and args.types.split(","), not args.skip_pathological)
+    results = {"schema": SCHEMA, "corpus": args.corpus, "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+               "environment": environment(), "entries": len(corpus)}
+    if args.only != "load":
+        results["micro"] = micro(corpus, args.repeat)
+        _print_micro(results["micro"])
+    if args.only != "micro":
+        results["load"] = load(corpus, args.concurrency, args.requests)
+        _print_load(results["load"])
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nresults written to {args.out}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("corpus") != results["corpus"]:
+        print(f"baseline used corpus {baseline.get('corpus')}, not {results['corpus']}: not comparable")
+        return 2
+    for entry_id, old, new in _changed_outcomes(results, baseline):
+        print(f"outcome changed: {entry_id}: {old} -> {new}")
+    regressions = compare(results, baseline, args.threshold)
+    if not regressions:
+        print(f"no regressions beyond {args.threshold:.0%} against {args.baseline}")
+        return 0
+    print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%} against {args.baseline}:")
+    for name, old, new in regressions:
+        print(f"  {name:<40}{old:>12.3f} -> {new:>12.3f}  ({new / old - 1 if old else float('inf'):+.0%})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -215,6 +215,7 @@ function App() {
         equation: finalEq,
         variable,
         type: activeType,
+        step_detail: "full",
       });
 
       setApiData(response.data);
@@ -310,6 +311,7 @@ if (!finalEq.trim()) {
         equation:finalEq,
         variable,
         type: activeType,
+        step_detail: "full",
       });
       setApiData(response.data);
       appendHistory({
@@ -0,0 +1,11 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+@pytest.fixture(scope="session")
+def client():
+    # The context manager runs the lifespan hook, which stops the worker pool
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,112 @@
+import math
+
+import pytest
+
+from app.core.arithmetic import compile_arithmetic, evaluate_arithmetic, tokenize
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2+3*4", 14),
+    ("(1+2)*3", 9),
+    ("2**3**2", 512),
+    ("2^3", 8),
+    ("-2**2", -4),
+    ("7//2", 3),
+    ("10 % 3", 1),
+    ("2×3", 6),
+    ("6÷3", 2.0),
+    ("2x3", 6),
+    ("2x(3)", 6),
+    ("2³", 8),
+    ("5!", 120),
+    ("nPr(5,2)", 20),
+    ("nCr(5,2)", 10),
+    ("1e3", 1000.0),
+    ("log(100)", 2.0),
+    ("ln(e)", 1.0),
+    ("sqrt(16)", 4.0),
+    ("math.sqrt(9)", 3.0),
+])
+def test_calculator_syntax(text, expected):
+    assert evaluate_arithmetic(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("sin(30)", 0.5),
+    ("tan(45)", 1.0),
+    ("cos⁻¹(0)", 90.0),
+])
+def test_trig_in_degrees(text, expected):
+    assert evaluate_arithmetic(text) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("text, message", [
+    ("1+", "Unexpected 'end of input'"),
+    ("2 3", "Unexpected '3'"),
+    ("foo(1)", "Unknown name 'foo'"),
+    ("2.5!", "Expected an integer"),
+    ("nCr(4,-1)", "nCr requires 0 <= r <= n"),
+])
+def test_invalid_input(text, message):
+    with pytest.raises(ValueError, match=message):
+        evaluate_arithmetic(text)
+
+
+def test_x_is_a_name_without_x_is_times():
+    with pytest.raises(ValueError, match="Unknown name 'x'"):
+        evaluate_arithmetic("x+1", x_is_times=False)
+
+
+def test_compiled_once():
+    assert compile_arithmetic("1+2+3") is compile_arithmetic("1+2+3")
+
+
+def test_norm_of_numbers_is_one_literal():
+    assert tokenize("||3, 4||") == [("op", "||"), ("array", (3.0, 4.0)), ("op", "||"), ("end", None)]
+
+
+def test_large_norm_literal():
+    values = [i % 7 + 1 for i in range(100_000)]
+    text = "||" + ",".join(map(str, values)) + "||"
+    assert evaluate_arithmetic(text) == pytest.approx(math.sqrt(sum(v * v for v in values)))
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("||3,4||", 5.0),
+    ("||3, 4|| + ||[6, 8]||", 15.0),
+    ("2*||3,4||", 10.0),
+])
+def test_norm(text, expected):
+    assert evaluate_arithmetic(text) == pytest.approx(expected)
+
+
+def test_vector_division_by_zero():
+    with pytest.raises(ValueError, match="Division by zero"):
+        evaluate_arithmetic("[1, 2]/0")
+
+
+@pytest.mark.parametrize("text", ["[1, 2]*[3, 4]", "2/[1, 2]", "[1, 2]**2", "[1, 2]²", "[1, 2] % 2", "[1, 2] // 2"])
+def test_vectors_are_not_combined_element_wise(text):
+    with pytest.raises(ValueError):
+        evaluate_arithmetic(text)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("[1, 2]/2", [0.5, 1.0]),
+    ("3*[1, 2]", [3.0, 6.0]),
+    ("dot([1, 2], [3, 4])**2", 121.0),
+    ("||[3, 4]||**2", 25.0),
+])
+def test_scalar_operations_on_vectors(text, expected):
+    assert evaluate_arithmetic(text) == pytest.approx(expected)
+
+
+def test_solve_arithmetic(client):
+    response = client.post("/api/calc/solve", json={"equation": "2x3 + 4²", "type": "arithmetic"})
+    assert response.status_code == 200
+    assert response.json()["result"] == "22"
+
+
+def test_solve_arithmetic_error(client):
+    response = client.post("/api/calc/solve", json={"equation": "2 +", "type": "arithmetic"})
+    assert response.status_code == 400
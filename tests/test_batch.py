@@ -0,0 +1,25 @@
+def test_batch_results_come_back_in_order(client):
+    body = [
+        {"equation": "x - 1", "include_steps": False},
+        {"equation": "2+2", "type": "arithmetic", "include_steps": False},
+        {"equation": "x**2 - 4", "include_steps": False},
+    ]
+    response = client.post("/api/calc/solve/batch", json=body).json()
+    assert response["count"] == 3
+    assert [item["result"] for item in response["results"]] == [["1"], "4", ["-2", "2"]]
+
+
+def test_duplicate_equations_are_solved_once(client):
+    body = [{"equation": "x**3 - 8", "include_steps": False}] * 3
+    response = client.post("/api/calc/solve/batch", json=body).json()
+    assert response["solved"] == 1
+    assert all(item["result"] == response["results"][0]["result"] for item in response["results"])
+
+
+def test_failed_items_do_not_fail_the_batch(client):
+    body = [{"equation": "1/0", "type": "arithmetic"}, {"equation": "x + 1", "include_steps": False}]
+    response = client.post("/api/calc/solve/batch", json=body)
+    assert response.status_code == 200
+    first, second = response.json()["results"]
+    assert first == {"success": False, "status_code": 400, "detail": "Math Error: Division by zero"}
+    assert second["result"] == ["-1"]
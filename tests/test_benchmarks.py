@@ -0,0 +1,33 @@
+import pytest
+
+from benchmarks.suite import compare, load_corpus
+
+CORPUS = load_corpus()
+
+
+def test_corpus_filters():
+    assert {e["type"] for e in load_corpus(types={"trig"})} == {"trig"}
+    assert all("pathological" not in e.get("tags", ()) for e in load_corpus(pathological=False))
+
+
+@pytest.mark.parametrize("entry", CORPUS, ids=[e["id"] for e in CORPUS])
+def test_corpus_outcomes(client, entry):
+    # The benchmark compares timings; it relies on every entry still ending the same way
+    response = client.post("/api/calc/solve", json=entry["request"])
+    assert response.status_code == entry.get("expect", 200)
+
+
+def _results(p50_ms, throughput, outcome="200"):
+    return {
+        "micro": {"entries": [{"id": "a", "type": "algebra", "outcome": outcome, "stages": {}}]},
+        "load": {"warm": {"throughput_rps": throughput, "p50_ms": p50_ms, "p95_ms": 1.0, "p99_ms": 1.0, "types": {}}},
+    }
+
+
+def test_compare_flags_regressions_beyond_the_threshold():
+    baseline = _results(p50_ms=1.0, throughput=100.0)
+    assert compare(_results(p50_ms=1.2, throughput=90.0), baseline) == []
+    assert compare(_results(p50_ms=2.0, throughput=50.0), baseline) == [
+        ("load.warm.p50_ms", 1.0, 2.0),
+        ("load.warm.throughput_rps", 100.0, 50.0),
+    ]
@@ -0,0 +1,57 @@
+import time
+
+from app.core.cache import LRUCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_bound():
+    cache = LRUCache(max_entries=100, max_bytes=1000, sizeof=len)
+    for key in range(5):
+        cache.set(key, "x" * 300)
+    assert len(cache) == 3
+    assert cache.stats()["bytes"] == 900
+
+
+def test_oversized_value_does_not_flush_the_cache():
+    cache = LRUCache(max_entries=100, max_bytes=1000, sizeof=len)
+    cache.set("small", "x" * 10)
+    cache.set("huge", "x" * 2000)
+    assert cache.get("huge") is None
+    assert cache.get("small") == "x" * 10
+
+
+def test_entries_expire():
+    cache = LRUCache(max_entries=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_hit_rate():
+    cache = LRUCache()
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_solve_results_are_cached(client):
+    body = {"equation": "x**2 - 9", "include_steps": False}
+    first = client.post("/api/calc/solve", json=body).json()
+    hits = client.get("/api/calc/cache/stats").json()["results"]["hits"]
+    second = client.post("/api/calc/solve", json=body).json()
+    assert first["result"] == ["-3", "3"]
+    assert second == first
+    assert client.get("/api/calc/cache/stats").json()["results"]["hits"] == hits + 1
@@ -0,0 +1,53 @@
+import pytest
+
+from app.core.calculus import _definite_integral
+
+
+def _integrate(text, lower, upper):
+    from app.core.parser import parse_equation
+    import sympy
+
+    operation = {"lower": lower, "upper": upper}
+    return _definite_integral(parse_equation(text), sympy.Symbol("x"), operation, lambda stage: None)
+
+
+@pytest.mark.parametrize("text, lower, upper", [("1/x", "-1", "1"), ("1/x", "1", "oo"), ("-1/x**2", "-1", "1")])
+def test_divergent_integral_is_not_converged(text, lower, upper):
+    assert _integrate(text, lower, upper)["converged"] is False
+
+
+def test_convergent_integral():
+    result = _integrate("x**2", "0", "3")
+    assert result["converged"] is True and result["approx"] == pytest.approx(9.0)
+
+
+def _calculus(client, equation, operations):
+    return client.post("/api/calc/solve", json={
+        "equation": equation, "type": "calculus", "operations": operations, "include_steps": False,
+    })
+
+
+def test_quadrature_fallback(client):
+    response = _calculus(client, "sin(sin(x))", [{"op": "definite_integral", "lower": "0", "upper": "1"}])
+    result = response.json()["result"]["definite_integral"]
+    assert result["method"] == "gauss_kronrod"
+    assert result["converged"] is True
+    assert result["approx"] == pytest.approx(0.4306061031206906)
+
+
+def test_symbolic_definite_integral(client):
+    response = _calculus(client, "sin(x)/x", [{"op": "definite_integral", "lower": "0", "upper": "1"}])
+    result = response.json()["result"]["definite_integral"]
+    assert result["method"] == "symbolic" and result["value"] == "Si(1)"
+
+
+def test_only_requested_operations(client):
+    response = _calculus(client, "sin(x)/x", [{"op": "limit", "point": "0"}, {"op": "derivative", "order": 2}, "derivative"])
+    result = response.json()["result"]
+    assert list(result) == ["limit", "derivative", "derivative_2"]
+    assert result["limit"] == "1"
+    assert result["derivative_2"] == "cos(x)/x - sin(x)/x**2"
+
+
+def test_unknown_operation(client):
+    assert _calculus(client, "x", [{"op": "bogus"}]).status_code == 400
@@ -0,0 +1,42 @@
+import pytest
+
+from app.core.executor import SystemTask, WorkerPool, execute
+from app.utils.exceptions import SolveTimeout
+
+
+def test_execute_solves_inline():
+    outcome = execute(("x**2 - 1", "x", "algebra", None))
+    assert outcome["ok"] and outcome["result"] == ["-1", "1"]
+
+
+def test_execute_reports_errors_as_values():
+    outcome = execute(("x +* 1", "x", "algebra", None))
+    assert outcome["ok"] is False and outcome["status_code"] == 400
+
+
+def test_execute_system_task():
+    outcome = execute(SystemTask(["x + y - 3", "x - y - 1"], ["x", "y"], None))
+    assert outcome["ok"] and outcome["result"] == [{"x": "2", "y": "1"}]
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = WorkerPool(1)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_runs_tasks(pool):
+    outcome = pool.run(("x - 5", "x", "algebra", None), timeout=30)
+    assert outcome["result"] == ["5"]
+    assert pool.stats()["completed"] >= 1
+
+
+def test_overrunning_task_is_killed(pool):
+    pool.run(("x", "x", "algebra", None), timeout=30)  # worker started and warm
+    with pytest.raises(SolveTimeout) as excinfo:
+        pool.run(("x**5 + x + sin(x) - 1", "x", "algebra", None), timeout=0.2)
+    assert excinfo.value.stage in ("parse", "classify", "solve")
+    assert pool.stats()["timeouts"] == 1
+    # The killed worker was replaced
+    assert pool.run(("x - 2", "x", "algebra", None), timeout=30)["result"] == ["2"]
@@ -0,0 +1,71 @@
+import math
+
+import pytest
+import sympy
+
+from app.core.encoding import dumps
+from app.core.formatter import format_result, render, truncate
+
+x = sympy.Symbol("x")
+
+
+@pytest.mark.parametrize("fmt, expected", [
+    ("plain", "sqrt(2)/2"),
+    ("latex", "\\frac{\\sqrt{2}}{2}"),
+    ("mathml", "<mrow><mfrac><msqrt><mn>2</mn></msqrt><mn>2</mn></mfrac></mrow>"),
+    ("srepr", "Mul(Rational(1, 2), Pow(Integer(2), Rational(1, 2)))"),
+    ("numeric", "0.707106781186548"),
+])
+def test_render(fmt, expected):
+    assert render(sympy.sqrt(2) / 2, fmt) == expected
+
+
+def test_render_numeric_keeps_symbols_and_imaginary_parts():
+    assert render(1 + 2 * sympy.I, "numeric") == "1 + 2*I"
+    assert render(sympy.pi * x, "numeric") == "3.14159265358979*x"
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError, match="format must be one of"):
+        render(x, "bogus")
+
+
+def test_trig_results_carry_angles():
+    result = format_result([sympy.pi / 6, 5 * sympy.pi / 6], "trig")
+    assert result["exact"] == ["pi/6", "5*pi/6"]
+    assert result["approx_deg"] == pytest.approx([30.0, 150.0])
+
+
+def test_truncate():
+    assert truncate("abcdef", 3) == ("abc… (3 more characters)", True)
+    assert truncate("abc", 3) == ("abc", False)
+    assert truncate("abcdef", 0) == ("abcdef", False)
+    assert truncate({"a": ["abcdef", "ab"], "b": 1}, 3) == ({"a": ["abc… (3 more characters)", "ab"], "b": 1}, True)
+
+
+def test_dumps_maps_nan_to_null():
+    assert dumps({"values": [1.0, math.nan, math.inf]}) == b'{"values":[1.0,null,null]}'
+
+
+def _solve(client, **extra):
+    return client.post("/api/calc/solve", json={"equation": "x**2-2", "include_steps": False, **extra})
+
+
+def test_output_format(client):
+    body = _solve(client, format="latex").json()
+    assert body["format"] == "latex"
+    assert body["result"] == ["- \\sqrt{2}", "\\sqrt{2}"]
+    assert _solve(client, format="bogus").status_code == 400
+
+
+def test_long_results_are_truncated(client):
+    body = _solve(client, equation="x**4 + x + 1", max_length=10).json()
+    assert body["truncated"] is True
+    assert all(r.endswith("more characters)") for r in body["result"])
+
+
+def test_large_responses_are_compressed(client):
+    large = client.post("/api/calc/evaluate", json={"expression": "x", "variables": {"x": {"start": 0, "stop": 1, "num": 1000}}})
+    assert large.headers["content-encoding"] == "gzip"
+    small = client.post("/api/calc/solve", json={"equation": "2+2", "type": "arithmetic"})
+    assert "content-encoding" not in small.headers
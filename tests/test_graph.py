@@ -0,0 +1,43 @@
+import numpy as np
+import sympy
+
+from app.core.graph import adaptive_sample, render_plot
+from app.core.numeric import compile_function
+
+x = sympy.Symbol("x")
+
+
+def test_straight_line_keeps_the_coarse_grid():
+    xs, ys = adaptive_sample(compile_function(2 * x, ["x"]), -1.0, 1.0)
+    assert len(xs) == 65
+    assert np.allclose(ys, 2 * xs)
+
+
+def test_curves_are_refined_within_budget():
+    xs, _ = adaptive_sample(compile_function(sympy.sin(1 / x), ["x"]), 0.01, 1.0, max_points=500)
+    assert 65 < len(xs) <= 500
+    assert np.all(np.diff(xs) > 0)
+
+
+def test_render_is_cached():
+    assert render_plot(x**2, fmt="svg") is render_plot(x**2, fmt="svg")
+
+
+def test_graph_png(client):
+    response = client.get("/api/calc/graph", params={"equation": "x^2", "xmin": -2, "xmax": 2})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert response.content.startswith(b"\x89PNG")
+
+
+def test_graph_svg(client):
+    response = client.post("/api/calc/graph", json={"equation": "tan(x)", "format": "svg"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("image/svg+xml")
+    assert b"<svg" in response.content
+
+
+def test_graph_errors(client):
+    assert client.post("/api/calc/graph", json={"equation": "x", "xmin": 1, "xmax": 0}).status_code == 400
+    assert client.post("/api/calc/graph", json={"equation": "x*y"}).status_code == 400
+    assert client.post("/api/calc/graph", json={"equation": "besselj(0, x)"}).status_code == 400
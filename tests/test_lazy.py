@@ -0,0 +1,35 @@
+import subprocess
+import sys
+
+from app.core.lazy import lazy_module, load, prewarm, startup_report
+
+
+def test_app_import_leaves_the_scientific_stack_unloaded():
+    # A fresh interpreter: this test session has long since imported everything
+    code = (
+        "import sys, app.main; "
+        "print(','.join(m for m in ('sympy', 'numpy', 'matplotlib') if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
+
+
+def test_lazy_module_loads_on_first_attribute():
+    module = lazy_module("json")
+    assert "not loaded" in repr(module)
+    assert module.dumps([1]) == "[1]"
+    assert "(loaded)" in repr(module)
+
+
+def test_load_returns_the_same_module():
+    assert load("json") is load("json")
+
+
+def test_prewarm_in_the_foreground():
+    prewarm(["json"], background=False)
+    assert startup_report({})["prewarm"]["state"] == "done"
+
+
+def test_startup_endpoint(client):
+    body = client.get("/api/calc/startup").json()
+    assert set(body) == {"app_imports_ms", "lazy_imports_ms", "loaded", "prewarm"}
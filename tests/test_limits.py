@@ -0,0 +1,86 @@
+import pytest
+
+from app.core.arithmetic import evaluate_arithmetic
+from app.core import limits
+from app.core.limits import check_symbolic, max_result_bits
+from app.utils.exceptions import ExpressionTooExpensive
+
+
+def test_result_bits_stay_printable():
+    # Python will not print an int of more than 4300 digits (~14,284 bits)
+    assert max_result_bits() <= 14_284
+
+
+@pytest.mark.parametrize("text", ["2**20000", "factorial(2000)", "nPr(3000, 1500)", "2**99000"])
+def test_unprintable_integers_are_approximated(text):
+    # 14k-100k bits: admitted before, then failed to print after the work was done
+    result = evaluate_arithmetic(text)
+    assert isinstance(result, str) and "e+" in result
+
+
+def test_unprintable_intermediate_is_rejected():
+    with pytest.raises(ExpressionTooExpensive):
+        evaluate_arithmetic("2**20000 - 2**20000 + 1")
+
+
+def test_printable_integer_is_exact():
+    assert evaluate_arithmetic("2**13000") == 2**13000
+
+
+@pytest.mark.parametrize("spellings", [
+    ["nCr(60000, 30000)", "math.comb(60000, 30000)"],
+    ["nPr(60000, 30000)", "math.perm(60000, 30000)"],
+    ["factorial(3000)", "math.factorial(3000)", "math.perm(3000)"],
+])
+def test_every_spelling_gets_the_same_approximation(spellings):
+    results = {evaluate_arithmetic(text) for text in spellings}
+    assert len(results) == 1
+    assert isinstance(results.pop(), str)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("9**9**9", "4.28125e+369693099"),
+    ("factorial(10**7)", "1.202423e+65657059"),
+])
+def test_oversized_results_are_approximated(text, expected):
+    assert evaluate_arithmetic(text) == expected
+
+
+def test_exponent_tower_is_rejected():
+    with pytest.raises(ExpressionTooExpensive) as excinfo:
+        evaluate_arithmetic("2**2**2**2**2**2")
+    assert excinfo.value.reason == "result_bits"
+
+
+def test_reject_policy(monkeypatch):
+    monkeypatch.setattr(limits, "OVERSIZE_POLICY", "reject")
+    with pytest.raises(ExpressionTooExpensive):
+        evaluate_arithmetic("7**7**7")
+
+
+@pytest.mark.parametrize("text, reason", [
+    ("(x+1)**10**6", "polynomial_degree"),
+    ("x**2000", "polynomial_degree"),
+    ("factorial(10**7)", "factorial"),
+    ("9**9**9", "result_bits"),
+])
+def test_symbolic_input_is_rejected(text, reason):
+    with pytest.raises(ExpressionTooExpensive) as excinfo:
+        check_symbolic(text)
+    assert excinfo.value.reason == reason
+
+
+def test_cheap_symbolic_input_is_admitted():
+    assert check_symbolic("(x+1)**5") is None
+
+
+def test_rejection_is_a_422(client):
+    response = client.post("/api/calc/solve", json={"equation": "(x+1)**10**6", "type": "algebra"})
+    assert response.status_code == 422
+    assert response.json()["detail"]["reason"] == "polynomial_degree"
+
+
+def test_approximation_through_the_endpoint(client):
+    response = client.post("/api/calc/solve", json={"equation": "9**9**9", "type": "arithmetic"})
+    assert response.status_code == 200
+    assert response.json()["approximate"] is True
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+import sympy
+
+from app.core.arithmetic import evaluate_arithmetic
+from app.core.linalg import cross, det, divide, dot, expand_vectors, inv, norm, reduce_vectors, times
+
+x = sympy.Symbol("x")
+
+
+def test_norm_of_scalars_vectors_and_matrices():
+    assert norm(3.0, 4.0) == norm(np.array([3.0, 4.0])) == 5.0
+    assert norm(np.array([[1.0, 2.0], [2.0, 4.0]])) == 5.0
+    assert norm(sympy.Matrix([x, 1])) == sympy.sqrt(x**2 + 1)
+
+
+def test_numeric_and_symbolic_operands_share_functions():
+    assert dot(np.array([1.0, 2.0]), np.array([3.0, 4.0])) == 11.0
+    assert dot(sympy.Matrix([1, 2]), sympy.Matrix([x, 1])) == x + 2
+    assert cross(np.array([1.0, 0, 0]), np.array([0, 1.0, 0])).tolist() == [0.0, 0.0, 1.0]
+    assert det(sympy.Matrix([[x, 1], [1, x]])) == x**2 - 1
+    assert inv(np.array([[2.0, 0], [0, 4.0]])).tolist() == [[0.5, 0.0], [0.0, 0.25]]
+
+
+@pytest.mark.parametrize("call, message", [
+    (lambda: times(np.ones(2), np.ones(2)), "needs a scalar operand"),
+    (lambda: divide(1.0, np.ones(2)), "needs a scalar divisor"),
+    (lambda: dot(np.ones(2), np.ones(3)), "same length"),
+    (lambda: cross(np.ones(2), np.ones(2)), "3-component"),
+    (lambda: det(np.ones(2)), "square matrix"),
+    (lambda: inv(np.ones((2, 2))), "singular"),
+    (lambda: inv(sympy.Matrix([[x, x], [1, 1]])), "singular"),
+])
+def test_invalid_operands(call, message):
+    with pytest.raises(ValueError, match=message):
+        call()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("{1,2}+{3,4}", [4.0, 6.0]),
+    ("[1,2]·[3,4]", 11.0),
+    ("[[1,2],[3,4]]@[1,1]", [3.0, 7.0]),
+    ("transpose([[1,2],[3,4]])", [[1.0, 3.0], [2.0, 4.0]]),
+    ("inv([[1,2],[3,4]])", [[-2.0, 1.0], [1.5, -0.5]]),
+    ("det([[1,2],[3,4]])", -2.0),
+])
+def test_arithmetic(text, expected):
+    assert np.allclose(evaluate_arithmetic(text), expected)
+
+
+def test_ragged_matrix():
+    with pytest.raises(ValueError, match="same length"):
+        evaluate_arithmetic("[[1,2],[3]]")
+
+
+def test_plain_input_is_left_alone():
+    assert reduce_vectors("x**2 + 1") == ("x**2 + 1", None)
+    assert expand_vectors("x**2 + 1") == "x**2 + 1"
+
+
+def test_long_numeric_lists_are_reduced_exactly():
+    # 100 ones: the norm is reduced with NumPy to the exact integer 10
+    text = "||" + ",".join(["1"] * 100) + "|| - x"
+    assert reduce_vectors(text) == ("10 - x", None)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("||[3,4]|| + x", "x + 5"),
+    ("||[x, 1] + [2, 3]||", "sqrt((x + 2)**2 + 16)"),
+    ("dot([1,2],[x,y])", "x + 2*y"),
+    ("[[1,2],[3,4]]@[1,1]", "sqrt(58)"),
+])
+def test_expand_vectors(text, expected):
+    assert expand_vectors(text) == expected
+
+
+@pytest.mark.parametrize("text", ["[1,2]+[1,2,3]", "[x,1]*[1,2]", "[x,1]/0"])
+def test_expand_vectors_errors(text):
+    with pytest.raises(ValueError):
+        expand_vectors(text)
+
+
+def test_vectors_in_equations(client):
+    response = client.post("/api/calc/solve", json={"equation": "||[x, 1]|| - 5", "include_steps": False})
+    assert response.json()["result"] == ["-2*sqrt(6)", "2*sqrt(6)"]
+
+
+def test_vector_result(client):
+    response = client.post("/api/calc/solve", json={"equation": "[1,2]+[3,4]", "type": "arithmetic", "include_steps": False})
+    body = response.json()
+    assert body["result"] == ["4.0", "6.0"] and body["shape"] == [2]
+
+
+def test_vector_errors_are_400(client):
+    response = client.post("/api/calc/solve", json={"equation": "[1,2]*[3,4]", "type": "arithmetic"})
+    assert response.status_code == 400
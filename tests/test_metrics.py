@@ -0,0 +1,39 @@
+from app.core.metrics import Counter, Histogram
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("h", "Test histogram.", ("type",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(("a",), value)
+    lines = histogram.render()
+    assert 'h_bucket{type="a",le="0.1"} 1' in lines
+    assert 'h_bucket{type="a",le="1"} 2' in lines
+    assert 'h_bucket{type="a",le="+Inf"} 3' in lines
+    assert 'h_count{type="a"} 3' in lines
+
+
+def test_label_values_are_escaped():
+    counter = Counter("c", "Test counter.", ("type",))
+    counter.inc(('say "hi"',))
+    assert 'c{type="say \\"hi\\""} 1' in counter.render()
+
+
+def test_server_timing_header(client):
+    response = client.post("/api/calc/solve", json={"equation": "2+2", "type": "arithmetic"})
+    timings = response.headers["Server-Timing"].split(", ")
+    assert [t.split(";")[0] for t in timings] == ["arithmetic", "serialize", "total"]
+
+
+def test_metrics_endpoint(client):
+    client.post("/api/calc/solve", json={"equation": "2+", "type": "arithmetic"})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'calc_request_errors_total{type="arithmetic",status="400"}' in text
+    assert 'calc_stage_duration_seconds_count{type="arithmetic",stage="arithmetic"}' in text
+
+
+def test_request_type_label_is_bounded(client):
+    client.post("/api/calc/solve", json={"equation": "2+2", "type": "made-up"})
+    assert 'type="made-up"' not in client.get("/metrics").text
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+import sympy
+
+from app.core.numeric import build_input, evaluate_function
+from app.models.request import RangeSpec
+
+x, y = sympy.symbols("x y")
+
+
+def test_build_input_from_list():
+    assert build_input([1, 2, 3]).tolist() == [1.0, 2.0, 3.0]
+
+
+def test_build_input_from_range():
+    assert build_input(RangeSpec(start=0, stop=1, num=5)).tolist() == [0.0, 0.25, 0.5, 0.75, 1.0]
+    assert build_input(RangeSpec(start=0, stop=1, step=0.5)).tolist() == [0.0, 0.5, 1.0]
+
+
+def test_build_input_rejects_backwards_step():
+    with pytest.raises(ValueError, match="step"):
+        build_input(RangeSpec(start=0, stop=1, step=-0.5))
+
+
+def test_element_wise():
+    values = evaluate_function(x + y, ["x", "y"], [np.array([1.0, 2.0]), np.array([10.0, 20.0])])
+    assert values.tolist() == [11.0, 22.0]
+
+
+def test_grid():
+    values = evaluate_function(x * y, ["x", "y"], [np.array([1.0, 2.0]), np.array([1.0, 2.0, 3.0])], grid=True)
+    assert values.tolist() == [[1.0, 2.0, 3.0], [2.0, 4.0, 6.0]]
+
+
+def test_undefined_points_are_nan():
+    values = evaluate_function(sympy.sqrt(x), ["x"], [np.array([-1.0, 4.0])])
+    assert np.isnan(values[0]) and values[1] == 2.0
+
+
+def test_missing_variable():
+    with pytest.raises(ValueError, match="No values given for variable"):
+        evaluate_function(x + y, ["x"], [np.array([1.0])])
+
+
+def test_mismatched_lengths():
+    with pytest.raises(ValueError, match="same length"):
+        evaluate_function(x + y, ["x", "y"], [np.array([1.0, 2.0]), np.array([1.0, 2.0, 3.0])])
+
+
+def test_evaluate_endpoint(client):
+    response = client.post("/api/calc/evaluate", json={
+        "expression": "x^2",
+        "variables": {"x": {"start": 0, "stop": 2, "num": 3}},
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["shape"] == [3]
+    assert body["values"] == [0.0, 1.0, 4.0]
+
+
+def test_evaluate_endpoint_maps_nan_to_null(client):
+    response = client.post("/api/calc/evaluate", json={"expression": "log(x)", "variables": {"x": [-1, 1]}})
+    assert response.json()["values"] == [None, 0.0]
+
+
+def test_evaluate_endpoint_binary(client):
+    response = client.post("/api/calc/evaluate", json={"expression": "2*x", "variables": {"x": [1, 2]}, "format": "binary"})
+    assert response.headers["X-Shape"] == "2"
+    assert np.frombuffer(response.content, dtype="<f8").tolist() == [2.0, 4.0]
+
+
+def test_function_without_numeric_implementation(client):
+    response = client.post("/api/calc/evaluate", json={"expression": "besselj(0, x)", "variables": {"x": [1]}})
+    assert response.status_code == 400
@@ -0,0 +1,39 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.core.quadrature import integrate_adaptive
+
+
+@pytest.mark.parametrize("func, a, b, expected", [
+    (np.sin, 0, math.pi, 2.0),
+    (lambda x: np.exp(-x * x), -np.inf, np.inf, math.sqrt(math.pi)),
+    (lambda x: np.exp(-x), 0, np.inf, 1.0),
+    (lambda x: np.exp(x), -np.inf, 0, 1.0),
+    (lambda x: 1 / np.sqrt(x), 0, 1, 2.0),  # endpoint singularity
+])
+def test_converges(func, a, b, expected):
+    value, error, converged = integrate_adaptive(func, a, b)
+    assert converged
+    assert value == pytest.approx(expected, abs=1e-8)
+    assert error < 1e-8
+
+
+def test_reversed_bounds_negate():
+    assert integrate_adaptive(np.sin, math.pi, 0)[0] == pytest.approx(-2.0)
+
+
+def test_empty_interval():
+    assert integrate_adaptive(np.sin, 1, 1) == (0.0, 0.0, True)
+
+
+def test_out_of_budget_is_not_converged():
+    value, error, converged = integrate_adaptive(lambda x: np.cos(100 * x), 0, 1, max_intervals=4)
+    assert not converged
+    assert error > 1e-10
+
+
+def test_pole_inside_the_interval():
+    with pytest.raises(ValueError, match="not finite"):
+        integrate_adaptive(lambda x: 1 / x, -1, 1)
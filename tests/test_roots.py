@@ -0,0 +1,60 @@
+import math
+
+import numpy as np
+import pytest
+import sympy
+
+from app.core.numeric import compile_function
+from app.core.roots import find_roots, find_roots_batch
+
+x, a = sympy.symbols("x a")
+
+
+def test_sign_changes():
+    assert find_roots(x**2 - 2, "x", -10, 10) == pytest.approx([-math.sqrt(2), math.sqrt(2)])
+
+
+def test_every_root_in_the_interval():
+    expected = [k * math.pi for k in range(-3, 4)]
+    assert find_roots(sympy.sin(x), "x", -10, 10) == pytest.approx(expected, abs=1e-9)
+
+
+def test_double_root_without_sign_change():
+    assert find_roots(x**2, "x", -1, 1) == pytest.approx([0.0], abs=1e-9)
+
+
+def test_poles_are_not_roots():
+    # tan changes sign at pi/2 too, but that is a pole
+    assert find_roots(sympy.tan(x), "x", 0, 4) == pytest.approx([0.0, math.pi], abs=1e-12)
+
+
+def test_no_real_roots():
+    assert find_roots(x**2 + 1, "x", -1, 1).size == 0
+
+
+def test_batch_rows_are_solved_independently():
+    func = compile_function(x**2 - a, ["x", "a"])
+    rows = find_roots_batch(func, [np.array([1.0, 4.0, -1.0])], -10, 10)
+    assert [r.tolist() for r in rows] == [pytest.approx([-1, 1]), pytest.approx([-2, 2]), []]
+
+
+def test_numeric_mode(client):
+    response = client.post("/api/calc/solve", json={"equation": "cos(x) - x", "mode": "numeric", "include_steps": False})
+    body = response.json()
+    assert body["strategy"] == "numeric"
+    assert float(body["result"][0]) == pytest.approx(0.7390851332151607)
+
+
+def test_auto_mode_prefers_exact_solutions(client):
+    response = client.post("/api/calc/solve", json={"equation": "x**2 - 4", "mode": "auto", "include_steps": False})
+    assert response.json()["strategy"] == "quadratic"
+
+
+def test_auto_mode_falls_back_to_numeric(client):
+    response = client.post("/api/calc/solve", json={"equation": "cos(x) - x", "mode": "auto", "include_steps": False})
+    assert response.json()["strategy"] == "numeric"
+
+
+def test_numeric_mode_needs_one_variable(client):
+    response = client.post("/api/calc/solve", json={"equation": "x*y", "mode": "numeric"})
+    assert response.status_code == 400
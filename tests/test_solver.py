@@ -0,0 +1,44 @@
+import pytest
+import sympy
+
+from app.core.solver import classify_equation, solve_with_strategy
+
+x, a = sympy.symbols("x a")
+
+
+@pytest.mark.parametrize("expr, strategy", [
+    (2*x - 4, "linear"),
+    (x**2 - 2, "quadratic"),
+    (x**3 - x, "cubic"),
+    (x**4 - 1, "quartic"),
+    (x**5 - x, "polynomial"),
+    (sympy.sin(x), "general"),
+    (sympy.Integer(3), "general"),
+])
+def test_classify(expr, strategy):
+    assert classify_equation(expr, x)[0] == strategy
+
+
+@pytest.mark.parametrize("expr", [2*x - 4, a*x + 1, x**2 - 2, x**2 + 1, x**3 - x, x**4 - 1, x**5 - x])
+def test_fast_paths_match_solve(expr):
+    # Same solutions, in the same order, as the generic solver
+    assert solve_with_strategy(expr)[0] == sympy.solve(expr, x)
+
+
+def test_unsolvable_quintic_falls_back_to_companion_matrix():
+    solutions, strategy = solve_with_strategy(x**5 - x - 1)
+    assert strategy == "companion_matrix"
+    assert len(solutions) == 5
+    assert solutions[0] == pytest.approx(1.1673039782614187)
+    assert all(abs(complex((x**5 - x - 1).subs(x, s))) < 1e-9 for s in solutions)
+
+
+def test_general_equations_use_solve():
+    assert solve_with_strategy(sympy.sin(x)) == ([0, sympy.pi], "general")
+
+
+def test_strategy_in_response(client):
+    response = client.post("/api/calc/solve", json={"equation": "x**2 - 2", "type": "algebra", "include_steps": False})
+    body = response.json()
+    assert body["strategy"] == "quadratic"
+    assert body["result"] == ["-sqrt(2)", "sqrt(2)"]
@@ -0,0 +1,79 @@
+import sympy
+
+from app.core import steps
+from app.core.steps import derivation, page, summary_steps
+
+x = sympy.Symbol("x")
+
+
+def test_summary():
+    assert summary_steps("x - 1", ["1"], "linear") == [
+        "Equation received: x - 1",
+        "Solved with the linear strategy",
+        "Solving equation gives: ['1']",
+    ]
+
+
+def test_linear_derivation():
+    lines, complete = derivation(2*x - 4, "x", "algebra", "linear", solutions=[2])
+    assert complete
+    assert lines == [
+        "Solve 2*x - 4 = 0 for x",
+        "Move -4 to the other side: 2*x = 4",
+        "Divide both sides by 2: x = 2",
+        "Solutions: ['2']",
+    ]
+
+
+def test_factoring():
+    lines, _ = derivation(x**2 - 5*x + 6, "x", "algebra", "quadratic", solutions=[2, 3])
+    assert "Factor: (x - 3)*(x - 2) = 0" in lines
+
+
+def test_inverse_functions():
+    lines, _ = derivation(sympy.sin(x) - sympy.Rational(1, 2), "x", "trig", "general")
+    assert "Apply asin to both sides: x = pi/6" in lines
+
+
+def test_calculus_rules():
+    expr = x * sympy.exp(x)
+    results = {"derivative": sympy.diff(expr, x), "integral": sympy.integrate(expr, x)}
+    lines, _ = derivation(expr, "x", "calculus", None, [{"op": "derivative"}, {"op": "integral"}], results)
+    assert any(line.startswith("Product rule:") for line in lines)
+    assert any(line.startswith("Integrate by parts") for line in lines)
+    assert lines[-1] == "Add the constant of integration: ∫ x*exp(x) dx = (x - 1)*exp(x) + C"
+
+
+def test_line_cap_marks_the_derivation_incomplete(monkeypatch):
+    monkeypatch.setattr(steps, "STEPS_MAX", 3)
+    lines, complete = derivation(x**2 - 5*x + 6, "x", "algebra", "quadratic")
+    assert len(lines) == 3
+    assert not complete
+
+
+def test_page():
+    assert page(list(range(5)), 1, 2) == ([1, 2], 3)
+    assert page(list(range(5)), 3, 5) == ([3, 4], None)
+    assert page(list(range(5))) == ([0, 1, 2, 3, 4], None)
+
+
+def _solve(client, **extra):
+    return client.post("/api/calc/solve", json={"equation": "x**2-5*x+6", **extra})
+
+
+def test_summary_by_default(client):
+    body = _solve(client).json()
+    assert len(body["steps"]) == 3
+    assert "steps_total" not in body
+
+
+def test_full_detail_is_paged(client):
+    body = _solve(client, step_detail="full", steps_offset=1, steps_limit=2).json()
+    assert body["steps"] == ["Factor: (x - 3)*(x - 2) = 0", "A product is zero when one of its factors is: solve each factor"]
+    assert body["steps_total"] == 8
+    assert body["steps_complete"] is True
+    assert body["steps_next"] == 3
+
+
+def test_unknown_detail(client):
+    assert _solve(client, step_detail="bogus").status_code == 400
@@ -0,0 +1,52 @@
+import asyncio
+import json
+
+from app.api.calculator import _OVERSIZED, _body_lines
+
+
+def _lines(chunks, limit):
+    async def chunked():
+        for chunk in chunks:
+            yield chunk
+
+    async def collect():
+        return [line async for line in _body_lines(chunked(), limit)]
+
+    return asyncio.run(collect())
+
+
+def test_lines_split_across_chunks():
+    assert _lines([b"ab", b"c\nd", b"e\n", b"f"], 10) == [b"abc", b"de", b"f"]
+
+
+def test_oversized_lines_are_skipped():
+    # The long line spans chunks; only the marker is kept, never the line itself
+    assert _lines([b"ok\n", b"x" * 8, b"x" * 8, b"x\nnext\n"], 10) == [b"ok", _OVERSIZED, b"next"]
+    assert _lines([b"x" * 20 + b"\nnext"], 10) == [_OVERSIZED, b"next"]
+
+
+def test_stream_endpoint(client):
+    lines = [
+        json.dumps({"equation": "2+2", "type": "arithmetic", "include_steps": False}),
+        "",
+        json.dumps({"equation": "x**2-4", "include_steps": False}),
+        "{bad json",
+        json.dumps({"equation": "2+", "type": "arithmetic"}),
+    ]
+    response = client.post("/api/calc/solve/stream", content="\n".join(lines) + "\n")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    results = [json.loads(line) for line in response.text.splitlines()]
+    # Blank lines are not counted; results come back in input order
+    assert [r["index"] for r in results] == [0, 1, 2, 3]
+    assert results[0]["result"] == "4"
+    assert results[1]["result"] == ["-2", "2"]
+    assert results[2]["status_code"] == 422
+    assert results[3]["status_code"] == 400
+
+
+def test_stream_keeps_input_order(client):
+    lines = [json.dumps({"equation": f"{n}*3", "type": "arithmetic", "include_steps": False}) for n in range(50)]
+    response = client.post("/api/calc/solve/stream", content="\n".join(lines))
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["result"] for r in results] == [str(n * 3) for n in range(50)]
@@ -0,0 +1,60 @@
+import pytest
+import sympy
+
+from app.core.sweep import sweep_roots
+
+x, a = sympy.symbols("x a")
+
+
+def _sweep(expr, values, solutions, xmin=-10.0, xmax=10.0):
+    return sweep_roots(expr, "x", ["a"], [values], solutions, xmin, xmax)
+
+
+def test_closed_form_roots_are_limited_to_the_interval():
+    # Row 0 uses the closed form, row 1 (a = 0) the numeric solver; both honour [xmin, xmax]
+    expr = a * x**2 + x - 20
+    solutions = sympy.solve(expr, x)
+    roots, numeric_rows = _sweep(expr, [1.0, 0.0], solutions, xmin=0.0, xmax=30.0)
+    assert numeric_rows == [1]
+    assert roots[0] == [4.0]  # -5 lies outside [0, 30]
+    assert roots[1] == [20.0]
+
+
+def test_roots_outside_the_interval_are_dropped():
+    roots, numeric_rows = _sweep(x - a, [5.0, 20.0, -10.0], [a])
+    assert numeric_rows == []
+    assert roots == [[5.0], [], [-10.0]]
+
+
+def test_rows_without_closed_form_are_solved_numerically():
+    roots, numeric_rows = _sweep(x * sympy.exp(x) - a, [0.0, 1.0], [sympy.LambertW(a)])
+    assert numeric_rows == [0, 1]
+    assert roots[0] == [0.0]
+    assert abs(roots[1][0] - 0.5671432904097838) < 1e-9
+
+
+def test_sweep_endpoint(client):
+    response = client.post("/api/calc/sweep", json={
+        "equation": "a*x**2 + b*x + c",
+        "parameters": {"a": [1, 1, 1], "b": [0, 0, 0], "c": [-4, 1, -9]},
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["strategy"] == "quadratic"
+    assert body["count"] == 3
+    assert body["numeric_rows"] == []
+    assert body["roots"] == [[-2.0, 2.0], [], [-3.0, 3.0]]
+
+
+def test_sweep_endpoint_interval(client):
+    response = client.post("/api/calc/sweep", json={"equation": "x - a", "parameters": {"a": [1, 2]}, "xmin": 0, "xmax": 1.5})
+    assert response.json()["roots"] == [[1.0], []]
+
+
+@pytest.mark.parametrize("body", [
+    {"equation": "x - a - b", "parameters": {"a": [1]}},
+    {"equation": "x - a", "parameters": {"a": [1, 2], "b": [1]}},
+    {"equation": "besselj(0, x) - a", "parameters": {"a": [0.1]}},
+])
+def test_sweep_endpoint_errors(client, body):
+    assert client.post("/api/calc/sweep", json=body).status_code == 400
@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+import sympy
+
+from app.core.systems import parse_linear, solve_linear_matrix, solve_linear_numeric, zero_form
+
+x, y = sympy.symbols("x y")
+
+
+def test_zero_form():
+    assert zero_form("x = y") == "(x) - (y)"
+    assert zero_form("x - 1") == "x - 1"
+    with pytest.raises(ValueError, match="at most one '='"):
+        zero_form("x = 1 = 2")
+
+
+def test_parse_linear():
+    names, rows, cols, values, b, exact = parse_linear(["2*x - y + 3 = 0", "x + y = 1"])
+    assert names == ["x", "y"]
+    assert list(zip(rows.tolist(), cols.tolist(), values.tolist())) == [(0, 0, 2.0), (0, 1, -1.0), (1, 0, 1.0), (1, 1, 1.0)]
+    assert b.tolist() == [-3.0, 1.0]
+    assert exact
+
+
+def test_parse_linear_decimals_are_not_exact():
+    assert parse_linear(["x + 0.5*y = 1"])[-1] is False
+
+
+@pytest.mark.parametrize("texts, variables", [
+    (["x*y = 1"], None),
+    (["2*(x + y) = 1"], None),
+    (["a*x + 1 = 0"], ["x"]),
+    (["E + x = 1"], None),
+])
+def test_parse_linear_declines(texts, variables):
+    # Products, parentheses, parameters and SymPy constants need SymPy
+    assert parse_linear(texts, variables) is None
+
+
+def test_solve_linear_numeric():
+    names, rows, cols, values, b, _ = parse_linear(["x + 0.5*y = 1", "x - y = 2"])
+    solution, strategy = solve_linear_numeric(len(names), rows, cols, values, b)
+    assert strategy == "dense_lu"
+    assert solution == pytest.approx([4 / 3, -2 / 3])
+
+
+def test_singular_system_is_left_to_the_exact_solver():
+    names, rows, cols, values, b, _ = parse_linear(["x + y = 1", "2*x + 2*y = 3"])
+    assert solve_linear_numeric(len(names), rows, cols, values, b) is None
+
+
+def test_large_sparse_system():
+    pytest.importorskip("scipy")
+    n = 300
+    texts = [f"2*u{i} - u{i + 1} = 1" for i in range(n - 1)] + [f"u{n - 1} = 1"]
+    names, rows, cols, values, b, _ = parse_linear(texts, [f"u{i}" for i in range(n)])
+    solution, strategy = solve_linear_numeric(n, rows, cols, values, b)
+    assert strategy == "sparse_lu"
+    assert np.allclose(solution, 1.0)
+
+
+def test_solve_linear_matrix():
+    exprs = [2 * x + sympy.Float(0.5) * y - 1, 2 * (x - y) - 1]
+    solution, strategy = solve_linear_matrix(exprs, ["x", "y"])
+    assert strategy == "dense_lu"
+    assert solution == pytest.approx([0.5, 0.0])
+
+
+def test_small_integral_systems_stay_exact():
+    assert solve_linear_matrix([2 * (x + y) - 1, x - y], ["x", "y"]) is None
+
+
+def _system(client, equations, **extra):
+    return client.post("/api/calc/solve/system", json={"equations": equations, **extra})
+
+
+@pytest.mark.parametrize("equations, strategy, solutions", [
+    (["2*x + y = 3", "x - y = 0"], "linear_exact", [{"x": "1", "y": "1"}]),
+    (["x*2 + y*0.5 = 1", "2*(x - y) = 1"], "dense_lu", [{"x": "0.5", "y": "0"}]),
+    (["x + y = 1", "x + y = 2"], "linear_exact", []),
+    (["x**2 + y**2 = 1", "x - y = 0"], "nonlinear",
+     [{"x": "-sqrt(2)/2", "y": "-sqrt(2)/2"}, {"x": "sqrt(2)/2", "y": "sqrt(2)/2"}]),
+])
+def test_system_endpoint(client, equations, strategy, solutions):
+    body = _system(client, equations).json()
+    assert body["strategy"] == strategy
+    assert body["count"] == len(solutions)
+    assert body["solutions"] == solutions
+
+
+def test_parameters_and_constants_are_not_unknowns(client):
+    body = _system(client, ["a*x + y = 1", "x - y = 0"], variables=["x", "y"]).json()
+    assert body["strategy"] == "linear_symbolic"
+    assert body["solutions"] == [{"x": "1/(a + 1)", "y": "1/(a + 1)"}]
+    assert _system(client, ["E*x = 1"]).json()["solutions"] == [{"x": "exp(-1)"}]
+
+
+def test_malformed_equation(client):
+    assert _system(client, ["x = 1 = 2"]).status_code == 400
+
+def test_long_solutions_are_truncated(client):
+    body = {"equations": ["x + 0.5*y = 1", "x - y = 2"], "max_length": 3}
+    response = client.post("/api/calc/solve/system", json=body).json()
+    assert response["truncated"] is True
+    assert response["solutions"] == [{"x": "1.3… (13 more characters)", "y": "-0.… (15 more characters)"}]
+
+
+def test_short_solutions_are_not_truncated(client):
+    response = client.post("/api/calc/solve/system", json={"equations": ["x + 0.5*y = 1", "x - y = 2"]}).json()
+    assert "truncated" not in response
+    assert response["solutions"] == [{"x": "1.33333333333333", "y": "-0.666666666666667"}]